@@ -0,0 +1,184 @@
+import datetime
+import json
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple
+from fastapi import Depends, HTTPException, status
+from app.auth.oauth2 import get_current_active_user
+from app.config import CHAT_RATE_LIMITS, RATE_LIMIT_REDIS_URL
+from app.models.user import User, UserRole
+
+DEFAULT_LIMITS = {
+    UserRole.USER.value: {"requests_per_minute": 10, "daily_tokens": 200000},
+    UserRole.ADMIN.value: {"requests_per_minute": 60, "daily_tokens": 0},
+}
+WINDOW_SECONDS = 60
+DAY_SECONDS = 24 * 60 * 60
+
+
+def _load_limits(raw: str) -> Dict[str, Dict[str, int]]:
+    """Default limits per role, overridden by the CHAT_RATE_LIMITS JSON"""
+    limits = {role: dict(values) for role, values in DEFAULT_LIMITS.items()}
+    if not raw:
+        return limits
+    try:
+        for role, values in json.loads(raw).items():
+            limits.setdefault(role, {"requests_per_minute": 0, "daily_tokens": 0}).update(values)
+    except (ValueError, AttributeError) as e:
+        print(f"Warning: invalid CHAT_RATE_LIMITS, using defaults: {e}")
+    return limits
+
+
+class MemoryStore:
+    """Expiring counters in this process"""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._values: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, key: str, amount: int, ttl: int) -> int:
+        now = self.clock()
+        with self._lock:
+            value, expires_at = self._values.get(key, (0, 0.0))
+            if expires_at <= now:
+                value = 0
+            value += amount
+            self._values[key] = (value, now + ttl)
+            if len(self._values) > 10000:
+                self._values = {k: v for k, v in self._values.items() if v[1] > now}
+            return value
+
+    def get(self, key: str) -> int:
+        with self._lock:
+            value, expires_at = self._values.get(key, (0, 0.0))
+            return value if expires_at > self.clock() else 0
+
+
+class RedisStore:
+    """Expiring counters in a Redis-compatible server, shared by every worker"""
+
+    def __init__(self, url: str):
+        import redis  # optional dependency, only needed when RATE_LIMIT_REDIS_URL is set
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.5)
+
+    def incr(self, key: str, amount: int, ttl: int) -> int:
+        pipe = self._redis.pipeline()
+        pipe.incrby(key, amount)
+        pipe.expire(key, ttl)
+        return int(pipe.execute()[0])
+
+    def get(self, key: str) -> int:
+        return int(self._redis.get(key) or 0)
+
+
+def create_store(redis_url: str = ""):
+    """Redis store if configured and installed, else in-memory counters"""
+    if redis_url:
+        try:
+            return RedisStore(redis_url)
+        except ImportError as e:
+            print(f"Warning: redis not available, rate limits are per worker: {e}")
+    return MemoryStore()
+
+
+def _too_many_requests(detail: str, retry_after: float, limit: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after))), "X-RateLimit-Limit": str(limit)},
+    )
+
+
+class ChatRateLimiter:
+    """Sliding-window request limit and daily token quota per user, with limits by role"""
+
+    def __init__(self, store, limits: Dict[str, Dict[str, int]], clock: Callable[[], float] = time.time):
+        self.store = store
+        self.limits = limits
+        self.clock = clock
+
+    def limits_for(self, role: Any) -> Dict[str, int]:
+        role = getattr(role, "value", role) or UserRole.USER.value
+        return self.limits.get(role, self.limits[UserRole.USER.value])
+
+    def _day(self, now: float) -> Tuple[str, float]:
+        """UTC day key and seconds until it ends"""
+        day = datetime.datetime.fromtimestamp(now, datetime.timezone.utc)
+        return day.strftime("%Y%m%d"), DAY_SECONDS - (now % DAY_SECONDS)
+
+    def check(self, user_key: str, role: Any):
+        """Count one chat request; raise 429 with Retry-After if the user is over a limit"""
+        limits = self.limits_for(role)
+        now = self.clock()
+
+        quota = limits.get("daily_tokens", 0)
+        if quota:
+            day, until_midnight = self._day(now)
+            if self.store.get(f"chat:tokens:{user_key}:{day}") >= quota:
+                raise _too_many_requests("Daily token quota exceeded", until_midnight, quota)
+
+        limit = limits.get("requests_per_minute", 0)
+        if limit:
+            # Sliding window approximated from the current and previous fixed windows
+            window, elapsed = divmod(now, WINDOW_SECONDS)
+            current = self.store.incr(f"chat:requests:{user_key}:{int(window)}", 1, 2 * WINDOW_SECONDS)
+            previous = self.store.get(f"chat:requests:{user_key}:{int(window) - 1}")
+            weight = 1 - elapsed / WINDOW_SECONDS
+            if previous * weight + current > limit:
+                if current > limit or not previous:
+                    retry_after = WINDOW_SECONDS - elapsed
+                else:
+                    # When the previous window's share has decayed enough to fit one more request
+                    retry_after = WINDOW_SECONDS * (1 - (limit - current) / previous) - elapsed
+                raise _too_many_requests("Too many chat requests, please slow down", retry_after, limit)
+
+    def record_tokens(self, user_key: str, tokens: int):
+        """Charge a response's model tokens to the user's daily quota"""
+        if tokens:
+            day, _ = self._day(self.clock())
+            self.store.incr(f"chat:tokens:{user_key}:{day}", int(tokens), DAY_SECONDS + 3600)
+
+    def usage(self, user_key: str, role: Any) -> Dict[str, Any]:
+        limits = self.limits_for(role)
+        day, until_midnight = self._day(self.clock())
+        return {
+            **limits,
+            "tokens_used_today": self.store.get(f"chat:tokens:{user_key}:{day}"),
+            "quota_resets_in_seconds": int(until_midnight),
+        }
+
+
+# Global instance
+_chat_rate_limiter = None
+
+def get_chat_rate_limiter() -> ChatRateLimiter:
+    """Get the chat rate limiter (Redis-backed if RATE_LIMIT_REDIS_URL is set)"""
+    global _chat_rate_limiter
+    if _chat_rate_limiter is None:
+        _chat_rate_limiter = ChatRateLimiter(create_store(RATE_LIMIT_REDIS_URL), _load_limits(CHAT_RATE_LIMITS))
+    return _chat_rate_limiter
+
+
+def enforce_chat_rate_limit(current_user: User = Depends(get_current_active_user)) -> User:
+    """
+    Dependency that applies the per-user chat limits (keyed on the JWT subject)
+    """
+    try:
+        get_chat_rate_limiter().check(current_user.username, current_user.role)
+    except HTTPException:
+        raise
+    except Exception as e:
+        # A rate limit store outage must not take the chat down
+        logging.warning(f"Rate limit check skipped: {e}")
+    return current_user
+
+
+def record_chat_tokens(user: User, usage: Dict[str, Any]):
+    """Charge a chat response to the user's daily token quota"""
+    try:
+        get_chat_rate_limiter().record_tokens(user.username, (usage or {}).get("total_tokens") or 0)
+    except Exception as e:
+        logging.warning(f"Could not record token usage: {e}")
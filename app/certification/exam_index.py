@@ -0,0 +1,228 @@
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.certification import Certification
+from app.models.exam import ExamQuestion
+from app.rag.chunking import clean_lines
+from app.rag.pdf_text import page_texts as pdf_page_texts
+from app.utils.responses import direct_response
+
+QUESTION_HEADER_PATTERN = re.compile(r"^Question\s*#\s*(?P<number>A?\d+)\s*\((?P<points>\d+)\s*Points?\)", re.IGNORECASE)
+OPTION_PATTERN = re.compile(r"^(?P<letter>[a-e])\)\s*(?P<text>.*)$")
+SELECT_PATTERN = re.compile(r"^Select\s+\w+\s+options?\.?$", re.IGNORECASE)
+# Matching/ordering questions in the additional sets have no single option answer ("N/A")
+ANSWER = r"[a-e](?:\s*,\s*[a-e])*|N/A"
+LO = r"[A-Za-z]+-\d+(?:\.\d+)+"
+# Answer key rows, two per line: "6 a, e FL-1.4.5 K2 1  26 a FL-4.4.1 K2 1"
+ANSWER_KEY_PATTERN = re.compile(rf"(?P<number>A?\d+)\s+(?P<answer>{ANSWER})\s+(?P<lo>{LO})\s+(?P<level>K\d)\s+(?P<points>\d+)")
+# Answer set entries start with "<number> <answer> <rationale...>" and end with "<LO> <K-level> <points>"
+ANSWER_START_PATTERN = re.compile(rf"^(?P<number>A?\d+)\s+(?P<answer>{ANSWER})(?:\s+(?P<text>.*))?$")
+ANSWER_END_PATTERN = re.compile(rf"^(?P<lo>{LO})\s+(?P<level>K\d)\s+(?P<points>\d+)$")
+EXAM_LABEL_PATTERN = re.compile(r"Sample\s+Exams?\s+set\s+(?P<label>[A-Z])\b", re.IGNORECASE)
+FILENAME_LABEL_PATTERN = re.compile(r"Sample[-_ ]?Exam[-_ ](?P<label>[A-Z])(?:[-_ .]|$)", re.IGNORECASE)
+
+# "question 17 of exam A", "pregunta 5 del examen B", "exam B question 3", "sample exam question #A7".
+# A bare "question 3" is not enough: the exam must be named right next to the number.
+QUESTION_REF = r"\b(?:question|pregunta)\s*(?:#|n[°ºo.]*\s*)?(?P<number>A?\d+)\b"
+EXAM_REF = r"(?:(?:(?:the|el|la)\s+)?(?:sample|mock|practice)\s+exam|(?:(?:the|el|la)\s+)?exam(?:en)?(?:\s+de\s+(?:muestra|ejemplo))?)(?:\s+(?:set\s+)?(?P<label>[A-Z])\b)?|set\s+(?P<set_label>[A-Z])\b"
+REFERENCE_PATTERNS = [
+    re.compile(rf"{QUESTION_REF}\s+(?:of|from|in|on|del|de|en)\s+(?:{EXAM_REF})", re.IGNORECASE),
+    re.compile(rf"\b(?:{EXAM_REF})\s*,?\s*{QUESTION_REF}", re.IGNORECASE),
+]
+
+
+def detect_exam_label(text: str, filename: str = "") -> str:
+    match = EXAM_LABEL_PATTERN.search(text) or FILENAME_LABEL_PATTERN.search(os.path.basename(filename))
+    return match.group("label").upper() if match else "A"
+
+
+def is_answers_document(text: str, filename: str = "") -> bool:
+    return "answer" in os.path.basename(filename).lower() or re.search(r"Sample Exam\s*[–-]\s*Answers", text) is not None
+
+
+def parse_questions(page_texts: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Parse a sample exam questions document into {number: {question_text, options, points}}"""
+    questions: Dict[str, Dict[str, Any]] = {}
+    current: Optional[Dict[str, Any]] = None
+    for line in clean_lines(page_texts):
+        header = QUESTION_HEADER_PATTERN.match(line)
+        if header:
+            current = {"stem": [], "options": [], "points": int(header.group("points"))}
+            questions[header.group("number").upper()] = current
+            continue
+        if current is None or SELECT_PATTERN.match(line):
+            continue
+        option = OPTION_PATTERN.match(line)
+        if option:
+            current["options"].append({"letter": option.group("letter"), "text": option.group("text")})
+        elif current["options"]:
+            # Wrapped option text
+            current["options"][-1]["text"] += " " + line
+        else:
+            current["stem"].append(line)
+
+    return {
+        number: {
+            "question_text": "\n".join(data["stem"]),
+            "options": data["options"],
+            "points": data["points"],
+        }
+        for number, data in questions.items()
+    }
+
+
+def parse_answers(page_texts: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Parse a sample exam answers document into {number: {correct_answer, rationale, learning_objective, k_level, points}}"""
+    answers: Dict[str, Dict[str, Any]] = {}
+    current: Optional[Tuple[str, List[str]]] = None
+    for line in clean_lines(page_texts):
+        key_rows = list(ANSWER_KEY_PATTERN.finditer(line))
+        if current is None and key_rows and ANSWER_KEY_PATTERN.sub("", line).strip() == "":
+            for row in key_rows:
+                answers.setdefault(row.group("number").upper(), {}).update({
+                    "correct_answer": re.sub(r"\s*,\s*", ", ", row.group("answer")),
+                    "learning_objective": row.group("lo"),
+                    "k_level": row.group("level"),
+                    "points": int(row.group("points")),
+                })
+            continue
+
+        if current is None:
+            start = ANSWER_START_PATTERN.match(line)
+            if start:
+                number = start.group("number").upper()
+                entry = answers.setdefault(number, {})
+                entry.setdefault("correct_answer", re.sub(r"\s*,\s*", ", ", start.group("answer")))
+                current = (number, [start.group("text")] if start.group("text") else [])
+            continue
+
+        number, rationale = current
+        end = ANSWER_END_PATTERN.match(line)
+        if not end and rationale and re.fullmatch(LO, rationale[-1]):
+            # The LO and "K2 1" columns are sometimes extracted on separate lines
+            end = ANSWER_END_PATTERN.match(f"{rationale[-1]} {line}")
+            if end:
+                rationale.pop()
+        if end:
+            answers[number].update({
+                "rationale": "\n".join(rationale),
+                "learning_objective": end.group("lo"),
+                "k_level": end.group("level"),
+                "points": int(end.group("points")),
+            })
+            current = None
+        else:
+            rationale.append(line)
+    return answers
+
+
+def index_sample_exam(db: Session, file_path: str, certification_code: str, document_id: Optional[int] = None,
+                      content_hash: Optional[str] = None) -> int:
+    """Parse a sample exam PDF (questions or answers) and upsert its entries; returns the number of entries"""
+    page_texts = pdf_page_texts(file_path, content_hash)
+    head = "\n".join(page_texts[:3])
+    exam_label = detect_exam_label(head, file_path)
+    answers_document = is_answers_document(head, file_path)
+    entries = parse_answers(page_texts) if answers_document else parse_questions(page_texts)
+
+    existing = {
+        question.question_number: question
+        for question in db.query(ExamQuestion)
+        .filter(ExamQuestion.certification_code == certification_code)
+        .filter(ExamQuestion.exam_label == exam_label)
+        .all()
+    }
+    for number, data in entries.items():
+        question = existing.get(number)
+        if question is None:
+            question = ExamQuestion(certification_code=certification_code, exam_label=exam_label, question_number=number)
+            db.add(question)
+        if answers_document:
+            question.correct_answer = data.get("correct_answer", question.correct_answer)
+            question.rationale = data.get("rationale", question.rationale)
+            question.learning_objective = data.get("learning_objective", question.learning_objective)
+            question.k_level = data.get("k_level", question.k_level)
+            question.points = data.get("points", question.points)
+            question.answer_document_id = document_id
+        else:
+            question.question_text = data["question_text"]
+            question.options = json.dumps(data["options"], ensure_ascii=False)
+            question.points = question.points or data["points"]
+            question.question_document_id = document_id
+    db.commit()
+
+    kind = "answers" if answers_document else "questions"
+    print(f"Indexed {len(entries)} sample exam {kind} for {certification_code} exam {exam_label}")
+    return len(entries)
+
+
+def delete_exam_index(db: Session, certification_code: str) -> int:
+    """Drop every indexed sample exam question of a certification; returns the number of rows deleted"""
+    return db.query(ExamQuestion)\
+        .filter(ExamQuestion.certification_code == certification_code)\
+        .delete(synchronize_session=False)
+
+
+def find_exam_reference(message: str) -> Optional[Tuple[Optional[str], str]]:
+    """Detect references like 'question 17 of exam A'; returns (exam_label or None, question_number)"""
+    matches = [match for match in (pattern.search(message) for pattern in REFERENCE_PATTERNS) if match]
+    if not matches:
+        return None
+    # Prefer the reading that also names the exam set
+    match = next((match for match in matches if match.group("label") or match.group("set_label")), matches[0])
+    label = match.group("label") or match.group("set_label")
+    return (label.upper() if label else None), match.group("number").upper()
+
+
+def lookup_exam_question(db: Session, exam_label: Optional[str], number: str, certification_code: Optional[str] = None) -> Optional[ExamQuestion]:
+    """Keyed lookup of a sample exam question of an active certification; returns None when missing or ambiguous"""
+    query = db.query(ExamQuestion)\
+        .join(Certification, Certification.code == ExamQuestion.certification_code)\
+        .filter(Certification.is_active == True)\
+        .filter(ExamQuestion.question_number == number)
+    if certification_code:
+        query = query.filter(ExamQuestion.certification_code == certification_code)
+    if exam_label:
+        query = query.filter(ExamQuestion.exam_label == exam_label)
+    matches = query.limit(2).all()
+    if len(matches) != 1 or not matches[0].question_text:
+        return None
+    return matches[0]
+
+
+def format_exam_answer(question: ExamQuestion) -> str:
+    """Plain-text answer following the assistant's formatting rules"""
+    options = json.loads(question.options or "[]")
+    sections = [
+        f"Question {question.question_number} (Sample Exam {question.exam_label}, {question.certification_code})\n{question.question_text}",
+        "Options\n" + "\n".join(f"{i}. {opt['letter']}) {opt['text']}" for i, opt in enumerate(options, 1)),
+    ]
+    if question.correct_answer:
+        sections.append(f"Correct answer\n{question.correct_answer}")
+    if question.rationale:
+        sections.append(f"Explanation\n{question.rationale}")
+    details = [f"ISTQB official sample exam {question.exam_label}, question {question.question_number}"]
+    if question.learning_objective:
+        details.append(f"Learning objective {question.learning_objective} ({question.k_level or 'K-level n/a'})")
+    if question.points:
+        details.append(f"{question.points} point(s)")
+    sections.append("Reference\n" + ", ".join(details))
+    return "\n\n".join(sections)
+
+
+def answer_exam_question(db: Session, message: str, certification_code: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Answer 'explain question N of exam X' from the exam index, in the same shape as generate_response"""
+    reference = find_exam_reference(message)
+    if not reference:
+        return None
+    question = lookup_exam_question(db, reference[0], reference[1], certification_code)
+    if not question:
+        return None
+    source = {
+        "certification_code": question.certification_code,
+        "document_type": "sample_exam",
+        "title": f"Sample Exam {question.exam_label}",
+    }
+    return direct_response(format_exam_answer(question), [source])
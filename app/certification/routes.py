@@ -1,5 +1,6 @@
 import os
 import shutil
+import uuid
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from sqlalchemy.orm import Session
 from typing import List, Optional
@@ -22,7 +23,7 @@ def get_vector_store_manager_safe():
     global VECTOR_STORE_AVAILABLE
     if VECTOR_STORE_AVAILABLE is None:
         try:
-            from app.rag.vector_store import get_vector_store_manager
+            from app.rag.provider import get_vector_store_manager
             VECTOR_STORE_AVAILABLE = True
             return get_vector_store_manager()
         except ImportError as e:
@@ -30,12 +31,14 @@ def get_vector_store_manager_safe():
             VECTOR_STORE_AVAILABLE = False
             return None
     elif VECTOR_STORE_AVAILABLE:
-        from app.rag.vector_store import get_vector_store_manager
+        from app.rag.provider import get_vector_store_manager
         return get_vector_store_manager()
     else:
         return None
-from app.utils.document_utils import calculate_pdf_hash, check_document_duplicate, get_duplicate_info
-import aiofiles
+from app.utils.document_utils import save_upload_with_hash, check_document_duplicate, get_duplicate_info
+from app.certification.exam_index import delete_exam_index, index_sample_exam
+from app.certification.syllabus_index import delete_syllabus_index, index_syllabus
+from app.rag.pdf_text import evict_page_texts
 
 router = APIRouter(prefix="/certifications", tags=["certifications"])
 
@@ -127,25 +130,26 @@ async def _upload_document(
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
-    # Read file content and calculate hash
-    content = await file.read()
-    content_hash = calculate_pdf_hash(content)
-    
-    # Check for duplicate content
-    existing_doc = check_document_duplicate(db, content_hash)
-    if existing_doc:
-        return get_duplicate_info(existing_doc)
-    
     # Create directory for this certification
     cert_dir = os.path.join(UPLOAD_DIR, certification.code)
     os.makedirs(cert_dir, exist_ok=True)
     
-    # Generate file path
-    file_path = os.path.join(cert_dir, f"{document_type.value}_{file.filename}")
-    
-    # Save file
-    async with aiofiles.open(file_path, 'wb') as f:
-        await f.write(content)
+    # Stream the upload to a partial file next to its final location, hashing as we go
+    partial_path = os.path.join(cert_dir, f".upload-{uuid.uuid4().hex}.part")
+    try:
+        content_hash, _ = await save_upload_with_hash(file, partial_path)
+        
+        # Check for duplicate content
+        existing_doc = check_document_duplicate(db, content_hash)
+        if existing_doc:
+            return get_duplicate_info(existing_doc)
+        
+        # Generate file path and move the spooled file into place (same directory, no copy)
+        file_path = os.path.join(cert_dir, f"{document_type.value}_{file.filename}")
+        os.replace(partial_path, file_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.unlink(partial_path)
     
     # Create document record
     document = Document(
@@ -176,7 +180,7 @@ async def _upload_document(
                 "document_id": document.id
             }
             
-            rag_success = vector_store.add_pdf_to_rag(content, metadata)
+            rag_success = vector_store.add_pdf_file_to_rag(file_path, metadata, content_hash)
             if rag_success:
                 document.is_processed = True
                 db.commit()
@@ -189,6 +193,16 @@ async def _upload_document(
         rag_error = "Vector store not available"
         print("Vector store not available, skipping RAG processing")
     
+    # Structured content is also indexed for direct lookup (exam questions, business outcomes, LOs, keywords)
+    try:
+        if document_type == DocumentType.SAMPLE_EXAM:
+            index_sample_exam(db, file_path, certification.code, document.id, content_hash)
+        elif document_type == DocumentType.SYLLABUS:
+            index_syllabus(db, file_path, certification.code, document.id, content_hash)
+    except Exception as e:
+        db.rollback()
+        print(f"Warning: Failed to index structured content: {e}")
+    
     # Prepare response message
     if rag_success:
         message = f"Document '{title}' uploaded and processed successfully into RAG"
@@ -229,8 +243,10 @@ async def delete_certification(
     if not certification:
         raise HTTPException(status_code=404, detail="Certification not found")
     
-    # Soft delete
+    # Soft delete; the structured indexes are rebuilt from the documents, so their rows go with it
     certification.is_active = False
+    delete_exam_index(db, certification.code)
+    delete_syllabus_index(db, certification.code)
     db.commit()
     
     # Clean up RAG data (if available)
@@ -241,6 +257,10 @@ async def delete_certification(
         except Exception as e:
             print(f"Warning: Failed to clean up RAG data: {e}")
     
+    # The extracted text of its documents is not needed anymore either
+    for document in db.query(Document).filter(Document.certification_id == certification_id):
+        evict_page_texts(document.content_hash)
+    
     return {"message": f"Certification {certification.code} has been deactivated"}
 
 @router.post("/{certification_id}/reprocess")
@@ -264,29 +284,32 @@ async def reprocess_certification_documents(
             "total_documents": len(documents)
         }
     processed_count = 0
+    missing_files = []
     
+    # Rebuild each document whose file is still on disk; a document whose file is gone keeps its vectors
     for document in documents:
         try:
-            if os.path.exists(document.file_path):
-                # First, delete existing document from vector store
-                vector_store.delete_document_by_id(str(document.id))
-                
-                # Then re-add it
-                with open(document.file_path, 'rb') as f:
-                    content = f.read()
-                
-                metadata = {
-                    "certification_code": certification.code,
-                    "certification_name": certification.name,
-                    "document_type": document.document_type,
-                    "title": document.title,
-                    "document_id": document.id
-                }
-                
-                success = vector_store.add_pdf_to_rag(content, metadata)
-                if success:
-                    document.is_processed = True
-                    processed_count += 1
+            if not os.path.exists(document.file_path):
+                missing_files.append(document.id)
+                continue
+            document.is_processed = False
+            vector_store.delete_document_by_id(str(document.id))
+            metadata = {
+                "certification_code": certification.code,
+                "certification_name": certification.name,
+                "document_type": document.document_type,
+                "title": document.title,
+                "document_id": document.id
+            }
+            
+            success = vector_store.add_pdf_file_to_rag(document.file_path, metadata, document.content_hash)
+            if success:
+                document.is_processed = True
+                processed_count += 1
+            if document.document_type == DocumentType.SAMPLE_EXAM.value:
+                index_sample_exam(db, document.file_path, certification.code, document.id, document.content_hash)
+            elif document.document_type == DocumentType.SYLLABUS.value:
+                index_syllabus(db, document.file_path, certification.code, document.id, document.content_hash)
                 
         except Exception as e:
             print(f"Failed to reprocess document {document.id}: {e}")
@@ -296,5 +319,6 @@ async def reprocess_certification_documents(
     return {
         "message": f"Reprocessed {processed_count} documents for certification {certification.code}",
         "processed_count": processed_count,
-        "total_documents": len(documents)
+        "total_documents": len(documents),
+        "missing_files": missing_files
     }
\ No newline at end of file
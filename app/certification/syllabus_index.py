@@ -0,0 +1,316 @@
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from app.models.certification import Certification
+from app.models.syllabus import BusinessOutcome, LearningObjective, SyllabusKeyword
+from app.rag.chunking import LEARNING_OBJECTIVE_PATTERN, clean_lines
+from app.rag.pdf_text import page_texts
+from app.utils.responses import direct_response
+
+# "FL-BO3 Identify the test approach ..." / "GenAI-BO1 Understand ..."
+BUSINESS_OUTCOME_PATTERN = re.compile(r"^(?P<code>[A-Za-z]+-BO\d+)\s+(?P<text>\S.*)$")
+# "Keywords", "Testing Keywords", "AI-Specific Keywords", "Generative AI Specific Keywords"
+KEYWORDS_HEADER_PATTERN = re.compile(r"^(?:[\w-]+\s+){0,3}Keywords$")
+LO_LIST_HEADER_PATTERN = re.compile(r"^Learning Objectives.*\bChapter\s+(?P<chapter>\d+)", re.IGNORECASE)
+
+# Chat intents answered from the tables: only explicit listing requests ("list the keywords of chapter 2",
+# "what are the business outcomes?", "show GenAI-BO1", "learning objectives of chapter 1"), never questions
+# that merely use the words ("what is keyword-driven testing?", "which techniques use keywords?")
+BUSINESS_OUTCOME_INTENT = r"(?:business\s+outcomes|resultados\s+de\s+negocio|[A-Za-z]+-BO\d+)"
+LEARNING_OBJECTIVE_INTENT = r"(?:learning\s+objectives|objetivos\s+de\s+aprendizaje|[A-Za-z]+-\d+\.\d+\.\d+)"
+KEYWORDS_INTENT = r"(?:keywords|palabras\s+clave|t[eé]rminos\s+clave)"
+LISTING_LEAD = (r"(?:list|show|display|enumerate|give\s+me|tell\s+me|what\s+(?:are|is)|which\s+are|"
+                r"lista\w*|muestra\w*|dame|dime|cu[aá]les\s+son|qu[eé]\s+(?:son|es))")
+# Words allowed around the listed item: determiners, scope and certification codes
+SCOPE_WORDS = {
+    "me", "all", "the", "its", "main", "key", "official", "each", "every", "of", "for", "in", "from", "syllabus",
+    "certification", "chapter", "learning", "objective", "business", "outcome",
+    "los", "las", "el", "la", "todos", "todas", "de", "del", "en", "por", "cada", "capitulo", "capítulo", "objetivo",
+}
+SCOPE_TOKEN_PATTERN = re.compile(r"^(?:\d+(?:\.\d+)*|[A-Z][\w.-]*)$")  # "2", "CTFL", "GenAI", "CTFL-v4.0"
+# Requests to explain or compare need the model, not a verbatim listing
+EXPLANATION_INTENT = re.compile(r"\b(explain|explica\w*|describe|describir|why|por\s*qu[eé]|how|c[oó]mo|difference|diferencia|compare|compara\w*)\b", re.IGNORECASE)
+BO_CODE_PATTERN = re.compile(r"\b(?P<prefix>[A-Za-z]+)-BO(?P<number>\d+)\b", re.IGNORECASE)
+LO_CODE_PATTERN = re.compile(r"\b(?P<prefix>[A-Za-z]+)-(?P<number>\d+\.\d+\.\d+)\b")
+CHAPTER_PATTERN = re.compile(r"\b(?:chapter|cap[ií]tulo)\s+(?P<chapter>\d+)\b", re.IGNORECASE)
+
+
+def _only_scope(words: str) -> bool:
+    tokens = [token.strip(",.;:?!¿¡") for token in words.split()]
+    return all(not token or token.lower() in SCOPE_WORDS or SCOPE_TOKEN_PATTERN.match(token) for token in tokens)
+
+
+def is_listing_request(message: str, item: str) -> bool:
+    """Whether the message asks to list `item` (a regex), as a request or as a bare noun phrase"""
+    if EXPLANATION_INTENT.search(message):
+        return False
+    requested = re.search(rf"\b{LISTING_LEAD}\s+(?P<between>(?:\S+\s+){{0,4}}?){item}(?![\w-])", message, re.IGNORECASE)
+    if requested and _only_scope(requested.group("between")):
+        return True
+    bare = re.match(rf"^\s*(?P<between>(?:\S+\s+){{0,3}}?){item}(?![\w-])(?P<rest>.*)$", message, re.IGNORECASE)
+    return bool(bare and _only_scope(bare.group("between")) and _only_scope(bare.group("rest")))
+
+
+def _is_continuation(line: str) -> bool:
+    # Wrapped descriptions continue on a line starting in lower case
+    return line[:1].islower()
+
+
+def extract_business_outcomes(lines: List[str]) -> List[Tuple[str, str]]:
+    """Business outcomes as (code, description) from the first outcomes table of the syllabus"""
+    outcomes: List[List[str]] = []
+    in_table = False
+    for line in lines:
+        match = BUSINESS_OUTCOME_PATTERN.match(line)
+        if match:
+            if any(code == match.group("code") for code, _ in outcomes):
+                # Appendix traceability tables repeat the outcomes
+                break
+            outcomes.append([match.group("code"), match.group("text")])
+            in_table = True
+        elif in_table and _is_continuation(line):
+            outcomes[-1][1] += " " + line
+        elif in_table:
+            break
+    return [(code, text.strip()) for code, text in outcomes]
+
+
+def extract_learning_objectives(lines: List[str]) -> List[Dict[str, str]]:
+    """Learning objectives with chapter, section and K-level, in syllabus order"""
+    objectives: Dict[str, Dict[str, str]] = {}
+    last: Optional[Dict[str, str]] = None
+    for line in lines:
+        match = LEARNING_OBJECTIVE_PATTERN.match(line)
+        if match:
+            number = match.group("number")
+            last = None
+            if match.group("code") not in objectives:
+                last = objectives[match.group("code")] = {
+                    "code": match.group("code"),
+                    "chapter": number.split(".")[0],
+                    "section": number.rsplit(".", 1)[0],
+                    "k_level": match.group("level"),
+                    "description": match.group("text").strip(),
+                }
+        elif last is not None and _is_continuation(line):
+            last["description"] += " " + line
+        else:
+            last = None
+    return list(objectives.values())
+
+
+def extract_keywords(lines: List[str]) -> Dict[str, List[str]]:
+    """Keywords listed below each chapter heading, by chapter number"""
+    keywords: Dict[str, List[str]] = {}
+    # One segment per keyword list ("Testing Keywords", "AI-Specific Keywords", ...)
+    segments: List[List[str]] = []
+    for line in lines:
+        if KEYWORDS_HEADER_PATTERN.match(line):
+            segments.append([])
+            continue
+        if not segments:
+            continue
+        header = LO_LIST_HEADER_PATTERN.match(line)
+        objective = LEARNING_OBJECTIVE_PATTERN.match(line)
+        if header or objective:
+            # The chapter is named by the learning objectives that follow the keyword lists
+            chapter = header.group("chapter") if header else objective.group("number").split(".")[0]
+            for segment in segments:
+                terms = [term.strip() for term in " ".join(segment).split(",")]
+                keywords.setdefault(chapter, []).extend(t for t in terms if t and t.lower() != "none")
+            segments = []
+        else:
+            segments[-1].append(line)
+    return keywords
+
+
+def _delete_missing(db: Session, model, certification_code: str, codes: Set[str]):
+    db.query(model)\
+        .filter(model.certification_code == certification_code)\
+        .filter(model.code.notin_(codes))\
+        .delete(synchronize_session=False)
+
+
+def delete_syllabus_index(db: Session, certification_code: str) -> int:
+    """Drop the business outcomes, learning objectives and keywords of a certification; returns the rows deleted"""
+    return sum(
+        db.query(model).filter(model.certification_code == certification_code).delete(synchronize_session=False)
+        for model in (BusinessOutcome, LearningObjective, SyllabusKeyword)
+    )
+
+
+def index_syllabus(db: Session, file_path: str, certification_code: str, document_id: Optional[int] = None,
+                   content_hash: Optional[str] = None) -> Dict[str, int]:
+    """Extract business outcomes, learning objectives and keywords from a syllabus PDF and upsert them"""
+    lines = clean_lines(page_texts(file_path, content_hash))
+    outcomes = extract_business_outcomes(lines)
+    objectives = extract_learning_objectives(lines)
+    keywords = extract_keywords(lines)
+
+    existing_outcomes = {
+        row.code: row for row in db.query(BusinessOutcome).filter(BusinessOutcome.certification_code == certification_code)
+    }
+    for position, (code, description) in enumerate(outcomes):
+        row = existing_outcomes.get(code) or BusinessOutcome(certification_code=certification_code, code=code)
+        row.description, row.position, row.document_id = description, position, document_id
+        db.add(row)
+    if outcomes:
+        # Outcomes dropped or renumbered in a new syllabus version must not linger
+        _delete_missing(db, BusinessOutcome, certification_code, {code for code, _ in outcomes})
+
+    existing_objectives = {
+        row.code: row for row in db.query(LearningObjective).filter(LearningObjective.certification_code == certification_code)
+    }
+    for position, objective in enumerate(objectives):
+        row = existing_objectives.get(objective["code"]) or LearningObjective(certification_code=certification_code, code=objective["code"])
+        row.chapter, row.section, row.k_level = objective["chapter"], objective["section"], objective["k_level"]
+        row.description, row.position, row.document_id = objective["description"], position, document_id
+        db.add(row)
+    if objectives:
+        _delete_missing(db, LearningObjective, certification_code, {objective["code"] for objective in objectives})
+
+    if keywords:
+        db.query(SyllabusKeyword)\
+            .filter(SyllabusKeyword.certification_code == certification_code)\
+            .delete(synchronize_session=False)
+    for chapter, terms in keywords.items():
+        for position, term in enumerate(dict.fromkeys(terms)):
+            db.add(SyllabusKeyword(certification_code=certification_code, chapter=chapter, term=term, position=position, document_id=document_id))
+    db.commit()
+
+    stats = {
+        "business_outcomes": len(outcomes),
+        "learning_objectives": len(objectives),
+        "keywords": sum(len(terms) for terms in keywords.values()),
+    }
+    print(f"Indexed syllabus structure for {certification_code}: {stats}")
+    return stats
+
+
+def _active(query, model):
+    return query.join(Certification, Certification.code == model.certification_code).filter(Certification.is_active == True)
+
+
+def _resolve_certification(db: Session, model, message: str, certification_code: Optional[str], code_pattern: Optional[re.Pattern] = None) -> Optional[str]:
+    """Certification to answer for: the selected one, the one a code in the message belongs to, or the only one indexed.
+
+    Only active certifications are considered, so a deactivated one is left to the model.
+    """
+    codes = [row[0] for row in _active(db.query(model.certification_code), model).distinct()]
+    if certification_code:
+        return certification_code if certification_code in codes else None
+    mentioned = {match.group("prefix").lower() for match in code_pattern.finditer(message)} if code_pattern else set()
+    if mentioned:
+        owners = {
+            row.certification_code
+            for row in _active(db.query(model.certification_code, model.code), model).distinct()
+            if row.code.split("-")[0].lower() in mentioned
+        }
+        if len(owners) == 1:
+            return owners.pop()
+        if not owners:
+            return None  # the codes belong to no active certification
+    lowered = message.lower()
+    named = [code for code in codes if code.lower() in lowered]
+    if len(named) == 1:
+        return named[0]
+    return codes[0] if len(codes) == 1 else None
+
+
+def _syllabus_source(certification_code: str, section: str) -> Dict[str, Any]:
+    return {"certification_code": certification_code, "document_type": "syllabus", "title": f"{certification_code} Syllabus", "section": section}
+
+
+def answer_business_outcomes(db: Session, message: str, certification_code: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """List business outcomes verbatim, all of them or the codes named in the message"""
+    if not is_listing_request(message, BUSINESS_OUTCOME_INTENT):
+        return None
+    certification_code = _resolve_certification(db, BusinessOutcome, message, certification_code, BO_CODE_PATTERN)
+    if not certification_code:
+        return None
+    query = db.query(BusinessOutcome).filter(BusinessOutcome.certification_code == certification_code)
+    requested = {f"BO{match.group('number')}" for match in BO_CODE_PATTERN.finditer(message)}
+    outcomes = [row for row in query.order_by(BusinessOutcome.position) if not requested or row.code.split("-")[-1].upper() in requested]
+    if not outcomes:
+        return None
+    text = "\n\n".join([
+        f"Business Outcomes ({certification_code})",
+        "\n".join(f"{row.code} {row.description}" for row in outcomes),
+        f"Reference\n{certification_code} syllabus, section 0.4 Business Outcomes",
+    ])
+    return direct_response(text, [_syllabus_source(certification_code, "0.4")])
+
+
+def answer_learning_objectives(db: Session, message: str, certification_code: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """List learning objectives for the certification, a chapter, or the codes named in the message"""
+    if not is_listing_request(message, LEARNING_OBJECTIVE_INTENT):
+        return None
+    certification_code = _resolve_certification(db, LearningObjective, message, certification_code, LO_CODE_PATTERN)
+    if not certification_code:
+        return None
+    query = db.query(LearningObjective).filter(LearningObjective.certification_code == certification_code)
+    codes = [match.group(0) for match in LO_CODE_PATTERN.finditer(message)]
+    chapter = CHAPTER_PATTERN.search(message)
+    if codes:
+        query = query.filter(LearningObjective.code.in_(codes))
+    elif chapter:
+        query = query.filter(LearningObjective.chapter == chapter.group("chapter"))
+    objectives = query.order_by(LearningObjective.position).all()
+    if not objectives:
+        return None
+    scope = f", chapter {chapter.group('chapter')}" if chapter and not codes else ""
+    chapters = sorted({row.chapter for row in objectives}, key=int)
+    text = "\n\n".join([
+        f"Learning Objectives ({certification_code}{scope})",
+        "\n".join(f"{row.code} ({row.k_level}) {row.description}" for row in objectives),
+        f"Reference\n{certification_code} syllabus, learning objectives for chapter {', '.join(chapters)}",
+    ])
+    return direct_response(text, [_syllabus_source(certification_code, chapters[0])])
+
+
+def answer_keywords(db: Session, message: str, certification_code: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """List the keywords of a chapter (or of every chapter)"""
+    if not is_listing_request(message, KEYWORDS_INTENT):
+        return None
+    certification_code = _resolve_certification(db, SyllabusKeyword, message, certification_code)
+    if not certification_code:
+        return None
+    query = db.query(SyllabusKeyword).filter(SyllabusKeyword.certification_code == certification_code)
+    chapter = CHAPTER_PATTERN.search(message)
+    if chapter:
+        query = query.filter(SyllabusKeyword.chapter == chapter.group("chapter"))
+    by_chapter: Dict[str, List[str]] = {}
+    for row in query.order_by(SyllabusKeyword.position):
+        by_chapter.setdefault(row.chapter, []).append(row.term)
+    if not by_chapter:
+        return None
+    chapters = sorted(by_chapter, key=int)
+    scope = f", chapter {chapters[0]}" if chapter else ""
+    text = "\n\n".join(
+        [f"Keywords ({certification_code}{scope})"]
+        + [f"Chapter {number}\n{', '.join(by_chapter[number])}" for number in chapters]
+        + [f"Reference\n{certification_code} syllabus, keywords listed below the heading of chapter {', '.join(chapters)}"]
+    )
+    return direct_response(text, [_syllabus_source(certification_code, chapters[0])])
+
+
+def certification_brief(db: Session, certification_code: Optional[str]) -> str:
+    """Static per-certification material for the model prompt (identical on every turn, so it is cacheable).
+
+    Kept compact, since it is sent with every chat call: the certification and its business outcomes.
+    Learning objectives come from retrieval when a question needs them.
+    """
+    if not certification_code:
+        return ""
+    certification = db.query(Certification).filter(Certification.code == certification_code).first()
+    if certification and not certification.is_active:
+        return ""
+    outcomes = db.query(BusinessOutcome).filter(BusinessOutcome.certification_code == certification_code)\
+        .order_by(BusinessOutcome.position).all()
+    if not certification and not outcomes:
+        return ""
+    name = f"{certification.name} ({certification_code})" if certification else certification_code
+    sections = [f"The user is studying the {name} certification."]
+    if outcomes:
+        sections.append("Business outcomes:\n" + "\n".join(f"{row.code} {row.description}" for row in outcomes))
+    return "\n\n".join(sections)
@@ -0,0 +1,105 @@
+import copy
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from app.chat.retrieval_planner import FOLLOW_UP, SMALL_TALK, normalize_message
+from app.chat.query_rewriter import is_follow_up
+from app.utils.responses import direct_response
+
+EXTRACT_MAX_CHARS = 1200
+SENTENCE_END = re.compile(r"[.!?](?=\s)")
+UNAVAILABLE_NOTE = "The assistant is temporarily unavailable, so this answer was not written by the model."
+
+
+def is_cacheable(message: str) -> bool:
+    """Only standalone questions have an answer that does not depend on the conversation"""
+    normalized = normalize_message(message)
+    return bool(normalized) and not (SMALL_TALK.match(normalized) or FOLLOW_UP.match(normalized) or is_follow_up(message))
+
+
+class AnswerCache:
+    """Bounded LRU of recent model answers, keyed by (certification, normalized question), served while OpenAI is down"""
+
+    def __init__(self, max_entries: int = 2000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(message: str, certification_code: Optional[str]) -> Tuple[str, str]:
+        return (certification_code or "", normalize_message(message))
+
+    def get(self, message: str, certification_code: Optional[str]) -> Optional[Dict[str, Any]]:
+        key = self._key(message, certification_code)
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            return result
+
+    def put(self, message: str, certification_code: Optional[str], result: Dict[str, Any]):
+        if not is_cacheable(message):
+            return
+        key = self._key(message, certification_code)
+        with self._lock:
+            self._entries[key] = copy.deepcopy(result)  # the caller keeps using (and may change) its own dict
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def _excerpt(context: str, max_chars: int = EXTRACT_MAX_CHARS) -> str:
+    """Leading passages of the retrieved context, cut at a paragraph or sentence boundary"""
+    context = context.strip()
+    if len(context) <= max_chars:
+        return context
+    cut = context[:max_chars]
+    boundary = max([cut.rfind("\n\n")] + [match.end() for match in SENTENCE_END.finditer(cut)])
+    return (cut[:boundary] if boundary > max_chars // 3 else cut).rstrip() + " ..."
+
+
+def _source_label(source: Dict[str, Any]) -> str:
+    label = source.get("title") or source.get("certification_code") or "Unknown"
+    return f"{label}, Section {source['section']}" if source.get("section") else label
+
+
+def extractive_answer(rag_result: Dict[str, Any], glossary_context: str = "") -> Optional[Dict[str, Any]]:
+    """Answer from the retrieved syllabus passages and glossary definitions alone (None if there are neither)"""
+    sources: List[Dict[str, Any]] = rag_result.get("sources", [])
+    parts = []
+    if glossary_context:
+        parts.append("ISTQB glossary:\n" + glossary_context)
+    if rag_result.get("context"):
+        passages = "Most relevant passages from the official material:\n\n" + _excerpt(rag_result["context"])
+        if sources:
+            passages += "\n\nSources: " + "; ".join(_source_label(source) for source in sources[:3])
+        parts.append(passages)
+    if not parts:
+        return None
+    result = direct_response(UNAVAILABLE_NOTE + "\n\n" + "\n\n".join(parts), sources[:3])
+    result["rag_info"]["retrieval_successful"] = rag_result.get("retrieval_successful", False)
+    result["usage"]["degraded"] = "extractive"
+    return result
+
+
+def cached_answer(cache: AnswerCache, message: str, certification_code: Optional[str]) -> Optional[Dict[str, Any]]:
+    """A previous model answer to the same standalone question, marked as served from cache"""
+    if not is_cacheable(message):
+        return None
+    result = cache.get(message, certification_code)
+    if result is None:
+        return None
+    return {**result, "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cached_tokens": 0,
+                                "degraded": "cache"}}
+
+
+# Global instance
+_answer_cache = None
+
+def get_answer_cache() -> AnswerCache:
+    """Get the per-process cache of recent answers"""
+    global _answer_cache
+    if _answer_cache is None:
+        _answer_cache = AnswerCache()
+    return _answer_cache
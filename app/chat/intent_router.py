@@ -0,0 +1,35 @@
+import logging
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.certification.exam_index import answer_exam_question
+from app.certification.syllabus_index import answer_business_outcomes, answer_learning_objectives, answer_keywords
+from app.quiz.pool import answer_quiz_request
+from app.glossary.index import answer_glossary_definition
+
+Handler = Callable[[Session, str, Optional[str]], Optional[Dict[str, Any]]]
+
+# Deterministic answers tried in order before calling the model; each returns None when it does not apply
+HANDLERS: List[Handler] = [
+    answer_exam_question,
+    answer_quiz_request,
+    answer_business_outcomes,
+    answer_learning_objectives,
+    answer_keywords,
+    answer_glossary_definition,
+]
+
+
+def route_message(db: Session, message: str, certification_code: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Answer from the structured tables when the intent allows it; None means 'ask the model'"""
+    for handler in HANDLERS:
+        try:
+            result = handler(db, message, certification_code)
+        except Exception as e:
+            # A broken lookup must never block the chat; the model can still answer
+            logging.warning(f"Intent handler {handler.__name__} failed: {e}")
+            db.rollback()
+            continue
+        if result is not None:
+            logging.info(f"Message answered directly by {handler.__name__}")
+            return result
+    return None
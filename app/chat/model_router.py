@@ -0,0 +1,111 @@
+import json
+import re
+import statistics
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+from app.config import CHAT_MODEL_LARGE, CHAT_MODEL_SMALL, CHAT_MODEL_ROUTES, CHAT_MODEL_PRICES
+from app.chat.retrieval_planner import NARROW, normalize_message
+
+DEFAULT_ROUTES: Dict[str, Dict[str, Any]] = {
+    "small": {"model": CHAT_MODEL_SMALL, "max_tokens": 500, "temperature": 0.2},
+    "default": {"model": CHAT_MODEL_LARGE, "max_tokens": 1000, "temperature": 0.4},
+    "complex": {"model": CHAT_MODEL_LARGE, "max_tokens": 1500, "temperature": 0.4},
+}
+DEFAULT_PRICES: Dict[str, Dict[str, float]] = {
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+}
+# Generation and multi-step reasoning: quizzes, mock exams, study plans, comparisons, scenarios
+COMPLEX_INTENT = re.compile(
+    r"\b(?:quiz|quizzes|mock exam|practice (?:exam|questions)|study plan|plan de estudio|exam questions|"
+    r"compare|comparison|difference|differences|versus|vs|trade ?offs?|pros and cons|step by step|scenario|"
+    r"design (?:test cases|a test)|calculate|how many test cases|diferencias?|compara|paso a paso|escenario|cuestionario|simulacro)\b"
+)
+SMALL_MAX_WORDS = 15
+COMPLEX_MIN_WORDS = 60
+LATENCY_SAMPLES = 500
+
+
+def _load_json(raw: str, default: Dict[str, Any]) -> Dict[str, Any]:
+    merged = {key: dict(value) for key, value in default.items()}
+    if not raw:
+        return merged
+    try:
+        for key, value in json.loads(raw).items():
+            merged.setdefault(key, {}).update(value)
+    except (ValueError, AttributeError) as e:
+        print(f"Warning: ignoring invalid model routing config {raw!r}: {e}")
+    return merged
+
+
+ROUTES = _load_json(CHAT_MODEL_ROUTES, DEFAULT_ROUTES)
+PRICES = _load_json(CHAT_MODEL_PRICES, DEFAULT_PRICES)
+
+
+def choose_route(message: str, glossary_terms: int = 0) -> str:
+    """Pick a model route from the shape of the question"""
+    text = normalize_message(message)
+    words = len(text.split())
+    if COMPLEX_INTENT.search(text) or words >= COMPLEX_MIN_WORDS or message.count("?") >= 2:
+        return "complex"
+    if words <= SMALL_MAX_WORDS and (NARROW.match(text) or glossary_terms):
+        return "small"
+    return "default"
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> Optional[float]:
+    """Estimated USD cost of one call, or None for models without a configured price"""
+    price = PRICES.get(model)
+    if not price:
+        return None
+    uncached = max(prompt_tokens - cached_tokens, 0)
+    return (uncached * price["input"] + cached_tokens * price.get("cached_input", price["input"])
+            + completion_tokens * price["output"]) / 1_000_000
+
+
+class ModelRouteMetrics:
+    """In-process counters per route: calls, tokens, estimated spend and latency percentiles"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, route: str, model: str, latency_ms: float, usage: Optional[Dict[str, Any]] = None, error: bool = False):
+        usage = usage or {}
+        cost = estimate_cost(model, usage.get("prompt_tokens") or 0, usage.get("completion_tokens") or 0, usage.get("cached_tokens") or 0)
+        with self._lock:
+            stats = self._routes.setdefault(route, {
+                "calls": 0, "errors": 0, "models": {}, "prompt_tokens": 0, "completion_tokens": 0,
+                "cached_tokens": 0, "cost_usd": 0.0, "latencies": deque(maxlen=LATENCY_SAMPLES),
+            })
+            stats["calls"] += 1
+            stats["errors"] += int(error)
+            stats["models"][model] = stats["models"].get(model, 0) + 1
+            for key in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+                stats[key] += usage.get(key) or 0
+            stats["cost_usd"] += cost or 0.0
+            stats["latencies"].append(latency_ms)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            report = {}
+            for route, stats in self._routes.items():
+                latencies = sorted(stats["latencies"])
+                report[route] = {key: value for key, value in stats.items() if key != "latencies"}
+                report[route]["models"] = dict(stats["models"])
+                report[route]["cost_usd"] = round(stats["cost_usd"], 6)
+                report[route]["latency_ms_p50"] = round(statistics.median(latencies)) if latencies else None
+                report[route]["latency_ms_p95"] = round(latencies[int(0.95 * (len(latencies) - 1))]) if latencies else None
+            return report
+
+
+# Global instance
+_model_route_metrics = None
+
+def get_model_route_metrics() -> ModelRouteMetrics:
+    """Get the per-process model routing metrics"""
+    global _model_route_metrics
+    if _model_route_metrics is None:
+        _model_route_metrics = ModelRouteMetrics()
+    return _model_route_metrics
@@ -1,8 +1,40 @@
+import asyncio
 import os
-from openai import OpenAI
 from fastapi import HTTPException
 from typing import Optional
-from app.rag.vector_store import get_vector_store_manager
+from app.rag.provider import get_vector_store_manager
+from app.glossary.index import get_glossary_index
+from app.chat.prompt_builder import build_messages, prompt_cache_key
+from app.chat.model_router import ROUTES, choose_route, get_model_route_metrics
+from app.chat.fallback_answers import cached_answer, extractive_answer, get_answer_cache, is_cacheable
+from app.chat.retrieval_planner import normalize_message
+from app.utils.single_flight import get_single_flight
+from app.utils.resilience import get_resilient_caller
+from app.utils.admission import estimate_tokens, get_admission_controller
+
+EMPTY_RAG_RESULT = {"context": "", "sources": [], "retrieval_successful": False}
+TOKEN_FIELDS = ("prompt_tokens", "completion_tokens", "total_tokens", "cached_tokens")
+
+def cached_prompt_tokens(usage) -> Optional[int]:
+    """Prompt tokens served from OpenAI's prompt cache (0 when the SDK/model does not report them)"""
+    if usage is None:
+        return None
+    details = getattr(usage, "prompt_tokens_details", None)
+    return getattr(details, "cached_tokens", None) or 0
+
+def retrieve_context(message: str, certification_code: Optional[str] = None, k: Optional[int] = None) -> dict:
+    """Readiness check, query embedding and vector search for a message (blocking; run it in a thread)"""
+    import logging
+    try:
+        vector_store = get_vector_store_manager()
+        if vector_store.is_initialized():
+            if k:
+                return vector_store.get_context_for_query(message, certification_code, k=k)
+            return vector_store.get_context_for_query(message, certification_code)
+    except Exception as e:
+        # Without context the model can still answer, so retrieval errors never fail the chat
+        logging.error(f"Error retrieving RAG context: {str(e)}")
+    return dict(EMPTY_RAG_RESULT)
 
 class OpenAIClient:
     def __init__(self):
@@ -12,73 +44,95 @@ class OpenAIClient:
                 status_code=500,
                 detail="OpenAI API key not configured (missing OPENAI_API_KEY env var)"
             )
-        self.client = OpenAI(api_key=api_key)
-
-    async def generate_response(self, message: str, context: Optional[list] = None, certification_code: Optional[str] = None) -> dict:
+        from openai import OpenAI  # imported on first use, it is slow to import
+        # Retries, deadlines and hedging are done by the resilient caller, so the SDK must not retry on its own
+        self.client = OpenAI(api_key=api_key, max_retries=0)
+
+    @staticmethod
+    def degraded_answer(message: str, certification_code: Optional[str], rag_result: dict, glossary_context: str) -> dict:
+        """Answer without the model: a cached answer to the same question, else the retrieved passages"""
+        result = cached_answer(get_answer_cache(), message, certification_code) or extractive_answer(rag_result, glossary_context)
+        if result is None:
+            raise HTTPException(status_code=503, detail="The assistant is temporarily unavailable, please try again in a moment")
+        return result
+
+    async def generate_response(self, message: str, context: Optional[list] = None, certification_code: Optional[str] = None,
+                                rag_result: Optional[dict] = None, static_context: str = "", route: Optional[str] = None,
+                                user_id: Optional[int] = None) -> dict:
+        """Answer a message; identical standalone questions asked at the same time share one model call"""
+        executed = []
+
+        def generate():
+            executed.append(True)
+            return self._generate_response(message, context, certification_code, rag_result, static_context, route, user_id)
+
+        # Only questions asked without earlier turns are coalesced: the prompt includes the leader's history,
+        # and a follower with another conversation must not get an answer built from it
+        prior_turns = (context or [])[:-1] if context and context[-1].get("content") == message else (context or [])
+        if prior_turns or not is_cacheable(message):
+            return await generate()
+        key = ("generate", certification_code or "", normalize_message(message), route)
+        result = await get_single_flight().do(key, generate)
+        if not executed:
+            # A follower got its own copy of the leader's answer; the completion is charged to the leader only
+            usage = result.get("usage") or {}
+            result["usage"] = {**usage, **{field: 0 for field in TOKEN_FIELDS if field in usage}, "coalesced": True}
+        return result
+
+    async def _generate_response(self, message: str, context: Optional[list], certification_code: Optional[str],
+                                 rag_result: Optional[dict], static_context: str, route: Optional[str],
+                                 user_id: Optional[int]) -> dict:
         import re
+        import time
         import logging
         try:
-            # Get RAG context
-            vector_store = get_vector_store_manager()
-            rag_result = {"context": "", "sources": [], "retrieval_successful": False}
-            if vector_store.is_initialized():
-                rag_result = vector_store.get_context_for_query(message, certification_code)
-
-            # Build system prompt
-            system_prompt = """You are a virtual assistant specialized in ISTQB certifications.
-
-Instructions:
-
-- Always answer in a friendly, respectful, and professional manner.
-- Only use the embedded information from official ISTQB certification materials. 
-- If the answer is not in the provided documents or your knowledge base, you may use external sources or suggest the user visit the official ISTQB website.
-- Before searching for an answer, always review the user's question. If the question contains spelling mistakes, typos, or unclear wording, silently correct and clarify it to best reflect the user's intent. Then, use this corrected and clarified version of the question for all internal processing and information retrieval, even if you do not display the correction to the user.
-
-- When reviewing the user's question, always silently correct any typos or unclear wording to the most probable intent, based on the available ISTQB certifications and terminology. If the user's input can be reasonably mapped to a specific ISTQB certification (e.g., "genai" means "Generative AI"), assume that mapping automatically, and proceed without asking the user for clarification. Only ask the user to clarify if there is genuine ambiguity that cannot be resolved by context or common sense.
-
-- If the user asks about "Business Outcomes" or similar and the relevant context includes a table or list of outcomes with codes (e.g., GenAI-BO1, CTFL-BO2, etc.), respond by copying the entire table and codes exactly as presented in the reference material. Do NOT summarize, rephrase, or omit any item.
-- If a user asks for a quiz, mock exam, or study plan:
-   - You may generate new questions and quizzes using your general knowledge or the syllabus content.
-   - Clearly state when a question is AI-generated versus taken from official materials.
-
-- If the conversation already makes clear which certification or document the user is referring to, answer based on that context. Only ask which certification the user means if it is genuinely ambiguous or not clear from the conversation history.
-
-- If you don’t have enough information to answer from your embedded content, say so politely.
-
-- Always display the reference(s) used to answer the question. At the end of every answer, clearly indicate the section number if available of the source(s) from which the answer was obtained.
-
-- Present your answers using plain text only, in a clean and organized way:
-    - Use clear section titles, written on a separate line (for example: Overview, Purpose, Structure, etc.).
-    - Use  numbers for lists.
-    - Separate each section with a blank line.
-    - Do not use HTML, markdown, asterisks, or * the # symbol.
-
-- Always keep the conversation context: if the user is asking about a specific certification, continue answering about that certification unless the user explicitly changes to another certification.
-
-- If the user asks for a document, provide the direct link if available.
-"""
-            # Assemble messages
-            messages = [{"role": "system", "content": system_prompt}]
-
-            # Add RAG context if available
-            if rag_result["context"]:
-                messages.append({
-                    "role": "assistant",
-                    "content": f"Relevant ISTQB context:\n{rag_result['context']}"
-                })
-
-            # Add full conversation history (including latest user message)
-            if context:
-                messages.extend(context)
-
-            # Call OpenAI API synchronously
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=messages,
-                max_tokens=1000,
-                temperature=0.4
+            # Get RAG context (the chat route retrieves it concurrently and passes it in)
+            if rag_result is None:
+                rag_result = retrieve_context(message, certification_code)
+
+            # Static prefix first (cacheable), then history, then this turn's glossary and RAG context
+            glossary_context = get_glossary_index().context_for(message)
+            messages = build_messages(
+                message,
+                history=context,
+                static_context=static_context,
+                glossary_context=glossary_context,
+                rag_context=rag_result["context"],
             )
 
+            # Short factual questions go to the small model, quizzes and multi-hop questions to the large one
+            route = route or choose_route(message, glossary_terms=len(get_glossary_index().find_terms(message)))
+            settings = ROUTES[route]
+            logging.info(f"Model route: {route} -> {settings['model']}")
+
+            # Call OpenAI in a worker thread with a deadline, retries on 429/5xx and optional hedging.
+            # Every attempt is admitted against the host-wide RPM/TPM budget first, queued fairly per user.
+            # If it stays down (or the circuit is open) answer from the cache or the retrieved passages instead.
+            estimated_tokens = estimate_tokens((m["content"] for m in messages), settings["max_tokens"])
+
+            def create(timeout: float):
+                deadline = time.monotonic() + timeout
+                with get_admission_controller().admit("chat", user_id, estimated_tokens, timeout) as lease:
+                    response = self.client.chat.completions.create(
+                        model=settings["model"],
+                        messages=messages,
+                        max_tokens=settings["max_tokens"],
+                        temperature=settings["temperature"],
+                        prompt_cache_key=prompt_cache_key(certification_code),
+                        timeout=max(deadline - time.monotonic(), 0.1)
+                    )
+                    lease["used_tokens"] = response.usage.total_tokens if response.usage else None
+                    return response
+
+            start = time.perf_counter()
+            try:
+                response = await asyncio.to_thread(get_resilient_caller("chat").call, create, None, route)
+            except Exception as e:
+                get_model_route_metrics().record(route, settings["model"], (time.perf_counter() - start) * 1000, error=True)
+                logging.error(f"Model call failed, answering in degraded mode: {type(e).__name__}: {e}")
+                return self.degraded_answer(message, certification_code, rag_result, glossary_context)
+            latency_ms = (time.perf_counter() - start) * 1000
+
             # Validate citations in response
             response_text = response.choices[0].message.content
             sources = rag_result.get("sources", [])
@@ -100,14 +154,22 @@ Instructions:
                 # For now, just log the warning
 
             logging.info(f"Response generated with {len(citations)} citations, {len(invalid_citations)} invalid.")
+            if response.usage:
+                logging.info(f"Prompt cache: {cached_prompt_tokens(response.usage)}/{response.usage.prompt_tokens} prompt tokens cached")
+
+            usage = {
+                "prompt_tokens": response.usage.prompt_tokens if response.usage else None,
+                "completion_tokens": response.usage.completion_tokens if response.usage else None,
+                "total_tokens": response.usage.total_tokens if response.usage else None,
+                "cached_tokens": cached_prompt_tokens(response.usage),
+                "model": settings["model"],
+                "route": route
+            }
+            get_model_route_metrics().record(route, settings["model"], latency_ms, usage)
 
-            return {
+            result = {
                 "response": response_text,
-                "usage": {
-                    "prompt_tokens": response.usage.prompt_tokens if response.usage else None,
-                    "completion_tokens": response.usage.completion_tokens if response.usage else None,
-                    "total_tokens": response.usage.total_tokens if response.usage else None
-                },
+                "usage": usage,
                 "rag_info": {
                     "retrieval_successful": rag_result["retrieval_successful"],
                     "context_used": bool(rag_result["context"]),
@@ -115,10 +177,15 @@ Instructions:
                     "sources": sources[:3] if sources else []
                 }
             }
+            get_answer_cache().put(message, certification_code, result)
+            return result
+        except HTTPException:
+            raise
         except Exception as e:
             import logging
-            logging.error(f"Error generating response: {str(e)}")
+            # The details stay in the logs; clients get a generic message
+            logging.exception(f"Error generating response: {str(e)}")
             raise HTTPException(
                 status_code=500,
-                detail=f"Error generating response: {str(e)}"
+                detail="Error generating response"
             )
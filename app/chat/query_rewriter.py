@@ -0,0 +1,143 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.chat.retrieval_planner import FOLLOW_UP, SMALL_TALK, normalize_message, find_certification
+
+# "what are test levels" -> lead "what are", subject "test levels"
+LEAD = re.compile(
+    r"^(?P<lead>what (?:is|are|was|were|does|do)|what's|how (?:do|does|is|are|can|should|to)|why (?:is|are|do|does|should)|"
+    r"when (?:is|are|should)|which|explain|describe|define|list|give me|tell me about|"
+    r"qu[eé] (?:es|son)|c[oó]mo|por qu[eé]|explica|describe|lista|dime)\s+(?P<subject>.+)$",
+    re.IGNORECASE
+)
+# "and what about section 3?", "how about test types", "y qué hay de las pruebas de regresión"
+CONTINUATION = re.compile(
+    r"^(?:and |also |y |e )?(?:what about|how about|same for|and for|what of|qu[eé] hay de|qu[eé] pasa con|y sobre|y en|and in|and)\b\s*(?P<rest>.*)$",
+    re.IGNORECASE
+)
+PRONOUN = re.compile(r"\b(?:it|its|that|this|they|them|those|these|eso|esto|ello)\b", re.IGNORECASE)
+SECTION_REF = re.compile(r"\b(?P<kind>section|chapter|secci[oó]n|cap[ií]tulo)\s+(?P<number>\d+(?:\.\d+)*)\b", re.IGNORECASE)
+MAX_FOLLOW_UP_WORDS = 8
+
+
+def new_state() -> Dict[str, Any]:
+    # last_message_id: the newest stored message this state has seen; another worker answering in
+    # between leaves it behind the history, and the state is then rebuilt
+    return {"certification_code": None, "lead": None, "subject": None, "topic": None, "turns": 0, "last_message_id": None}
+
+
+def _with_section(topic: str, kind: str, number: str) -> str:
+    if SECTION_REF.search(topic):
+        return SECTION_REF.sub(f"{kind} {number}", topic, count=1)
+    return f"{topic} in {kind} {number}"
+
+
+def is_follow_up(message: str) -> bool:
+    """Whether a message only makes sense together with the previous turns"""
+    text = message.strip().rstrip("?!. ")
+    return bool(SECTION_REF.fullmatch(text) or CONTINUATION.match(text)
+                or (len(text.split()) <= MAX_FOLLOW_UP_WORDS and PRONOUN.search(text)))
+
+
+def rewrite_query(message: str, state: Optional[Dict[str, Any]]) -> str:
+    """Standalone version of a follow-up question, built from the conversation's active topic"""
+    text = message.strip().rstrip("?!. ")
+    if not state or not state.get("topic") or not text:
+        return message
+    normalized = normalize_message(text)
+    if SMALL_TALK.match(normalized) or FOLLOW_UP.match(normalized):
+        return message  # small talk and "explain that more simply" are answered from history
+    suffix = "?" if message.strip().endswith("?") else ""
+    topic = state["topic"].rstrip("?!. ")
+
+    only_section = SECTION_REF.fullmatch(text)
+    continuation = CONTINUATION.match(text)
+    if only_section or continuation:
+        rest = text if only_section else continuation.group("rest").strip()
+        section = SECTION_REF.fullmatch(rest)
+        if section:
+            return _with_section(topic, section.group("kind"), section.group("number")) + suffix
+        if rest:
+            return f"{state['lead']} {rest}{suffix}" if state.get("lead") else f"{rest} ({topic}){suffix}"
+        return topic + suffix
+
+    if len(text.split()) <= MAX_FOLLOW_UP_WORDS and state.get("subject") and PRONOUN.search(text):
+        return PRONOUN.sub(state["subject"], text, count=1) + suffix
+    return message
+
+
+def update_state(state: Optional[Dict[str, Any]], message: str, query: str, certification_code: Optional[str] = None,
+                 sender: str = "user") -> Dict[str, Any]:
+    """Fold one turn into the conversation state (active certification and topic)"""
+    state = dict(state or new_state())
+    if certification_code:
+        state["certification_code"] = certification_code
+    if sender != "user":
+        return state
+    state["turns"] += 1
+    normalized = normalize_message(message)
+    if not normalized or SMALL_TALK.match(normalized) or FOLLOW_UP.match(normalized):
+        return state
+    topic = query.strip().rstrip("?!. ")
+    lead = LEAD.match(topic)
+    state["topic"] = topic
+    state["lead"] = lead.group("lead").lower() if lead else None
+    state["subject"] = lead.group("subject") if lead else topic
+    return state
+
+
+def rebuild_state(history: List[Dict[str, str]], certifications: Iterable[Tuple[str, str]] = ()) -> Dict[str, Any]:
+    """Replay a conversation (role/content dicts) when its state is not cached in this process"""
+    certifications = list(certifications)
+    state = new_state()
+    for turn in history:
+        query = rewrite_query(turn["content"], state) if turn["role"] == "user" else turn["content"]
+        code = find_certification(query, certifications)
+        state = update_state(state, turn["content"], query, code, sender=turn["role"])
+    return state
+
+
+def is_current(state: Optional[Dict[str, Any]], last_message_id: Optional[int]) -> bool:
+    """Whether a cached state already includes the conversation's newest stored message"""
+    return state is not None and state.get("last_message_id") == last_message_id
+
+
+class ConversationStateCache:
+    """Bounded LRU of conversation states, keyed by (user id, conversation id)"""
+
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[int, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            state = self._entries.get(key)
+            if state is None:
+                return None
+            self._entries.move_to_end(key)
+            return dict(state)
+
+    def put(self, key: Tuple[int, str], state: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = dict(state)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard_user(self, user_id: int):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+
+# Global instance
+_conversation_states = None
+
+def get_conversation_states() -> ConversationStateCache:
+    """Get the per-process conversation state cache"""
+    global _conversation_states
+    if _conversation_states is None:
+        _conversation_states = ConversationStateCache()
+    return _conversation_states
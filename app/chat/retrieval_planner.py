@@ -0,0 +1,105 @@
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.config import RAG_TOP_K, RAG_TOP_K_BROAD, RAG_TOP_K_NARROW
+
+# Whole-message small talk: nothing in the syllabi can improve the answer
+SMALL_TALK = re.compile(
+    r"^(?:hi|hello|hey|hola|buenas|buenos dias|buenas tardes|buenas noches|good (?:morning|afternoon|evening)|"
+    r"thanks?(?: you)?(?: (?:so|very) much)?|thx|ty|gracias|muchas gracias|ok(?:ay)?|vale|perfect[oa]?|great|genial|"
+    r"cool|nice|got it|entendido|de acuerdo|bye|goodbye|adios|chao|see you|hasta luego)"
+    r"(?: (?:there|assistant|asistente|bot))?$"
+)
+# Requests to rework the previous answer; the conversation history already has what is needed
+FOLLOW_UP = re.compile(
+    r"^(?:(?:please |por favor )?(?:explain|say|put|rephrase|summari[sz]e|simplify|shorten|translate|repeat|clarify|expand)"
+    r"(?: (?:that|this|it|the (?:last|previous) (?:answer|one)))?"
+    r"(?: (?:again|more simply|in simpler terms|in other words|more briefly|shorter|in (?:english|spanish|espanol|ingles)|with an example))*|"
+    r"(?:can you |could you )?(?:make it|say it|explain it) (?:simpler|shorter|easier)|"
+    r"(?:explica(?:lo|melo)?|resume(?:lo)?|simplifica(?:lo)?|traduce(?:lo)?|repite(?:lo)?)"
+    r"(?: (?:eso|esto|de nuevo|otra vez|mas simple|mas facil|con otras palabras|en (?:ingles|espanol)|con un ejemplo))*|"
+    r"what do you mean|que quieres decir|in other words|con otras palabras|tl ?dr)$"
+)
+# Questions that span several sections get more chunks; lookups of a single fact get fewer
+BROAD = re.compile(r"\b(?:compare|comparison|difference|differences|versus|vs|list all|all the|overview|summary of|summari[sz]e (?:the )?chapter|"
+                   r"diferencias?|compara|todos los|todas las|resumen del?)\b")
+NARROW = re.compile(r"^(?:what is|what are|what's|define|definition of|que es|que son|definicion de)\b")
+
+
+def normalize_message(text: str) -> str:
+    """Lowercase, strip accents and punctuation (dots and hyphens are kept for codes like 'CTFL-v4.0')"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(re.sub(r"[^a-z0-9.\-]+", " ", text).split()).strip(" .-")
+
+
+def certification_aliases(code: str, name: str = "") -> List[str]:
+    """Ways users refer to a certification: 'CTFL-v4.0', 'CTFL', 'GenAI', its name without 'Certified Tester'"""
+    aliases = {normalize_message(code)}
+    base = re.sub(r"[-\s]*v?\d+(?:\.\d+)*$", "", code, flags=re.IGNORECASE)
+    aliases.add(normalize_message(base))
+    aliases.update(normalize_message(part) for part in re.split(r"[-\s/]+", base) if len(part) >= 3 and part.upper() != "CT")
+    if name:
+        aliases.add(normalize_message(name))
+        short = re.sub(r"^certified tester\s+", "", name, flags=re.IGNORECASE)
+        if len(short.split()) >= 2:
+            aliases.add(normalize_message(short))
+    return sorted((alias for alias in aliases if alias), key=len, reverse=True)
+
+
+def find_certification(text: str, certifications: Iterable[Tuple[str, str]]) -> Optional[str]:
+    """Code of the certification mentioned in text (longest alias wins), if any"""
+    normalized = f" {normalize_message(text)} "
+    best: Optional[Tuple[int, str]] = None
+    for code, name in certifications:
+        for alias in certification_aliases(code, name):
+            if f" {alias} " in normalized and (best is None or len(alias) > best[0]):
+                best = (len(alias), code)
+    return best[1] if best else None
+
+
+def needs_history(message: str, certification_code: Optional[str], certifications: Iterable[Tuple[str, str]]) -> bool:
+    """Whether the plan depends on the conversation (follow-ups, or no certification given or mentioned)"""
+    text = normalize_message(message)
+    if SMALL_TALK.match(text):
+        return False
+    if FOLLOW_UP.match(text):
+        return True
+    return not certification_code and find_certification(message, certifications) is None
+
+
+def plan_retrieval(message: str, certification_code: Optional[str] = None, history: Optional[List[Dict[str, str]]] = None,
+                   certifications: Iterable[Tuple[str, str]] = (), history_certification: Optional[str] = None) -> Dict[str, Any]:
+    """Decide whether to search the syllabi for a message, scoped to which certification, and how many chunks.
+
+    history_certification is the conversation's active certification when it is already known (cached
+    conversation state); it stands in for scanning the history, so a mention in the message still wins.
+    """
+    certifications = list(certifications)
+    history = history or []
+    text = normalize_message(message)
+
+    if SMALL_TALK.match(text):
+        return {"retrieve": False, "certification_code": certification_code, "k": 0, "reason": "small_talk"}
+    if FOLLOW_UP.match(text) and any(turn["role"] == "assistant" for turn in history):
+        return {"retrieve": False, "certification_code": certification_code, "k": 0, "reason": "follow_up"}
+
+    # Explicit code from the client, then a mention in the message, then the most recent mention in the conversation
+    code = certification_code or find_certification(message, certifications)
+    reason = "certification_given" if certification_code else "certification_in_message" if code else "unscoped"
+    if not code and history_certification:
+        code, reason = history_certification, "certification_from_history"
+    if not code:
+        for turn in reversed(history):
+            code = find_certification(turn["content"], certifications)
+            if code:
+                reason = "certification_from_history"
+                break
+
+    if BROAD.search(text):
+        k = RAG_TOP_K_BROAD
+    elif NARROW.match(text) and len(text.split()) <= 8:
+        k = RAG_TOP_K_NARROW
+    else:
+        k = RAG_TOP_K
+    return {"retrieve": True, "certification_code": code, "k": k, "reason": reason}
@@ -4,10 +4,23 @@ from app.schemas.chat import ChatMessage, ChatResponse, RAGInfo
 from app.auth.oauth2 import get_current_active_user
 from app.models.user import User
 from app.models.chat import ChatMessage as ChatMessageModel
-from app.chat.openai_client import OpenAIClient
+from app.chat.openai_client import OpenAIClient, retrieve_context, EMPTY_RAG_RESULT
+from app.chat.intent_router import route_message
+from app.chat.model_router import get_model_route_metrics
+from app.utils.resilience import resilience_snapshot
+from app.utils.admission import get_admission_controller
+from app.utils.single_flight import get_single_flight
+from app.auth.role_middleware import require_admin_checker
+from app.auth.rate_limit import enforce_chat_rate_limit, get_chat_rate_limiter, record_chat_tokens
+from app.certification.syllabus_index import certification_brief
+from app.chat.retrieval_planner import needs_history, normalize_message, plan_retrieval
+from app.chat.query_rewriter import get_conversation_states, is_current, is_follow_up, rebuild_state, rewrite_query, update_state
+from app.models.certification import Certification
 from app.database.connection import get_db
 from typing import List
+import asyncio
 import logging
+import time
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
@@ -23,10 +36,25 @@ async def delete_chat_history(
     try:
         deleted = db.query(ChatMessageModel).filter(ChatMessageModel.user_id == current_user.id).delete()
         db.commit()
+        get_conversation_states().discard_user(current_user.id)
         return {"detail": f"Deleted {deleted} chat messages for user {current_user.username}"}
     except Exception as e:
         logging.error(f"Error deleting chat history: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/metrics/models")
+async def get_model_metrics(admin_user: User = Depends(require_admin_checker)):
+    """Per-route model calls, tokens, estimated spend and latency for this worker (Admin only)"""
+    return {"status": "success", "data": get_model_route_metrics().snapshot()}
+
+@router.get("/metrics/upstream")
+async def get_upstream_metrics(admin_user: User = Depends(require_admin_checker)):
+    """Retries, hedges, breaker state and coalesced requests in this worker, and the host-wide OpenAI rate budget (Admin only)"""
+    return {"status": "success", "data": {
+        "callers": resilience_snapshot(),
+        "admission": get_admission_controller().snapshot(),
+        "single_flight": get_single_flight().snapshot(),
+    }}
 
 def format_chat_history_for_openai(messages: List[ChatMessageModel]) -> list:
     formatted = []
@@ -35,6 +63,53 @@ def format_chat_history_for_openai(messages: List[ChatMessageModel]) -> list:
         formatted.append({"role": role, "content": msg.message})
     return formatted
 
+def load_recent_history(db: Session, user_id: int, conversation_id: str, limit: int = 19) -> List[ChatMessageModel]:
+    """Last messages of a conversation, oldest first"""
+    history = db.query(ChatMessageModel)\
+        .filter(ChatMessageModel.user_id == user_id)\
+        .filter(ChatMessageModel.conversation_id == conversation_id)\
+        .order_by(ChatMessageModel.timestamp.desc(), ChatMessageModel.id.desc())\
+        .limit(limit)\
+        .all()
+    return list(reversed(history))
+
+def load_certifications(db: Session) -> List[tuple]:
+    """(code, name) of the active certifications, used to spot them in messages"""
+    return db.query(Certification.code, Certification.name).filter(Certification.is_active == True).all()
+
+async def _timed(stage, timings: dict, name: str):
+    start = time.perf_counter()
+    try:
+        return await stage
+    finally:
+        timings[name] = round((time.perf_counter() - start) * 1000)
+
+def _start_retrieval(query: str, plan: dict, timings: dict):
+    """Run retrieval in a thread when the plan asks for it; None means the model answers from history alone"""
+    logging.info(f"Retrieval plan: {plan}, query: {query!r}")
+    if not plan["retrieve"]:
+        return None
+    # Identical queries in flight at the same time (a whole class asking the same question) share one search
+    key = ("retrieve", normalize_message(query), plan["certification_code"], plan["k"])
+
+    async def search():
+        # The stage is created inside the task, so cancelling it before it starts leaves nothing un-awaited
+        return await _timed(
+            get_single_flight().do(key, lambda: asyncio.to_thread(retrieve_context, query, plan["certification_code"], plan["k"])),
+            timings, "retrieval_ms"
+        )
+
+    return asyncio.create_task(search())
+
+def _discard_retrieval(retrieval):
+    """Stop waiting for a retrieval whose result is not needed (direct answers, errors)"""
+    if retrieval is None:
+        return
+    if not retrieval.done():
+        retrieval.cancel()
+    elif not retrieval.cancelled():
+        retrieval.exception()  # mark a failure as seen so it is not logged as never retrieved
+
 @router.get("/history", response_model=List[ChatMessage])
 async def get_chat_history(
     conversation_id: str = Query(None, description="Conversation ID to filter messages"),
@@ -49,29 +124,60 @@ async def get_chat_history(
         return [ChatMessage(message=msg.message, context=None, certification_code=None) for msg in history]
     except Exception as e:
         logging.error(f"Error fetching chat history: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
 
-@router.post("/", response_model=ChatResponse)
+@router.get("/limits")
+async def get_chat_limits(current_user: User = Depends(get_current_active_user)):
+    """The current user's chat limits and today's token usage"""
+    return {"status": "success", "data": get_chat_rate_limiter().usage(current_user.username, current_user.role)}
+
+@router.post("/", response_model=ChatResponse, dependencies=[Depends(enforce_chat_rate_limit)])
 async def chat_with_assistant(
     chat_message: ChatMessage,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
+    retrieval = None
     try:
         logging.info(f"DEBUG: Received message from user {current_user.username}: {chat_message.message}")
 
         conversation_id = chat_message.conversation_id or "default_conversation"
+        timings = {}
+
+        # 0. Decide si hace falta buscar en los syllabus (saludos y reformulaciones no lo necesitan) y reescribe
+        #    los seguimientos ("¿y la sección 3?") como preguntas completas con el tema activo de la conversación.
+        #    Si nada de eso depende del historial, la recuperación RAG arranca ya y se solapa con la base de datos.
+        certifications = load_certifications(db)
+        states = get_conversation_states()
+        state_key = (current_user.id, conversation_id)
+        state = states.get(state_key)
+        cached_certification = (state or {}).get("certification_code")
+        plan = None
+        if (not needs_history(chat_message.message, chat_message.certification_code or cached_certification, certifications)
+                and (state is not None or not is_follow_up(chat_message.message))):
+            query = rewrite_query(chat_message.message, state)
+            plan = plan_retrieval(query, chat_message.certification_code, None, certifications, history_certification=cached_certification)
+            retrieval = _start_retrieval(query, plan, timings)
 
-        # 1. Recupera historial anterior (últimos 19 mensajes)
-        history = db.query(ChatMessageModel)\
-            .filter(ChatMessageModel.user_id == current_user.id)\
-            .filter(ChatMessageModel.conversation_id == conversation_id)\
-            .order_by(ChatMessageModel.timestamp.asc())\
-            .all()
-        history = history[-19:]  # Deja espacio para el mensaje actual
+        # 1. Recupera historial anterior (últimos 19 mensajes, deja espacio para el mensaje actual)
+        history = await _timed(
+            asyncio.to_thread(load_recent_history, db, current_user.id, conversation_id), timings, "history_ms"
+        )
 
-        # 2. Formatea historial
+        # 2. Formatea historial y, si hacía falta, planifica con él (certificación y tema inferidos de la conversación).
+        #    Si otro worker respondió en esta conversación, el estado en caché está atrasado: se reconstruye y se replanifica.
         context_list = format_chat_history_for_openai(history)
+        if state is not None and not is_current(state, history[-1].id if history else None):
+            _discard_retrieval(retrieval)
+            state = plan = retrieval = None
+        if state is None:
+            state = rebuild_state(context_list, certifications)
+        if plan is None:
+            query = rewrite_query(chat_message.message, state)
+            plan = plan_retrieval(query, chat_message.certification_code, context_list, certifications,
+                                  history_certification=state["certification_code"])
+            retrieval = _start_retrieval(query, plan, timings)
+        state = update_state(state, chat_message.message, query, plan["certification_code"])
 
         # 3. Guarda el mensaje actual del usuario ANTES de llamar al modelo
         user_msg = ChatMessageModel(
@@ -93,20 +199,32 @@ async def chat_with_assistant(
         # 4. Agrega el mensaje actual al historial
         context_list.append({"role": "user", "content": chat_message.message})
 
-        # 5. Llama al modelo con todo el historial (incluyendo el mensaje actual)
-        openai_client = OpenAIClient()
-        import pprint
-        print("\n==== MENSAJES ENVIADOS AL MODELO ====")
-        pprint.pprint(context_list)
-        print("======================================\n")
-
-        result = await openai_client.generate_response(
-            message=chat_message.message,
-            context=context_list,
-            certification_code=chat_message.certification_code
-        )
+        # 5. Preguntas de examen, quizzes, business outcomes, objetivos y keywords se responden desde las tablas
+        result = route_message(db, chat_message.message, plan["certification_code"])
+
+        # 6. Si no, espera el contexto RAG y llama al modelo con todo el historial (incluyendo el mensaje actual)
+        if result is None:
+            openai_client = OpenAIClient()
+            wait_start = time.perf_counter()
+            rag_result = await retrieval if retrieval else dict(EMPTY_RAG_RESULT)
+            timings["waited_for_retrieval_ms"] = round((time.perf_counter() - wait_start) * 1000)
+            logging.info(f"Chat stages before the model call: {timings}")
+            import pprint
+            print("\n==== MENSAJES ENVIADOS AL MODELO ====")
+            pprint.pprint(context_list)
+            print("======================================\n")
+
+            result = await openai_client.generate_response(
+                message=chat_message.message,
+                context=context_list,
+                certification_code=plan["certification_code"],
+                rag_result=rag_result,
+                static_context=certification_brief(db, plan["certification_code"]),
+                user_id=current_user.id
+            )
 
-        # 6. Guarda respuesta del bot
+        # 7. Descuenta los tokens de la cuota diaria del usuario y guarda respuesta del bot
+        record_chat_tokens(current_user, result.get("usage"))
         assistant_msg = ChatMessageModel(
             user_id=current_user.id,
             conversation_id=conversation_id,
@@ -122,6 +240,7 @@ async def chat_with_assistant(
             db.rollback()
             raise
         db.refresh(assistant_msg)
+        states.put(state_key, dict(state, last_message_id=assistant_msg.id))
 
         logging.info(f"Assistant response sent to user {current_user.username}")
 
@@ -130,6 +249,11 @@ async def chat_with_assistant(
             usage=result["usage"],
             rag_info=RAGInfo(**result["rag_info"]) if result.get("rag_info") else None
         )
+    except HTTPException:
+        raise
     except Exception as e:
-        logging.error(f"Error in chat_with_assistant: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+        logging.exception(f"Error in chat_with_assistant: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+    finally:
+        # Answered from the tables or failed before the model call: the search result is not needed
+        _discard_retrieval(retrieval)
@@ -1,6 +1,5 @@
 import os
-
-import os
+import tempfile
 
 # Secret key for JWT encoding/decoding
 SECRET_KEY = os.environ.get("SECRET_KEY", "lucho123")
@@ -10,3 +9,83 @@ ALGORITHM = "HS256"
 
 # Token expiration time in minutes
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+
+# Retrieval: over-fetch candidates, rerank them and keep the best within a token budget
+RAG_FETCH_K = int(os.environ.get("RAG_FETCH_K", "30"))
+RAG_TOP_K = int(os.environ.get("RAG_TOP_K", "5"))
+RAG_TOP_K_BROAD = int(os.environ.get("RAG_TOP_K_BROAD", "8"))  # comparisons, overviews, "list all"
+RAG_TOP_K_NARROW = int(os.environ.get("RAG_TOP_K_NARROW", "3"))  # short "what is X" lookups
+RAG_CONTEXT_TOKEN_BUDGET = int(os.environ.get("RAG_CONTEXT_TOKEN_BUDGET", "2000"))
+RAG_RERANKER = os.environ.get("RAG_RERANKER", "mmr")  # "mmr" or "cross-encoder"
+RAG_CROSS_ENCODER_MODEL = os.environ.get("RAG_CROSS_ENCODER_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+
+# Quiz pools: questions are pre-generated per certification/chapter and refilled in the background
+QUIZ_POOL_TARGET = int(os.environ.get("QUIZ_POOL_TARGET", "40"))
+QUIZ_POOL_LOW_WATERMARK = int(os.environ.get("QUIZ_POOL_LOW_WATERMARK", "15"))
+QUIZ_GENERATION_BATCH = int(os.environ.get("QUIZ_GENERATION_BATCH", "10"))
+QUIZ_MAX_SERVES = int(os.environ.get("QUIZ_MAX_SERVES", "25"))  # retire a question after this many quizzes
+QUIZ_GENERATION_MODEL = os.environ.get("QUIZ_GENERATION_MODEL", "gpt-4o")
+QUIZ_GENERATION_TIMEOUT_SECONDS = float(os.environ.get("QUIZ_GENERATION_TIMEOUT_SECONDS", "120"))  # a batch is a long completion
+QUIZ_PREWARM_ON_STARTUP = os.environ.get("QUIZ_PREWARM_ON_STARTUP", "false").lower() == "true"  # each worker prewarms; enable on one instance only
+
+# ISTQB glossary export (JSON list or CSV with term/definition[/synonyms/abbreviation] columns)
+GLOSSARY_PATH = os.environ.get("GLOSSARY_PATH", "./data/istqb_glossary.json")
+
+# Vector store location, optional prebuilt snapshot for fresh workers and startup warm-up
+CHROMA_PERSIST_DIRECTORY = os.environ.get("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
+VECTOR_STORE_SNAPSHOT = os.environ.get("VECTOR_STORE_SNAPSHOT", "")  # .tar.gz from scripts/vector_store_snapshot.py
+VECTOR_STORE_WARM_ON_STARTUP = os.environ.get("VECTOR_STORE_WARM_ON_STARTUP", "true").lower() == "true"
+
+# Retrieval service: when set, workers query the vector store owned by scripts/retrieval_service.py over this Unix socket
+RETRIEVAL_SERVICE_SOCKET = os.environ.get("RETRIEVAL_SERVICE_SOCKET", "")
+
+# Model routing: short factual questions go to the small model, quizzes/study plans/multi-hop questions to the large one.
+# CHAT_MODEL_ROUTES may override any route with JSON, e.g. {"small": {"model": "gpt-4.1-mini", "max_tokens": 400}}
+CHAT_MODEL_LARGE = os.environ.get("CHAT_MODEL_LARGE", "gpt-4o")
+CHAT_MODEL_SMALL = os.environ.get("CHAT_MODEL_SMALL", "gpt-4o-mini")
+CHAT_MODEL_ROUTES = os.environ.get("CHAT_MODEL_ROUTES", "")
+# USD per million tokens (input, cached input, output), used to estimate spend per route
+CHAT_MODEL_PRICES = os.environ.get("CHAT_MODEL_PRICES", "")
+
+# OpenAI calls: per-request deadline, retries with jittered backoff on 429/5xx/timeouts, optional hedging and a
+# circuit breaker. LLM_HEDGE_AFTER_MS is "" (off), a delay in ms, or "p95" to hedge after the observed p95 latency.
+LLM_TIMEOUT_SECONDS = float(os.environ.get("LLM_TIMEOUT_SECONDS", "30"))
+EMBEDDING_TIMEOUT_SECONDS = float(os.environ.get("EMBEDDING_TIMEOUT_SECONDS", "10"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_SECONDS = float(os.environ.get("LLM_RETRY_BASE_SECONDS", "0.5"))
+LLM_RETRY_MAX_SECONDS = float(os.environ.get("LLM_RETRY_MAX_SECONDS", "8"))
+LLM_HEDGE_AFTER_MS = os.environ.get("LLM_HEDGE_AFTER_MS", "")
+LLM_BREAKER_FAILURES = int(os.environ.get("LLM_BREAKER_FAILURES", "5"))  # consecutive failed calls before it opens
+LLM_BREAKER_RESET_SECONDS = float(os.environ.get("LLM_BREAKER_RESET_SECONDS", "30"))
+
+# Admission control for OpenAI calls, shared by every worker on the host through a small SQLite file.
+# Set the RPM/TPM limits of your OpenAI tier; they are off (0) until configured, since a guessed tier would throttle
+# every other one. Calls are admitted at ADMISSION_HEADROOM of them and wait in a fair per-user queue for at most
+# ADMISSION_QUEUE_TIMEOUT_SECONDS. With every limit at 0 an API skips admission entirely (no SQLite round trips and
+# no host-wide 429 pauses); a waiting call holds its worker thread while it polls the queue.
+OPENAI_CHAT_RPM = int(os.environ.get("OPENAI_CHAT_RPM", "0"))
+OPENAI_CHAT_TPM = int(os.environ.get("OPENAI_CHAT_TPM", "0"))
+OPENAI_EMBEDDING_RPM = int(os.environ.get("OPENAI_EMBEDDING_RPM", "0"))
+OPENAI_EMBEDDING_TPM = int(os.environ.get("OPENAI_EMBEDDING_TPM", "0"))
+OPENAI_MAX_CONCURRENCY = int(os.environ.get("OPENAI_MAX_CONCURRENCY", "0"))  # in-flight calls per API, all workers
+ADMISSION_HEADROOM = float(os.environ.get("ADMISSION_HEADROOM", "0.9"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10"))
+ADMISSION_DB_PATH = os.environ.get("ADMISSION_DB_PATH", os.path.join(tempfile.gettempdir(), "istqb-openai-admission.sqlite3"))
+
+# Per-user limits on /chat, by role: requests per sliding minute and model tokens per UTC day (0 = unlimited).
+# CHAT_RATE_LIMITS may override them with JSON, e.g. {"user": {"requests_per_minute": 5}}.
+# Counters are per worker unless RATE_LIMIT_REDIS_URL points at a Redis-compatible server (needs the redis package).
+CHAT_RATE_LIMITS = os.environ.get("CHAT_RATE_LIMITS", "")
+RATE_LIMIT_REDIS_URL = os.environ.get("RATE_LIMIT_REDIS_URL", "")
+
+# PDF ingestion runs as a pipeline (pages -> chunks -> embedding batches -> upsert). Parsing runs at most
+# INGEST_PREFETCH_BATCHES batches ahead of embedding, so memory stays bounded for any document size.
+INGEST_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", "64"))
+INGEST_PREFETCH_BATCHES = int(os.environ.get("INGEST_PREFETCH_BATCHES", "2"))
+
+# PDF text extraction: "pypdf" (default, what the syllabus/exam parsers are tuned on) or "pymupdf" (much faster,
+# needs the PyMuPDF package). Pages are extracted in PDF_EXTRACT_WORKERS processes and the text is cached per
+# file content hash, so reprocessing and the structured indexers do not extract the same PDF again.
+PDF_EXTRACTOR = os.environ.get("PDF_EXTRACTOR", "pypdf")
+PDF_EXTRACT_WORKERS = int(os.environ.get("PDF_EXTRACT_WORKERS", str(min(8, os.cpu_count() or 1))))
+PDF_TEXT_CACHE_DIR = os.environ.get("PDF_TEXT_CACHE_DIR", os.path.join(tempfile.gettempdir(), "istqb-pdf-text"))
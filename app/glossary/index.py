@@ -0,0 +1,193 @@
+import csv
+import json
+import os
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.config import GLOSSARY_PATH
+from app.utils.responses import direct_response
+
+# "what is a test oracle?", "define equivalence partitioning", "¿qué es un defecto?"
+DEFINITION_PATTERNS = [
+    re.compile(r"^(?:what\s+(?:is|are)|whats|what's)\s+(?:an?\s+|the\s+)?(?P<term>.+?)$", re.IGNORECASE),
+    re.compile(r"^what\s+does\s+(?:an?\s+|the\s+)?(?P<term>.+?)\s+mean$", re.IGNORECASE),
+    re.compile(r"^(?:define|definition\s+of|meaning\s+of)\s+(?:an?\s+|the\s+)?(?P<term>.+?)$", re.IGNORECASE),
+    re.compile(r"^(?:qu[eé]\s+(?:es|son|significa)|define|definici[oó]n\s+de)\s+(?:el\s+|la\s+|los\s+|las\s+|un\s+|una\s+)?(?P<term>.+?)$", re.IGNORECASE),
+]
+TRAILING_NOISE = re.compile(r"\s+(?:in|according\s+to|seg[uú]n|en)\s+(?:the\s+)?(?:istqb|glossary|glosario).*$", re.IGNORECASE)
+_END = "\0"  # terminal marker in trie nodes
+
+
+def normalize_term(text: str) -> str:
+    """Lowercase, strip accents and collapse punctuation/hyphens to single spaces"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+
+def max_distance_for(term: str) -> int:
+    """Typo tolerance grows with the length of the looked-up term"""
+    if len(term) <= 3:
+        return 0
+    return 1 if len(term) <= 7 else 2
+
+
+class GlossaryIndex:
+    """In-memory glossary: hash map for exact lookups and a character trie for fuzzy ones"""
+
+    def __init__(self, entries: Iterable[Dict[str, Any]] = ()):
+        self.entries: List[Dict[str, Any]] = []
+        self._exact: Dict[str, int] = {}
+        self._trie: Dict[str, Any] = {}
+        self._max_words = 1
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, entry: Dict[str, Any]):
+        entry_id = len(self.entries)
+        self.entries.append(entry)
+        for name in [entry["term"], entry.get("abbreviation")] + list(entry.get("synonyms") or []):
+            key = normalize_term(name or "")
+            if not key or key in self._exact:
+                continue
+            self._exact[key] = entry_id
+            self._max_words = max(self._max_words, len(key.split()))
+            node = self._trie
+            for ch in key:
+                node = node.setdefault(ch, {})
+            node[_END] = entry_id
+
+    def lookup(self, term: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        """Best entry for term as (entry, edit distance), tolerating typos and plurals"""
+        key = normalize_term(term)
+        if not key:
+            return None
+        for candidate in (key, key[:-1] if key.endswith("s") else None):
+            if candidate in self._exact:
+                return self.entries[self._exact[candidate]], 0
+        matches = self.fuzzy(key, max_distance_for(key))
+        if not matches:
+            return None
+        distance, entry_id = min(matches)
+        return self.entries[entry_id], distance
+
+    def fuzzy(self, key: str, max_distance: int) -> List[Tuple[int, int]]:
+        """(distance, entry id) for all keys within max_distance, via Levenshtein rows over the trie"""
+        results: List[Tuple[int, int]] = []
+        if max_distance <= 0:
+            return results
+        first_row = list(range(len(key) + 1))
+        stack = [(child, ch, first_row) for ch, child in self._trie.items() if ch != _END]
+        while stack:
+            node, ch, previous = stack.pop()
+            row = [previous[0] + 1]
+            for i in range(1, len(key) + 1):
+                cost = 0 if key[i - 1] == ch else 1
+                row.append(min(row[i - 1] + 1, previous[i] + 1, previous[i - 1] + cost))
+            if _END in node and row[-1] <= max_distance:
+                results.append((row[-1], node[_END]))
+            if min(row) <= max_distance:
+                stack.extend((child, next_ch, row) for next_ch, child in node.items() if next_ch != _END)
+        return results
+
+    def find_terms(self, text: str, max_terms: int = 3) -> List[Dict[str, Any]]:
+        """Glossary terms mentioned in text (exact matches, longest phrases first)"""
+        tokens = normalize_term(text).split()
+        found: Dict[int, int] = {}
+        i = 0
+        while i < len(tokens):
+            for n in range(min(self._max_words, len(tokens) - i), 0, -1):
+                entry_id = self._exact.get(" ".join(tokens[i:i + n]))
+                if entry_id is not None:
+                    found.setdefault(entry_id, n)
+                    i += n
+                    break
+            else:
+                i += 1
+        # Multi-word terms are the most specific, so they win when capping
+        ranked = sorted(found.items(), key=lambda item: -item[1])[:max_terms]
+        return [self.entries[entry_id] for entry_id, _ in ranked]
+
+    def context_for(self, message: str, max_terms: int = 3) -> str:
+        """Exact definitions for the terms in a message, as compact model context"""
+        return "\n".join(f"{entry['term']}: {entry['definition']}" for entry in self.find_terms(message, max_terms))
+
+
+def _split_list(value: Any) -> List[str]:
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in str(value or "").split(";") if item.strip()]
+
+
+def _entry_from_record(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    record = {str(key).strip().lower(): value for key, value in record.items()}
+    term = str(record.get("term") or record.get("name") or "").strip()
+    definition = str(record.get("definition") or "").strip()
+    if not term or not definition:
+        return None
+    return {
+        "term": term,
+        "definition": definition,
+        "synonyms": _split_list(record.get("synonyms")),
+        "abbreviation": str(record.get("abbreviation") or "").strip() or None,
+    }
+
+
+def load_glossary(path: str) -> GlossaryIndex:
+    """Load an ISTQB glossary export (JSON list or CSV with term/definition columns)"""
+    if not os.path.exists(path):
+        print(f"Warning: glossary file not found at {path}, glossary lookups are disabled")
+        return GlossaryIndex()
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith(".csv"):
+            records = list(csv.DictReader(f))
+        else:
+            data = json.load(f)
+            records = data.get("terms", []) if isinstance(data, dict) else data
+    index = GlossaryIndex(entry for entry in map(_entry_from_record, records) if entry)
+    print(f"Loaded {len(index)} glossary terms from {path}")
+    return index
+
+
+def find_definition_request(message: str) -> Optional[str]:
+    """The term asked about in 'what is X' / 'define X' questions"""
+    text = message.strip().lstrip("¿").rstrip("?.! ")
+    for pattern in DEFINITION_PATTERNS:
+        match = pattern.match(text)
+        if match:
+            return TRAILING_NOISE.sub("", match.group("term")).strip() or None
+    return None
+
+
+def answer_glossary_definition(db: Session, message: str, certification_code: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Answer 'what is X' for glossary terms directly, in the same shape as generate_response"""
+    term = find_definition_request(message)
+    if not term:
+        return None
+    match = get_glossary_index().lookup(term)
+    if not match:
+        return None
+    entry, distance = match
+    sections = [f"{entry['term']}\n{entry['definition']}"]
+    if distance:
+        sections.insert(0, f"Showing the ISTQB definition of \"{entry['term']}\".")
+    if entry.get("synonyms"):
+        sections.append("Synonyms\n" + ", ".join(entry["synonyms"]))
+    sections.append("Reference\nISTQB Glossary")
+    source = {"document_type": "glossary", "title": "ISTQB Glossary", "term": entry["term"]}
+    return direct_response("\n\n".join(sections), [source])
+
+
+# Global instance
+_glossary_index = None
+
+def get_glossary_index() -> GlossaryIndex:
+    """Get the global glossary index (loaded once per process)"""
+    global _glossary_index
+    if _glossary_index is None:
+        _glossary_index = load_glossary(GLOSSARY_PATH)
+    return _glossary_index
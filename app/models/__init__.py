@@ -2,3 +2,6 @@ from app.models.user import User
 from app.models.chat import ChatMessage
 from app.models.certification import Certification
 from app.models.document import Document
+from app.models.exam import ExamQuestion
+from app.models.quiz import QuizQuestion
+from app.models.syllabus import BusinessOutcome, LearningObjective, SyllabusKeyword
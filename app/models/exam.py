@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database.connection import Base
+
+class ExamQuestion(Base):
+    __tablename__ = "exam_questions"
+    __table_args__ = (
+        UniqueConstraint("certification_code", "exam_label", "question_number", name="uq_exam_question"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    certification_code = Column(String, index=True, nullable=False)
+    exam_label = Column(String, nullable=False)  # e.g. "A" for "Sample Exam set A"
+    question_number = Column(String, nullable=False)  # e.g. "17" or "A7" for additional questions
+    question_text = Column(Text)
+    options = Column(Text)  # JSON list of {"letter": "a", "text": "..."}
+    correct_answer = Column(String)  # e.g. "b" or "a, e"
+    rationale = Column(Text)
+    learning_objective = Column(String)  # e.g. "FL-3.2.4"
+    k_level = Column(String)  # e.g. "K2"
+    points = Column(Integer)
+    question_document_id = Column(Integer, ForeignKey("documents.id"), nullable=True)
+    answer_document_id = Column(Integer, ForeignKey("documents.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ExamQuestion(certification='{self.certification_code}', exam='{self.exam_label}', number='{self.question_number}')>"
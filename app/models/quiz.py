@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.sql import func
+from app.database.connection import Base
+
+class QuizQuestion(Base):
+    __tablename__ = "quiz_questions"
+    __table_args__ = (
+        Index("ix_quiz_pool", "certification_code", "chapter", "times_served"),
+        # The same question may be pooled for several certifications, once each
+        Index("uq_quiz_certification_hash", "certification_code", "content_hash", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    certification_code = Column(String, nullable=False)
+    chapter = Column(String)  # e.g. "2"; None when the learning objective is unknown
+    question_text = Column(Text, nullable=False)
+    options = Column(Text, nullable=False)  # JSON list of {"letter": "a", "text": "..."}
+    correct_answer = Column(String, nullable=False)  # e.g. "b" or "a, e"
+    explanation = Column(Text)
+    learning_objective = Column(String)
+    k_level = Column(String)
+    source = Column(String, nullable=False, default="ai_generated")  # "ai_generated" or "official"
+    content_hash = Column(String, index=True, nullable=False)
+    times_served = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<QuizQuestion(certification='{self.certification_code}', chapter='{self.chapter}', source='{self.source}')>"
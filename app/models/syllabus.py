@@ -0,0 +1,57 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database.connection import Base
+
+class BusinessOutcome(Base):
+    __tablename__ = "business_outcomes"
+    __table_args__ = (
+        UniqueConstraint("certification_code", "code", name="uq_business_outcome"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    certification_code = Column(String, index=True, nullable=False)
+    code = Column(String, nullable=False)  # e.g. "FL-BO1", "GenAI-BO3"
+    description = Column(Text, nullable=False)  # verbatim from the syllabus
+    position = Column(Integer, nullable=False)  # order in the syllabus table
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<BusinessOutcome(certification='{self.certification_code}', code='{self.code}')>"
+
+class LearningObjective(Base):
+    __tablename__ = "learning_objectives"
+    __table_args__ = (
+        UniqueConstraint("certification_code", "code", name="uq_learning_objective"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    certification_code = Column(String, index=True, nullable=False)
+    code = Column(String, nullable=False)  # e.g. "FL-1.2.3"
+    chapter = Column(String, index=True, nullable=False)  # e.g. "1"
+    section = Column(String)  # e.g. "1.2"
+    k_level = Column(String, nullable=False)  # e.g. "K2"
+    description = Column(Text, nullable=False)
+    position = Column(Integer, nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<LearningObjective(certification='{self.certification_code}', code='{self.code}')>"
+
+class SyllabusKeyword(Base):
+    __tablename__ = "syllabus_keywords"
+    __table_args__ = (
+        UniqueConstraint("certification_code", "chapter", "term", name="uq_syllabus_keyword"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    certification_code = Column(String, index=True, nullable=False)
+    chapter = Column(String, nullable=False)
+    term = Column(String, nullable=False)
+    position = Column(Integer, nullable=False)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<SyllabusKeyword(certification='{self.certification_code}', term='{self.term}')>"
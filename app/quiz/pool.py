@@ -0,0 +1,372 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.config import (
+    QUIZ_POOL_TARGET, QUIZ_POOL_LOW_WATERMARK, QUIZ_GENERATION_BATCH, QUIZ_MAX_SERVES, QUIZ_GENERATION_MODEL
+)
+from app.database.connection import SessionLocal
+from app.models.exam import ExamQuestion
+from app.models.quiz import QuizQuestion
+from app.utils.admission import estimate_tokens, get_admission_controller
+from app.utils.resilience import get_resilient_caller
+from app.utils.responses import direct_response
+
+MAX_QUIZ_QUESTIONS = 40
+# "FL-2.1.3" -> chapter "2"
+LO_CHAPTER_PATTERN = re.compile(r"-(?P<chapter>\d+)\.")
+QUIZ_NOUN = r"(?:quiz(?:zes)?|mock exams?|practice (?:exams?|questions|tests?)|cuestionarios?|simulacros?|ex[aá]men(?:es)? de pr[aá]ctica|preguntas de pr[aá]ctica)"
+QUIZ_VERB = (r"(?:give|make|create|generate|start|run|prepare|send|write|want|(?:'d|would) like|let'?s do|"
+             r"dame|hazme|haz|genera|gen[eé]rame|crea|cr[eé]ame|prepara|prep[aá]rame|ponme|quiero|inicia|empieza|hagamos)")
+# Only requests for a quiz count ("give me a quiz on chapter 2", "quiz me", "hazme un simulacro"),
+# not questions that merely mention one ("how many points do I need to pass the mock exam?")
+QUIZ_REQUEST_PATTERN = re.compile(
+    rf"\b{QUIZ_VERB}\s+(?:(?:me|us|nos)\s+)?(?:(?:a|an|another|one|some|un|una|otro|otra|\d{{1,2}})\s+)?(?:[\w-]+\s+){{0,2}}?{QUIZ_NOUN}\b"
+    r"|\bquiz\s+(?:me|us)\b",
+    re.IGNORECASE,
+)
+CHAPTER_PATTERN = re.compile(r"\b(?:chapter|cap[ií]tulo)\s+(?P<chapter>\d+)\b", re.IGNORECASE)
+COUNT_PATTERN = re.compile(r"\b(?P<count>\d{1,2})\s+(?:questions|preguntas)\b", re.IGNORECASE)
+
+GENERATION_PROMPT = """You write ISTQB-style multiple choice practice questions.
+
+Write {count} new questions for the {certification} certification{chapter_scope}, based only on the syllabus excerpts below.
+Each question has four options (a-d) and exactly one correct answer, tests one learning objective and follows the style of the official sample exams.
+
+Return a JSON object: {{"questions": [{{"question": "...", "options": {{"a": "...", "b": "...", "c": "...", "d": "..."}}, "correct_answer": "a", "explanation": "...", "learning_objective": "FL-1.1.1", "k_level": "K2"}}]}}
+
+Syllabus excerpts:
+{context}
+"""
+
+
+def chapter_for(learning_objective: Optional[str]) -> Optional[str]:
+    match = LO_CHAPTER_PATTERN.search(learning_objective or "")
+    return match.group("chapter") if match else None
+
+
+def question_hash(question_text: str, options: List[Dict[str, str]]) -> str:
+    """Identity of a question: whitespace/case-normalized stem and option texts"""
+    parts = [question_text] + [option["text"] for option in options]
+    normalized = "\n".join(" ".join(part.lower().split()) for part in parts)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def parse_generated_questions(text: str) -> List[Dict[str, Any]]:
+    """Validate the model's JSON output, dropping malformed questions"""
+    try:
+        items = json.loads(text).get("questions", [])
+    except (ValueError, AttributeError):
+        return []
+    questions = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        options = item.get("options")
+        if isinstance(options, dict):
+            options = [{"letter": letter.lower(), "text": str(value)} for letter, value in sorted(options.items())]
+        answer = str(item.get("correct_answer", "")).strip().lower().rstrip(")")
+        if not item.get("question") or not isinstance(options, list) or len(options) < 3:
+            continue
+        if answer not in {option.get("letter") for option in options}:
+            continue
+        questions.append({
+            "question_text": str(item["question"]).strip(),
+            "options": options,
+            "correct_answer": answer,
+            "explanation": item.get("explanation"),
+            "learning_objective": item.get("learning_objective"),
+            "k_level": item.get("k_level"),
+        })
+    return questions
+
+
+class QuizGenerator:
+    """Generates pool questions with the LLM, grounded on the certification's syllabus chunks"""
+
+    def __init__(self, model: str = QUIZ_GENERATION_MODEL):
+        from app.chat.openai_client import OpenAIClient
+        from app.rag.provider import get_vector_store_manager
+        self.client = OpenAIClient().client
+        self.vector_store = get_vector_store_manager()
+        self.model = model
+
+    def _context(self, certification_code: str, chapter: Optional[str]) -> str:
+        query = f"chapter {chapter} learning objectives" if chapter else "learning objectives"
+        docs = self.vector_store.retrieve(query, certification_code=certification_code, k=8)
+        if chapter:
+            in_chapter = [doc for doc in docs if str(doc.metadata.get("section", "")).split(".")[0] == chapter]
+            docs = in_chapter or docs
+        return "\n\n".join(doc.page_content for doc in docs)
+
+    def generate(self, certification_code: str, chapter: Optional[str], count: int) -> List[Dict[str, Any]]:
+        prompt = GENERATION_PROMPT.format(
+            count=count,
+            certification=certification_code,
+            chapter_scope=f", chapter {chapter}" if chapter else "",
+            context=self._context(certification_code, chapter),
+        )
+        max_tokens = min(4000, 350 * count)
+
+        # Same protections as chat completions: deadline, retries and breaker, within the host-wide OpenAI budget
+        def create(timeout: float):
+            deadline = time.monotonic() + timeout
+            with get_admission_controller().admit("chat", "quiz-pool", estimate_tokens([prompt], max_tokens), timeout) as lease:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    response_format={"type": "json_object"},
+                    temperature=0.8,
+                    max_tokens=max_tokens,
+                    timeout=max(deadline - time.monotonic(), 0.1),
+                )
+                lease["used_tokens"] = response.usage.total_tokens if response.usage else None
+                return response
+
+        response = get_resilient_caller("quiz").call(create)
+        return parse_generated_questions(response.choices[0].message.content)
+
+
+def _pool_query(db: Session, certification_code: str, chapter: Optional[str] = None):
+    query = db.query(QuizQuestion)\
+        .filter(QuizQuestion.certification_code == certification_code)\
+        .filter(QuizQuestion.times_served < QUIZ_MAX_SERVES)
+    if chapter:
+        query = query.filter(QuizQuestion.chapter == chapter)
+    return query
+
+
+def available_count(db: Session, certification_code: str, chapter: Optional[str] = None) -> int:
+    return _pool_query(db, certification_code, chapter).count()
+
+
+def pool_stats(db: Session, certification_code: str) -> Dict[str, int]:
+    """Available (not yet retired) questions per chapter"""
+    rows = db.query(QuizQuestion.chapter, func.count(QuizQuestion.id))\
+        .filter(QuizQuestion.certification_code == certification_code)\
+        .filter(QuizQuestion.times_served < QUIZ_MAX_SERVES)\
+        .group_by(QuizQuestion.chapter)\
+        .all()
+    return {chapter or "unknown": count for chapter, count in rows}
+
+
+def store_questions(db: Session, certification_code: str, questions: List[Dict[str, Any]], source: str = "ai_generated", chapter: Optional[str] = None) -> int:
+    """Insert new questions into the pool, skipping ones already stored; returns the number added"""
+    hashes = {question_hash(q["question_text"], q["options"]): q for q in questions}
+    existing = {
+        row.content_hash for row in db.query(QuizQuestion.content_hash)
+        .filter(QuizQuestion.certification_code == certification_code)
+        .filter(QuizQuestion.content_hash.in_(list(hashes)))
+    }
+    rows = [
+        QuizQuestion(
+            certification_code=certification_code,
+            chapter=chapter_for(q.get("learning_objective")) or chapter,
+            question_text=q["question_text"],
+            options=json.dumps(q["options"], ensure_ascii=False),
+            correct_answer=q["correct_answer"],
+            explanation=q.get("explanation"),
+            learning_objective=q.get("learning_objective"),
+            k_level=q.get("k_level"),
+            source=source,
+            content_hash=content_hash,
+        )
+        for content_hash, q in hashes.items() if content_hash not in existing
+    ]
+    db.add_all(rows)
+    try:
+        db.commit()
+        return len(rows)
+    except IntegrityError:
+        db.rollback()
+    # Another worker stored some of the same questions first; keep the rest, one row at a time
+    added = 0
+    for row in rows:
+        db.add(row)
+        try:
+            db.commit()
+            added += 1
+        except IntegrityError:
+            db.rollback()
+    return added
+
+
+def seed_official_questions(db: Session, certification_code: str) -> int:
+    """Copy answered official sample exam questions into the pool"""
+    questions = [
+        {
+            "question_text": row.question_text,
+            "options": json.loads(row.options or "[]"),
+            "correct_answer": row.correct_answer,
+            "explanation": row.rationale,
+            "learning_objective": row.learning_objective,
+            "k_level": row.k_level,
+        }
+        for row in db.query(ExamQuestion).filter(ExamQuestion.certification_code == certification_code)
+        if row.question_text and row.correct_answer and row.correct_answer != "N/A"
+    ]
+    return store_questions(db, certification_code, questions, source="official") if questions else 0
+
+
+def draw_quiz(db: Session, certification_code: str, chapter: Optional[str] = None, num_questions: int = 10) -> List[QuizQuestion]:
+    """Random quiz from the pool, preferring the least served questions"""
+    questions = _pool_query(db, certification_code, chapter)\
+        .order_by(QuizQuestion.times_served, func.random())\
+        .limit(min(num_questions, MAX_QUIZ_QUESTIONS))\
+        .all()
+    if questions:
+        db.query(QuizQuestion)\
+            .filter(QuizQuestion.id.in_([q.id for q in questions]))\
+            .update({QuizQuestion.times_served: QuizQuestion.times_served + 1}, synchronize_session=False)
+        db.commit()
+    random.shuffle(questions)
+    return questions
+
+
+def quiz_question_to_dict(question: QuizQuestion) -> Dict[str, Any]:
+    return {
+        "id": question.id,
+        "question": question.question_text,
+        "options": json.loads(question.options),
+        "correct_answer": question.correct_answer,
+        "explanation": question.explanation,
+        "learning_objective": question.learning_objective,
+        "k_level": question.k_level,
+        "source": question.source,
+    }
+
+
+class QuizPool:
+    """Serves quizzes from the stored pool and refills it in the background when it runs low"""
+
+    def __init__(self, generator_factory: Callable[[], Any] = QuizGenerator, session_factory: Callable[[], Session] = SessionLocal):
+        self.generator_factory = generator_factory
+        self.session_factory = session_factory
+        self._generator = None
+        self._refilling: set = set()
+        self._tasks: set = set()
+
+    @property
+    def generator(self):
+        if self._generator is None:
+            self._generator = self.generator_factory()
+        return self._generator
+
+    def draw(self, db: Session, certification_code: str, chapter: Optional[str] = None, num_questions: int = 10) -> Tuple[List[QuizQuestion], bool]:
+        """Return (questions, refill_scheduled)"""
+        questions = draw_quiz(db, certification_code, chapter, num_questions)
+        refill_scheduled = False
+        if available_count(db, certification_code, chapter) < QUIZ_POOL_LOW_WATERMARK:
+            refill_scheduled = self.schedule_refill(certification_code, chapter)
+        return questions, refill_scheduled
+
+    def schedule_refill(self, certification_code: str, chapter: Optional[str] = None) -> bool:
+        """Start a background refill unless one is already running for this pool"""
+        key = (certification_code, chapter)
+        if key in self._refilling:
+            return False
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        self._refilling.add(key)
+        task = loop.create_task(self._refill_in_background(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _refill_in_background(self, key: Tuple[str, Optional[str]]):
+        try:
+            added = await asyncio.to_thread(self.refill, *key)
+            print(f"Quiz pool {key[0]} chapter {key[1] or 'all'}: added {added} questions")
+        except Exception as e:
+            print(f"Warning: quiz pool refill failed for {key[0]} chapter {key[1] or 'all'}: {e}")
+        finally:
+            self._refilling.discard(key)
+
+    async def wait_for_refills(self):
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def refill(self, certification_code: str, chapter: Optional[str] = None) -> int:
+        """Top the pool up to QUIZ_POOL_TARGET available questions (blocking)"""
+        db = self.session_factory()
+        try:
+            added = seed_official_questions(db, certification_code)
+            available = available_count(db, certification_code, chapter)
+            # Bounded even if every batch lands only a question or two in the requested pool
+            for _ in range(2 * -(-QUIZ_POOL_TARGET // QUIZ_GENERATION_BATCH)):
+                missing = QUIZ_POOL_TARGET - available
+                if missing <= 0:
+                    break
+                batch = self.generator.generate(certification_code, chapter, min(QUIZ_GENERATION_BATCH, missing))
+                added += store_questions(db, certification_code, batch, chapter=chapter)
+                # Recounted every batch, so a refill running in another worker fills the same gap only once
+                now_available = available_count(db, certification_code, chapter)
+                if now_available <= available:
+                    # Nothing new landed in this pool (repeats, or questions filed under other chapters); stop paying
+                    break
+                available = now_available
+            return added
+        finally:
+            db.close()
+
+
+def find_quiz_request(message: str) -> Optional[Tuple[Optional[str], int]]:
+    """Detect quiz / mock exam requests; returns (chapter or None, number of questions)"""
+    if not QUIZ_REQUEST_PATTERN.search(message):
+        return None
+    chapter = CHAPTER_PATTERN.search(message)
+    count = COUNT_PATTERN.search(message)
+    num_questions = min(int(count.group("count")), MAX_QUIZ_QUESTIONS) if count else 10
+    return (chapter.group("chapter") if chapter else None), max(1, num_questions)
+
+
+def format_quiz(questions: List[QuizQuestion], certification_code: str, chapter: Optional[str]) -> str:
+    """Plain-text quiz following the assistant's formatting rules, answers at the end"""
+    scope = f"{certification_code}, chapter {chapter}" if chapter else certification_code
+    sections = [f"Practice quiz ({scope})"]
+    for number, question in enumerate(questions, 1):
+        origin = "official sample exam question" if question.source == "official" else "AI-generated question"
+        options = "\n".join(f"{option['letter']}) {option['text']}" for option in json.loads(question.options))
+        sections.append(f"{number}. {question.question_text} ({origin})\n{options}")
+    answers = []
+    for number, question in enumerate(questions, 1):
+        reference = f" ({question.learning_objective})" if question.learning_objective else ""
+        explanation = f" {question.explanation}" if question.explanation else ""
+        answers.append(f"{number}. {question.correct_answer}{reference}.{explanation}")
+    sections.append("Answers\n" + "\n".join(answers))
+    return "\n\n".join(sections)
+
+
+def answer_quiz_request(db: Session, message: str, certification_code: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Serve 'give me a quiz on chapter 2' from the pool, in the same shape as generate_response"""
+    request = find_quiz_request(message)
+    if not request or not certification_code:
+        return None
+    chapter, num_questions = request
+    pool = get_quiz_pool()
+    if available_count(db, certification_code, chapter) < num_questions:
+        # Not enough pooled questions yet; let the LLM answer this one while the pool fills up
+        pool.schedule_refill(certification_code, chapter)
+        return None
+    questions, _ = pool.draw(db, certification_code, chapter, num_questions)
+    source = {"certification_code": certification_code, "document_type": "quiz_pool", "title": "Quiz pool"}
+    return direct_response(format_quiz(questions, certification_code, chapter), [source])
+
+
+# Global instance
+_quiz_pool = None
+
+def get_quiz_pool() -> QuizPool:
+    """Get the global quiz pool instance"""
+    global _quiz_pool
+    if _quiz_pool is None:
+        _quiz_pool = QuizPool()
+    return _quiz_pool
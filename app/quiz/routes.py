@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database.connection import get_db
+from app.models.user import User
+from app.models.certification import Certification
+from app.schemas.quiz import QuizResponse, QuizPoolStats
+from app.auth.oauth2 import get_current_active_user
+from app.auth.role_middleware import require_admin_checker
+from app.quiz.pool import get_quiz_pool, pool_stats, quiz_question_to_dict, MAX_QUIZ_QUESTIONS
+
+router = APIRouter(prefix="/quiz", tags=["quiz"])
+
+def _get_certification(db: Session, certification_code: str) -> Certification:
+    certification = db.query(Certification).filter(Certification.code == certification_code).first()
+    if not certification:
+        raise HTTPException(status_code=404, detail="Certification not found")
+    return certification
+
+@router.get("/{certification_code}", response_model=QuizResponse)
+async def get_quiz(
+    certification_code: str,
+    chapter: Optional[str] = Query(None, description="Syllabus chapter number, e.g. '2'"),
+    num_questions: int = Query(10, ge=1, le=MAX_QUIZ_QUESTIONS),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Randomized quiz served from the pre-generated pool"""
+    _get_certification(db, certification_code)
+    questions, refill_scheduled = get_quiz_pool().draw(db, certification_code, chapter, num_questions)
+    if not questions:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Quiz pool for {certification_code} is being generated, try again shortly"
+        )
+    return QuizResponse(
+        certification_code=certification_code,
+        chapter=chapter,
+        questions=[quiz_question_to_dict(q) for q in questions],
+        refill_scheduled=refill_scheduled
+    )
+
+@router.get("/{certification_code}/pool", response_model=QuizPoolStats)
+async def get_quiz_pool_stats(
+    certification_code: str,
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin_checker)
+):
+    """Available questions per chapter"""
+    _get_certification(db, certification_code)
+    return QuizPoolStats(certification_code=certification_code, available_by_chapter=pool_stats(db, certification_code))
+
+@router.post("/{certification_code}/pool/refill", response_model=QuizPoolStats)
+async def refill_quiz_pool(
+    certification_code: str,
+    chapters: List[str] = Query([], description="Chapters to pre-generate; empty for the whole syllabus"),
+    db: Session = Depends(get_db),
+    admin_user: User = Depends(require_admin_checker)
+):
+    """Pre-generate questions in the background (e.g. ahead of exam dates)"""
+    _get_certification(db, certification_code)
+    pool = get_quiz_pool()
+    scheduled = [
+        chapter or "all"
+        for chapter in (chapters or [None])
+        if pool.schedule_refill(certification_code, chapter)
+    ]
+    return QuizPoolStats(
+        certification_code=certification_code,
+        available_by_chapter=pool_stats(db, certification_code),
+        refills_scheduled=scheduled
+    )
@@ -0,0 +1,104 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunk_owners (
+    collection TEXT NOT NULL,
+    chunk_id TEXT NOT NULL,
+    document_id TEXT NOT NULL DEFAULT '',
+    certification_code TEXT,
+    document_type TEXT,
+    PRIMARY KEY (collection, chunk_id, document_id)
+);
+CREATE INDEX IF NOT EXISTS ix_chunk_owners_document ON chunk_owners (document_id);
+CREATE INDEX IF NOT EXISTS ix_chunk_owners_filter ON chunk_owners (collection, certification_code, document_type);
+CREATE TABLE IF NOT EXISTS chunk_index_meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# (chunk_id, certification_code, document_id, document_type)
+OwnerRow = Tuple[str, Optional[str], Optional[str], Optional[str]]
+
+
+class ChunkIndex:
+    """SQLite side index from certification/document to chunk ids, stored next to the Chroma files.
+
+    Chroma stays the source of truth for chunk metadata; this index only answers
+    "which chunk ids belong to X" so deletes and document-scoped searches can work
+    by id instead of scanning metadata.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def is_built(self) -> bool:
+        row = self._conn.execute("SELECT value FROM chunk_index_meta WHERE key = 'built'").fetchone()
+        return row is not None
+
+    def mark_built(self):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO chunk_index_meta (key, value) VALUES ('built', '1')")
+
+    def add(self, collection: str, rows: Iterable[OwnerRow]):
+        params = [
+            (collection, chunk_id, str(document_id) if document_id is not None else "", certification_code, document_type)
+            for chunk_id, certification_code, document_id, document_type in rows
+        ]
+        if not params:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO chunk_owners (collection, chunk_id, document_id, certification_code, document_type) "
+                "VALUES (?, ?, ?, ?, ?)",
+                params
+            )
+
+    def chunks_for_document(self, document_id: str) -> Dict[str, List[str]]:
+        """Chunk ids owned by a document, grouped by collection"""
+        grouped: Dict[str, List[str]] = {}
+        for collection, chunk_id in self._conn.execute(
+            "SELECT collection, chunk_id FROM chunk_owners WHERE document_id = ?", (str(document_id),)
+        ):
+            grouped.setdefault(collection, []).append(chunk_id)
+        return grouped
+
+    def chunk_ids(self, collection: str, certification_code: Optional[str] = None,
+                  document_id: Optional[str] = None, document_type: Optional[str] = None) -> List[str]:
+        """Chunk ids in a collection matching the given owner fields"""
+        sql = "SELECT DISTINCT chunk_id FROM chunk_owners WHERE collection = ?"
+        params: list = [collection]
+        for column, value in (("certification_code", certification_code), ("document_id", document_id), ("document_type", document_type)):
+            if value is not None:
+                sql += f" AND {column} = ?"
+                params.append(str(value))
+        return [row[0] for row in self._conn.execute(sql, params)]
+
+    def remove_document(self, document_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunk_owners WHERE document_id = ?", (str(document_id),))
+
+    def remove_collection(self, collection: str, certification_code: Optional[str] = None):
+        sql = "DELETE FROM chunk_owners WHERE collection = ?"
+        params: list = [collection]
+        if certification_code is not None:
+            sql += " AND certification_code = ?"
+            params.append(certification_code)
+        with self._lock, self._conn:
+            self._conn.execute(sql, params)
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunk_owners")
+            self._conn.execute("DELETE FROM chunk_index_meta")
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(DISTINCT collection || '/' || chunk_id) FROM chunk_owners").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,182 @@
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from langchain_core.documents import Document
+
+# "2.2.2 Test Types", "1.1.2. Testing and Debugging" (CTFL v4) or
+# "1 Introduction to Generative AI for Software Testing – 100 minutes"
+HEADING_PATTERN = re.compile(r"^(?P<number>\d{1,2}(?:\.\d{1,2}){1,3}\.?|\d{1,2})\s+(?P<title>[A-Z][^\n]{2,200})$")
+# "GenAI-1.1.3 (K2) Distinguish between ...", "FL-2.1.5 (K2) ...", "AI-1.1.1 K2 Describe ..."
+LEARNING_OBJECTIVE_PATTERN = re.compile(r"^(?P<code>[A-Za-z]+-(?P<number>\d+(?:\.\d+){1,3}))\s*\(?(?P<level>K\d)\)?\s+(?P<text>.*)$")
+# Table of contents entries end in dotted leaders and a page number
+TOC_LINE_PATTERN = re.compile(r"\.{5,}\s*\d+\s*$|(?:\.\s){5,}")
+PAGE_NUMBER_PATTERN = re.compile(r"\bPage\s+\d+\s+of\s+\d+\b", re.IGNORECASE)
+
+
+def _normalize_line(line: str) -> str:
+    # Page numbers are matched separately, so other digits must match exactly
+    # (otherwise "Question #4" on many pages would look like a running header)
+    return " ".join(line.split())
+
+
+def detect_boilerplate(page_texts: List[str]) -> set:
+    """Normalized lines repeated on most of the given pages (running headers/footers)"""
+    if len(page_texts) < 3:
+        return set()
+    counts = Counter()
+    for text in page_texts:
+        counts.update({_normalize_line(line) for line in text.splitlines() if line.strip()})
+    threshold = max(2, len(page_texts) // 2)
+    return {line for line, count in counts.items() if count >= threshold}
+
+
+def is_boilerplate(line: str, boilerplate: set) -> bool:
+    return _normalize_line(line) in boilerplate or PAGE_NUMBER_PATTERN.search(line) is not None
+
+
+def is_toc_page(text: str, min_entries: int = 5) -> bool:
+    """Table of contents pages are recognised by their dotted-leader entries"""
+    return sum(1 for line in text.splitlines() if TOC_LINE_PATTERN.search(line)) >= min_entries
+
+
+def clean_lines(page_texts: List[str], boilerplate_sample_pages: int = 6) -> List[str]:
+    """Flatten page texts into content lines without running headers, footers or table of contents"""
+    boilerplate = detect_boilerplate(page_texts[:boilerplate_sample_pages])
+    lines = []
+    for text in page_texts:
+        if is_toc_page(text):
+            continue
+        for raw_line in text.splitlines():
+            line = " ".join(raw_line.split())
+            if line and not is_boilerplate(line, boilerplate):
+                lines.append(line)
+    return lines
+
+
+class SyllabusSplitter:
+    """Heading-aware splitter for ISTQB syllabi.
+
+    Chunks never cross a numbered section boundary, always start with their
+    section heading, and carry section, section_title, page and (when the
+    syllabus defines one) learning_objective / k_level metadata.
+    """
+
+    def __init__(self, chunk_size: int = 2000, boilerplate_sample_pages: int = 6, toc_min_entries: int = 5):
+        self.chunk_size = chunk_size
+        self.boilerplate_sample_pages = boilerplate_sample_pages
+        self.toc_min_entries = toc_min_entries
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        return list(self.iter_chunks(documents))
+
+    def iter_chunks(self, pages: Iterable[Document]) -> Iterator[Document]:
+        """Yield chunks as soon as each section is complete (pages may be a lazy iterator)"""
+        pages = iter(pages)
+        sample = []
+        for page in pages:
+            sample.append(page)
+            if len(sample) >= self.boilerplate_sample_pages:
+                break
+        boilerplate = detect_boilerplate([page.page_content for page in sample])
+
+        state = _SectionState()
+        for page in _chain(sample, pages):
+            page_number = page.metadata.get("page", 0)
+            if is_toc_page(page.page_content, self.toc_min_entries):
+                # Table of contents pages would otherwise produce spurious headings
+                continue
+            for raw_line in page.page_content.splitlines():
+                line = " ".join(raw_line.split())
+                if not line or is_boilerplate(line, boilerplate):
+                    continue
+                if TOC_LINE_PATTERN.search(line):
+                    continue
+
+                lo_match = LEARNING_OBJECTIVE_PATTERN.match(line)
+                if lo_match:
+                    state.learning_objectives.setdefault(lo_match.group("number"), (lo_match.group("code"), lo_match.group("level")))
+
+                heading = HEADING_PATTERN.match(line)
+                if heading and state.accepts(heading.group("number").rstrip(".")):
+                    yield from self._flush(state)
+                    state.start(heading.group("number").rstrip("."), heading.group("title").strip(), page_number, page.metadata)
+                    continue
+
+                state.add_line(line, page_number, page.metadata)
+        yield from self._flush(state)
+
+    def _flush(self, state: "_SectionState") -> Iterator[Document]:
+        if not state.lines:
+            # A heading directly followed by another heading is carried into the next chunk
+            if state.heading:
+                state.carry = f"{state.carry}{state.heading}\n"
+            return
+        heading = f"{state.carry}{state.heading}\n" if state.heading else state.carry
+        state.carry = ""
+
+        metadata = dict(state.base_metadata)
+        if state.section:
+            metadata["section"] = state.section
+            metadata["section_title"] = state.title
+            objective = state.learning_objective()
+            if objective:
+                metadata["learning_objective"], metadata["k_level"] = objective
+
+        body: List[str] = []
+        size = 0
+        start_page = state.lines[0][1]
+        for line, page_number in state.lines:
+            if body and size + len(line) + 1 > self.chunk_size - len(heading):
+                yield Document(page_content=heading + "\n".join(body), metadata=dict(metadata, page=start_page))
+                body, size, start_page = [], 0, page_number
+            body.append(line)
+            size += len(line) + 1
+        if body:
+            yield Document(page_content=heading + "\n".join(body), metadata=dict(metadata, page=start_page))
+        state.lines = []
+
+
+class _SectionState:
+    def __init__(self):
+        self.section: Optional[str] = None
+        self.title = ""
+        self.heading = ""
+        self.carry = ""
+        self.lines: List[Tuple[str, Any]] = []
+        self.base_metadata: Dict[str, Any] = {}
+        self.learning_objectives: Dict[str, Tuple[str, str]] = {}
+
+    def accepts(self, number: str) -> bool:
+        """Reject numbered lines that cannot be the next heading (e.g. list items or stray figures)"""
+        chapter = int(number.split(".")[0])
+        if self.section is None:
+            return True
+        current_chapter = int(self.section.split(".")[0])
+        return current_chapter <= chapter <= current_chapter + 1
+
+    def start(self, number: str, title: str, page_number: Any, metadata: Dict[str, Any]):
+        self.section = number
+        self.title = title
+        self.heading = f"{number} {title}"
+        self.base_metadata = dict(metadata)
+        self.lines = []
+
+    def add_line(self, line: str, page_number: Any, metadata: Dict[str, Any]):
+        if not self.base_metadata:
+            self.base_metadata = dict(metadata)
+        self.lines.append((line, page_number))
+
+    def learning_objective(self) -> Optional[Tuple[str, str]]:
+        """Learning objective(s) for the current section as (codes, highest K-level)"""
+        if self.section in self.learning_objectives:
+            return self.learning_objectives[self.section]
+        # Sections above LO granularity (e.g. "1.1" for "AI-1.1.1") collect their nested objectives
+        nested = [lo for number, lo in self.learning_objectives.items() if number.startswith(self.section + ".")]
+        if not nested:
+            return None
+        return ", ".join(code for code, _ in nested), max(level for _, level in nested)
+
+
+def _chain(first: List[Document], rest: Iterator[Document]) -> Iterator[Document]:
+    yield from first
+    yield from rest
@@ -0,0 +1,161 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+SECTION_PATTERN = re.compile(r"(\d+(?:\.\d+)*)")
+
+
+def load_eval_set(csv_path: str) -> List[Dict[str, Any]]:
+    """Load evaluation rows (question, expected answer, source section) from CSV"""
+    cases = []
+    with open(csv_path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            cases.append({
+                "number": row.get("N°"),
+                "question": row["Pregunta"],
+                "expected": row["Respuesta esperada"],
+                "source": row.get("Fuente", ""),
+                "section": parse_section(row.get("Fuente", "")),
+            })
+    return cases
+
+
+def parse_section(source: str) -> Optional[str]:
+    """Extract a section number like '1.1.4' from a 'Fuente' value such as 'Sección 1.1.4'"""
+    match = SECTION_PATTERN.search(source or "")
+    return match.group(1) if match else None
+
+
+class AnswerCache:
+    """JSON-backed cache of model answers keyed by (question, index version)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, str] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._entries = json.load(f)
+
+    @staticmethod
+    def make_key(question: str, index_version: str) -> str:
+        return hashlib.sha256(f"{index_version}\x00{question}".encode("utf-8")).hexdigest()
+
+    def get(self, question: str, index_version: str) -> Optional[str]:
+        with self._lock:
+            return self._entries.get(self.make_key(question, index_version))
+
+    def set(self, question: str, index_version: str, answer: str) -> None:
+        with self._lock:
+            self._entries[self.make_key(question, index_version)] = answer
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+
+
+def collect_answers(
+    cases: List[Dict[str, Any]],
+    ask: Callable[[Dict[str, Any]], str],
+    index_version: str,
+    cache: Optional[AnswerCache] = None,
+    max_workers: int = 8
+) -> List[str]:
+    """Answer every case concurrently, reusing cached answers for the same index version"""
+    cache = cache or AnswerCache()
+
+    def answer(case: Dict[str, Any]) -> str:
+        cached = cache.get(case["question"], index_version)
+        if cached is not None:
+            return cached
+        result = ask(case)
+        cache.set(case["question"], index_version, result)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        answers = list(executor.map(answer, cases))
+    cache.save()
+    return answers
+
+
+def chunk_matches_section(doc: Any, section: str) -> bool:
+    """Check whether a retrieved chunk belongs to (or is nested under) the expected section"""
+    chunk_section = str(doc.metadata.get("section") or "")
+    if chunk_section:
+        return chunk_section == section or chunk_section.startswith(section + ".")
+    # Fall back to looking for the section heading inside the chunk text
+    return re.search(rf"(?m)^\s*{re.escape(section)}(?:\.\d+)*\s", doc.page_content) is not None
+
+
+def retrieval_recall_at_k(
+    cases: List[Dict[str, Any]],
+    retrieve: Callable[[str, int], List[Any]],
+    k: int = 5,
+    max_workers: int = 8
+) -> Dict[str, Any]:
+    """Compute recall@k of the expected 'Fuente' section over the retriever alone"""
+    scored = [case for case in cases if case["section"]]
+
+    def hit(case: Dict[str, Any]) -> bool:
+        docs = retrieve(case["question"], k)
+        return any(chunk_matches_section(doc, case["section"]) for doc in docs[:k])
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        hits = list(executor.map(hit, scored))
+
+    return {
+        "k": k,
+        "evaluated": len(scored),
+        "hits": int(sum(hits)),
+        "recall": float(np.mean(hits)) if hits else 0.0,
+        "per_case": hits,
+    }
+
+
+def generation_similarity(answers: List[str], expected: List[str], encode: Callable[..., Any]) -> np.ndarray:
+    """Cosine similarity of each answer with its reference, encoded in a single batch"""
+    if not answers:
+        return np.array([])
+    embeddings = np.asarray(encode(answers + expected), dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    embeddings = embeddings / np.clip(norms, 1e-12, None)
+    answer_emb, expected_emb = embeddings[:len(answers)], embeddings[len(answers):]
+    return np.sum(answer_emb * expected_emb, axis=1)
+
+
+def run_evaluation(
+    cases: List[Dict[str, Any]],
+    ask: Callable[[Dict[str, Any]], str],
+    encode: Callable[..., Any],
+    index_version: str,
+    retrieve: Optional[Callable[[str, int], List[Any]]] = None,
+    k: int = 5,
+    threshold: float = 0.75,
+    cache: Optional[AnswerCache] = None,
+    max_workers: int = 8
+) -> Dict[str, Any]:
+    """Run retrieval and generation evaluation and report their metrics separately"""
+    report: Dict[str, Any] = {"index_version": index_version, "num_cases": len(cases)}
+
+    if retrieve is not None:
+        report["retrieval"] = retrieval_recall_at_k(cases, retrieve, k=k, max_workers=max_workers)
+
+    answers = collect_answers(cases, ask, index_version, cache=cache, max_workers=max_workers)
+    similarities = generation_similarity(answers, [case["expected"] for case in cases], encode)
+    report["generation"] = {
+        "threshold": threshold,
+        "accuracy": float(np.mean(similarities > threshold)) if len(similarities) else 0.0,
+        "mean_similarity": float(similarities.mean()) if len(similarities) else 0.0,
+        "similarities": similarities.tolist(),
+    }
+    return report
@@ -0,0 +1,76 @@
+import queue
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TypeVar
+from langchain_core.documents import Document
+from app.rag.pdf_text import iter_page_texts
+
+T = TypeVar("T")
+
+
+def iter_pdf_pages(file_path: str, metadata: Dict[str, Any], content_hash: Optional[str] = None) -> Iterator[Document]:
+    """Pages of a PDF in order (extracted in parallel or read from the text cache), tagged with the document metadata"""
+    for page_number, text in enumerate(iter_page_texts(file_path, content_hash=content_hash)):
+        yield Document(page_content=text, metadata=dict(metadata, source=file_path, page=page_number))
+
+
+def iter_chunks(splitter, pages: Iterable[Document]) -> Iterator[Document]:
+    """Chunks as soon as they are complete; splitters without a streaming mode split page by page"""
+    if hasattr(splitter, "iter_chunks"):
+        yield from splitter.iter_chunks(pages)
+        return
+    for page in pages:
+        yield from splitter.split_documents([page])
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    batch: List[T] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def prefetch(items: Iterable[T], max_ahead: int) -> Iterator[T]:
+    """Produce items in a background thread, at most max_ahead ahead of the consumer.
+
+    The bounded queue is the backpressure: when embedding and upserting fall behind,
+    parsing blocks instead of piling pages up in memory. If the consumer stops early
+    the producer is told to stop; producer errors are re-raised in the consumer.
+    """
+    channel: "queue.Queue" = queue.Queue(maxsize=max(1, max_ahead))
+    stop = threading.Event()
+
+    def put(message) -> bool:
+        while not stop.is_set():
+            try:
+                channel.put(message, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put(("item", item)):
+                    return
+            put(("done", None))
+        except BaseException as e:
+            put(("error", e))
+
+    producer = threading.Thread(target=produce, name="ingest-parser", daemon=True)
+    producer.start()
+    try:
+        while True:
+            kind, value = channel.get()
+            if kind == "done":
+                return
+            if kind == "error":
+                raise value
+            yield value
+    finally:
+        stop.set()
+        producer.join(timeout=5)
@@ -0,0 +1,183 @@
+import concurrent.futures
+import glob
+import gzip
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import deque
+from typing import Iterator, List, Optional
+from app.config import PDF_EXTRACTOR, PDF_EXTRACT_WORKERS, PDF_TEXT_CACHE_DIR
+
+PAGES_PER_TASK = 8
+MIN_PAGES_FOR_POOL = 16  # below this, starting work in other processes costs more than it saves
+
+
+class PypdfExtractor:
+    """Pure-Python extraction with pypdf (the same text PyPDFLoader produced)"""
+
+    name = "pypdf"
+
+    def __init__(self):
+        from pypdf import PdfReader  # imported on first use
+        self._reader = PdfReader
+
+    def page_count(self, file_path: str) -> int:
+        return len(self._reader(file_path).pages)
+
+    def iter_pages(self, file_path: str, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        pages = self._reader(file_path).pages
+        for index in range(start, len(pages) if stop is None else stop):
+            yield pages[index].extract_text() or ""
+
+
+class PyMuPDFExtractor:
+    """Extraction with PyMuPDF (MuPDF in C), typically an order of magnitude faster than pypdf"""
+
+    name = "pymupdf"
+
+    def __init__(self):
+        import fitz  # optional dependency: pip install PyMuPDF
+        self._fitz = fitz
+
+    def page_count(self, file_path: str) -> int:
+        with self._fitz.open(file_path) as document:
+            return document.page_count
+
+    def iter_pages(self, file_path: str, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        with self._fitz.open(file_path) as document:
+            for index in range(start, document.page_count if stop is None else stop):
+                yield document[index].get_text()
+
+
+EXTRACTORS = {"pypdf": PypdfExtractor, "pymupdf": PyMuPDFExtractor}
+
+
+def create_extractor(kind: str = "pypdf"):
+    """Build the configured extractor, falling back to pypdf if PyMuPDF is unavailable"""
+    if kind == "pymupdf":
+        try:
+            return PyMuPDFExtractor()
+        except ImportError as e:
+            print(f"Warning: PyMuPDF not available, extracting PDFs with pypdf: {e}")
+    return PypdfExtractor()
+
+
+def _extract_range(kind: str, file_path: str, start: int, stop: int) -> List[str]:
+    """Pool task: the text of pages [start, stop)"""
+    return list(EXTRACTORS[kind]().iter_pages(file_path, start, stop))
+
+
+# Global instances
+_extractor = None
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pdf_extractor():
+    """Get the configured PDF text extractor"""
+    global _extractor
+    if _extractor is None:
+        _extractor = create_extractor(PDF_EXTRACTOR)
+    return _extractor
+
+def _extraction_pool(workers: int) -> concurrent.futures.ProcessPoolExecutor:
+    # "spawn" because forking a server process that runs threads can deadlock the children
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def extract_pages(file_path: str, extractor=None, workers: int = PDF_EXTRACT_WORKERS) -> Iterator[str]:
+    """Text of each page in order, extracted by a process pool a few page ranges ahead of the consumer"""
+    global _pool
+    extractor = extractor or get_pdf_extractor()
+    count = extractor.page_count(file_path)
+    if workers <= 1 or count < MIN_PAGES_FOR_POOL:
+        yield from extractor.iter_pages(file_path)
+        return
+
+    pool = _extraction_pool(workers)
+    ranges = iter([(start, min(count, start + PAGES_PER_TASK)) for start in range(0, count, PAGES_PER_TASK)])
+    pending = deque()
+    try:
+        # At most two ranges per worker in flight, so memory stays bounded for any page count
+        for start, stop in ranges:
+            pending.append(pool.submit(_extract_range, extractor.name, file_path, start, stop))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            texts = pending.popleft().result()
+            next_range = next(ranges, None)
+            if next_range:
+                pending.append(pool.submit(_extract_range, extractor.name, file_path, *next_range))
+            yield from texts
+    except concurrent.futures.process.BrokenProcessPool:
+        with _pool_lock:
+            _pool = None  # a worker died; start a fresh pool next time
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _cache_path(cache_dir: str, content_hash: str, extractor_name: str) -> str:
+    return os.path.join(cache_dir, f"{content_hash}.{extractor_name}.jsonl.gz")
+
+
+def iter_page_texts(file_path: str, extractor=None, workers: int = PDF_EXTRACT_WORKERS,
+                    cache_dir: Optional[str] = PDF_TEXT_CACHE_DIR, content_hash: Optional[str] = None) -> Iterator[str]:
+    """Text of each page in order; a file extracted before (same content hash and backend) is read from the cache.
+
+    Pass the document's stored content_hash to skip hashing the file again.
+    """
+    extractor = extractor or get_pdf_extractor()
+    if not cache_dir:
+        yield from extract_pages(file_path, extractor, workers)
+        return
+
+    if content_hash is None:
+        from app.utils.document_utils import calculate_file_hash
+        content_hash = calculate_file_hash(file_path)
+    cache_path = _cache_path(cache_dir, content_hash, extractor.name)
+    if os.path.exists(cache_path):
+        with gzip.open(cache_path, "rt", encoding="utf-8") as cached:
+            for line in cached:
+                yield json.loads(line)
+        return
+
+    # Pages are written as they stream through; the entry only becomes visible once the whole file is extracted
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, partial_path = tempfile.mkstemp(dir=cache_dir, suffix=".partial")
+    complete = False
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as partial:
+            for text in extract_pages(file_path, extractor, workers):
+                partial.write(json.dumps(text) + "\n")
+                yield text
+        os.replace(partial_path, cache_path)
+        complete = True
+    finally:
+        if not complete and os.path.exists(partial_path):
+            os.unlink(partial_path)
+
+
+def page_texts(file_path: str, content_hash: Optional[str] = None) -> List[str]:
+    """All page texts of a PDF (for parsers that need the whole document)"""
+    return list(iter_page_texts(file_path, content_hash=content_hash))
+
+
+def evict_page_texts(content_hash: str, cache_dir: Optional[str] = PDF_TEXT_CACHE_DIR) -> int:
+    """Delete the cached text of a document (every extractor backend); returns the number of entries removed"""
+    if not cache_dir or not content_hash:
+        return 0
+    removed = 0
+    for path in glob.glob(_cache_path(glob.escape(cache_dir), glob.escape(content_hash), "*")):
+        try:
+            os.unlink(path)
+            removed += 1
+        except FileNotFoundError:
+            pass  # evicted concurrently
+    return removed
@@ -0,0 +1,19 @@
+from app.config import RETRIEVAL_SERVICE_SOCKET
+
+# The RAG stack (langchain, chromadb, openai embeddings) is only imported when the vector
+# store is first used, so importing the app (auth-only endpoints, tests) stays cheap.
+
+# Global instance
+_vector_store_manager = None
+
+def get_vector_store_manager():
+    """Get global vector store manager instance (a client of the retrieval service when one is configured)"""
+    global _vector_store_manager
+    if _vector_store_manager is None:
+        if RETRIEVAL_SERVICE_SOCKET:
+            from app.rag.retrieval_service import RetrievalClient
+            _vector_store_manager = RetrievalClient(RETRIEVAL_SERVICE_SOCKET)
+        else:
+            from app.rag.vector_store import VectorStoreManager
+            _vector_store_manager = VectorStoreManager()
+    return _vector_store_manager
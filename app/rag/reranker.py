@@ -0,0 +1,130 @@
+import hashlib
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, FrozenSet, List, Optional, Sequence, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)*")
+
+# Very common English/Spanish words that carry no ranking signal
+STOPWORDS = frozenset("""
+a an and are as at be by de del el en es for from how in is it la las los of on or para por que
+qué the to un una what which with y
+""".split())
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (about 4 characters per token for English prose)"""
+    return max(1, len(text) // 4)
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+@lru_cache(maxsize=8192)
+def term_set(text: str) -> FrozenSet[str]:
+    """Tokenize text into a set of normalized terms (cached per chunk text)"""
+    return frozenset(t for t in TOKEN_PATTERN.findall(_normalize(text)) if t not in STOPWORDS and len(t) > 1)
+
+
+def _jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class MMRReranker:
+    """Cheap CPU reranker: blends vector relevance with lexical overlap and applies MMR for diversity"""
+
+    def __init__(self, lexical_weight: float = 0.3, diversity_lambda: float = 0.7, duplicate_threshold: float = 0.9):
+        self.lexical_weight = lexical_weight
+        self.diversity_lambda = diversity_lambda
+        self.duplicate_threshold = duplicate_threshold
+
+    def score(self, query: str, candidates: Sequence[Tuple[Any, float]]) -> List[float]:
+        """Score all candidates in one pass; candidates are (document, vector relevance) pairs"""
+        query_terms = term_set(query)
+        scores = []
+        for doc, relevance in candidates:
+            doc_terms = term_set(doc.page_content)
+            lexical = len(query_terms & doc_terms) / len(query_terms) if query_terms else 0.0
+            scores.append((1 - self.lexical_weight) * relevance + self.lexical_weight * lexical)
+        return scores
+
+    def rerank(self, query: str, candidates: Sequence[Tuple[Any, float]], top_n: int) -> List[Tuple[Any, float]]:
+        """Return up to top_n candidates ordered by maximal marginal relevance"""
+        if not candidates:
+            return []
+        scores = self.score(query, candidates)
+        remaining = list(range(len(candidates)))
+        selected: List[int] = []
+        redundancy = [0.0] * len(candidates)
+        while remaining and len(selected) < top_n:
+            best = max(
+                remaining,
+                key=lambda i: self.diversity_lambda * scores[i] - (1 - self.diversity_lambda) * redundancy[i]
+            )
+            selected.append(best)
+            remaining.remove(best)
+            # Update redundancy incrementally against the newly selected chunk and drop near-duplicates
+            best_terms = term_set(candidates[best][0].page_content)
+            for i in list(remaining):
+                redundancy[i] = max(redundancy[i], _jaccard(term_set(candidates[i][0].page_content), best_terms))
+                if redundancy[i] >= self.duplicate_threshold:
+                    remaining.remove(i)
+        return [(candidates[i][0], scores[i]) for i in selected]
+
+
+class CrossEncoderReranker:
+    """Cross-encoder reranker (requires sentence-transformers); pairs are scored in one batch and cached"""
+
+    def __init__(self, model_name: str, cache_size: int = 4096):
+        from sentence_transformers import CrossEncoder
+        self.model = CrossEncoder(model_name)
+        self._cache: dict = {}
+        self._cache_size = cache_size
+
+    @staticmethod
+    def _key(query: str, text: str) -> str:
+        return hashlib.sha1(f"{query}\x00{text}".encode("utf-8")).hexdigest()
+
+    def rerank(self, query: str, candidates: Sequence[Tuple[Any, float]], top_n: int) -> List[Tuple[Any, float]]:
+        keys = [self._key(query, doc.page_content) for doc, _ in candidates]
+        missing = [i for i, key in enumerate(keys) if key not in self._cache]
+        if missing:
+            predictions = self.model.predict([(query, candidates[i][0].page_content) for i in missing])
+            if len(self._cache) + len(missing) > self._cache_size:
+                self._cache.clear()
+            for i, score in zip(missing, predictions):
+                self._cache[keys[i]] = float(score)
+        ranked = sorted(
+            ((doc, self._cache[key]) for (doc, _), key in zip(candidates, keys)),
+            key=lambda pair: pair[1],
+            reverse=True
+        )
+        return ranked[:top_n]
+
+
+def select_within_budget(ranked: Sequence[Tuple[Any, float]], token_budget: int) -> List[Any]:
+    """Keep ranked documents in order while they fit in the token budget (always keeps the first)"""
+    selected = []
+    used = 0
+    for doc, _ in ranked:
+        tokens = estimate_tokens(doc.page_content)
+        if selected and used + tokens > token_budget:
+            continue
+        selected.append(doc)
+        used += tokens
+    return selected
+
+
+def create_reranker(kind: str, model_name: Optional[str] = None):
+    """Build the configured reranker, falling back to MMR if the cross-encoder is unavailable"""
+    if kind == "cross-encoder" and model_name:
+        try:
+            return CrossEncoderReranker(model_name)
+        except ImportError as e:
+            print(f"Warning: cross-encoder reranker not available, using MMR: {e}")
+    return MMRReranker()
@@ -0,0 +1,123 @@
+import json
+import os
+import socket
+import socketserver
+from typing import Any, Dict, List, Optional
+from langchain_core.documents import Document
+
+# Methods a worker may call on the process that owns the index. Writes go through the
+# owner as well, so every worker sees an ingest or delete as soon as it is committed.
+READ_METHODS = ("is_initialized", "count_chunks", "get_index_version", "get_context_for_query", "retrieve", "search_similar")
+WRITE_METHODS = ("add_pdf_file_to_rag", "delete_document_by_id", "delete_certification_documents")
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, Document):
+        return {"page_content": value.page_content, "metadata": value.metadata}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    return value
+
+
+class RetrievalServiceError(RuntimeError):
+    """The retrieval service could not be reached or failed to answer"""
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # One JSON request per line; a connection may send several
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                method = request["method"]
+                if method not in READ_METHODS + WRITE_METHODS:
+                    raise ValueError(f"Unknown method: {method}")
+                result = getattr(self.server.manager, method)(*request.get("args", []), **request.get("kwargs", {}))
+                response = {"result": _encode(result)}
+            except Exception as e:
+                print(f"Retrieval service error: {e}")
+                response = {"error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class RetrievalServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves one VectorStoreManager to every worker on the host over a Unix socket"""
+
+    daemon_threads = True
+
+    def __init__(self, manager, socket_path: str):
+        self.manager = manager
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # left behind by a previous run
+        os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+        super().__init__(socket_path, _RequestHandler)
+        os.chmod(socket_path, 0o660)
+
+
+class RetrievalClient:
+    """Drop-in for VectorStoreManager's query and ingest methods, backed by the retrieval service"""
+
+    def __init__(self, socket_path: str, timeout: float = 30.0, write_timeout: Optional[float] = None):
+        # Reads are bounded by `timeout`. Ingesting a syllabus (embedding and upserting hundreds of chunks)
+        # can take minutes, and the service finishes it anyway, so by default writes wait for the result.
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.write_timeout = write_timeout
+
+    def _call(self, method: str, *args, **kwargs) -> Any:
+        request = json.dumps({"method": method, "args": list(args), "kwargs": kwargs}).encode("utf-8") + b"\n"
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+                conn.settimeout(self.write_timeout if method in WRITE_METHODS else self.timeout)
+                conn.connect(self.socket_path)
+                conn.sendall(request)
+                with conn.makefile("rb") as reader:
+                    line = reader.readline(MAX_MESSAGE_BYTES)
+        except OSError as e:
+            raise RetrievalServiceError(f"Retrieval service unavailable at {self.socket_path}: {e}") from e
+        if not line:
+            raise RetrievalServiceError("Retrieval service closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise RetrievalServiceError(response["error"])
+        return response["result"]
+
+    @staticmethod
+    def _documents(items: List[Dict[str, Any]]) -> List[Document]:
+        return [Document(page_content=item["page_content"], metadata=item["metadata"]) for item in items]
+
+    def is_initialized(self) -> bool:
+        try:
+            return self._call("is_initialized")
+        except RetrievalServiceError as e:
+            print(f"Warning: {e}")
+            return False
+
+    def count_chunks(self) -> int:
+        return self._call("count_chunks")
+
+    def get_index_version(self) -> str:
+        return self._call("get_index_version")
+
+    def get_context_for_query(self, query: str, certification_code: Optional[str] = None, k: Optional[int] = None) -> Dict[str, Any]:
+        kwargs = {"k": k} if k is not None else {}
+        return self._call("get_context_for_query", query, certification_code, **kwargs)
+
+    def retrieve(self, query: str, certification_code: Optional[str] = None, k: Optional[int] = None) -> List[Document]:
+        kwargs = {"k": k} if k is not None else {}
+        return self._documents(self._call("retrieve", query, certification_code, **kwargs))
+
+    def search_similar(self, query: str, k: int = 5, filter_dict: Optional[Dict] = None) -> List[Document]:
+        return self._documents(self._call("search_similar", query, k, filter_dict))
+
+    def add_pdf_file_to_rag(self, file_path: str, metadata: Dict[str, Any], content_hash: Optional[str] = None) -> bool:
+        # The service runs on the same host, so it can read the uploaded file directly
+        return self._call("add_pdf_file_to_rag", os.path.abspath(file_path), metadata, content_hash)
+
+    def delete_document_by_id(self, document_id: str) -> bool:
+        return self._call("delete_document_by_id", str(document_id))
+
+    def delete_certification_documents(self, certification_code: str) -> bool:
+        return self._call("delete_certification_documents", certification_code)
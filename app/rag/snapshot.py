@@ -0,0 +1,140 @@
+import fcntl
+import json
+import os
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+import time
+from typing import Any, Dict, Optional
+import chromadb
+
+MANIFEST_FILE = "snapshot_manifest.json"
+
+
+def _copy_store(source: str, target: str):
+    """Copy a persist directory, using SQLite's backup API so database files are consistent"""
+    for root, _, files in os.walk(source):
+        relative = os.path.relpath(root, source)
+        os.makedirs(os.path.join(target, relative), exist_ok=True)
+        for name in files:
+            src = os.path.join(root, name)
+            dst = os.path.join(target, relative, name)
+            if name.endswith(".sqlite3"):
+                source_db, target_db = sqlite3.connect(src), sqlite3.connect(dst)
+                try:
+                    source_db.backup(target_db)
+                finally:
+                    source_db.close()
+                    target_db.close()
+            elif not name.endswith(("-wal", "-shm", "-journal")):
+                shutil.copy2(src, dst)
+
+
+def _store_summary(persist_directory: str) -> Dict[str, int]:
+    client = chromadb.PersistentClient(path=persist_directory)
+    names = [getattr(c, "name", c) for c in client.list_collections()]
+    return {name: client.get_collection(name).count() for name in sorted(names)}
+
+
+def export_snapshot(persist_directory: str, output_path: str) -> Dict[str, Any]:
+    """Write the vector store (Chroma files and chunk index) to a .tar.gz with a manifest"""
+    if not os.path.isdir(persist_directory):
+        raise FileNotFoundError(f"Vector store not found at {persist_directory}")
+    with tempfile.TemporaryDirectory() as staging:
+        store = os.path.join(staging, "store")
+        _copy_store(persist_directory, store)
+        collections = _store_summary(store)
+        manifest = {
+            "created_at": int(time.time()),
+            "chromadb_version": chromadb.__version__,
+            "collections": collections,
+            "total_chunks": sum(collections.values()),
+        }
+        with open(os.path.join(store, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        with tarfile.open(output_path, "w:gz") as archive:
+            archive.add(store, arcname=".")
+    print(f"Exported vector store snapshot to {output_path}: {manifest['total_chunks']} chunks")
+    return manifest
+
+
+def read_manifest(persist_directory: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(persist_directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _safe_members(archive: tarfile.TarFile):
+    for member in archive.getmembers():
+        path = os.path.normpath(member.name)
+        if os.path.isabs(path) or path.startswith(".."):
+            raise ValueError(f"Unsafe path in snapshot: {member.name}")
+        if not (member.isfile() or member.isdir()):
+            raise ValueError(f"Unsupported entry in snapshot: {member.name}")
+        yield member
+
+
+def import_snapshot(archive_path: str, persist_directory: str, force: bool = False) -> Dict[str, Any]:
+    """Unpack a snapshot into persist_directory, swapping it in only once it has been verified"""
+    if os.path.isdir(persist_directory) and os.listdir(persist_directory) and not force:
+        raise FileExistsError(f"{persist_directory} is not empty (use force to replace it)")
+    parent = os.path.dirname(os.path.abspath(persist_directory))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".snapshot-", dir=parent)
+    try:
+        with tarfile.open(archive_path, "r:gz") as archive:
+            archive.extractall(staging, members=_safe_members(archive))
+        manifest = read_manifest(staging)
+        if manifest is None:
+            raise ValueError(f"{archive_path} is not a vector store snapshot (missing {MANIFEST_FILE})")
+        collections = _store_summary(staging)
+        if collections != manifest["collections"]:
+            raise ValueError(f"Snapshot contents do not match its manifest: {collections} != {manifest['collections']}")
+
+        # Rename into place so a worker never sees a half-extracted store
+        previous = None
+        if os.path.exists(persist_directory):
+            previous = staging + ".old"
+            os.replace(persist_directory, previous)
+        os.replace(staging, persist_directory)
+        if previous:
+            shutil.rmtree(previous, ignore_errors=True)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    print(f"Imported vector store snapshot from {archive_path}: {manifest['total_chunks']} chunks")
+    return manifest
+
+
+def ensure_snapshot(archive_path: str, persist_directory: str) -> bool:
+    """Import the snapshot unless the store already exists; safe when several workers boot at once"""
+    os.makedirs(os.path.dirname(os.path.abspath(persist_directory)), exist_ok=True)
+    with open(os.path.abspath(persist_directory) + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if os.path.isdir(persist_directory) and os.listdir(persist_directory):
+                return False
+            import_snapshot(archive_path, persist_directory, force=True)
+            return True
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def warm_up(manager) -> Dict[str, int]:
+    """Open every collection and run one query so the HNSW segments are loaded before the first user"""
+    start = time.perf_counter()
+    counts: Dict[str, int] = {}
+    for name in manager._collection_names():
+        collection = manager.client.get_collection(name)
+        counts[name] = collection.count()
+        if not counts[name]:
+            continue
+        # Query with a stored vector: loads the index without calling the embeddings API
+        sample = collection.peek(limit=1)
+        collection.query(query_embeddings=[list(sample["embeddings"][0])], n_results=1, include=[])
+    manager.chunk_index.count()  # opens (or builds) the side index too
+    print(f"Vector store warmed up in {time.perf_counter() - start:.2f}s: {sum(counts.values())} chunks in {len(counts)} collections")
+    return counts
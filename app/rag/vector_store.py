@@ -1,38 +1,220 @@
+import hashlib
 import os
+import re
 import shutil
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import chromadb
 from langchain_chroma import Chroma
 from langchain_openai import OpenAIEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.schema import Document
+from langchain_core.documents import Document
 import tempfile
+from app.config import (
+    RAG_FETCH_K, RAG_TOP_K, RAG_CONTEXT_TOKEN_BUDGET, RAG_RERANKER, RAG_CROSS_ENCODER_MODEL,
+    CHROMA_PERSIST_DIRECTORY, EMBEDDING_TIMEOUT_SECONDS, INGEST_BATCH_SIZE, INGEST_PREFETCH_BATCHES
+)
+from app.rag.reranker import create_reranker, select_within_budget
+from app.rag.chunking import SyllabusSplitter
+from app.rag.chunk_index import ChunkIndex
+from app.rag.ingest import batched, iter_chunks, iter_pdf_pages, prefetch
+from app.rag.provider import get_vector_store_manager  # noqa: F401 (scripts import it from here)
+from app.utils.resilience import get_resilient_caller
+from app.utils.admission import estimate_tokens, get_admission_controller
 
 # Set OpenAI API key from environment variable
 os.environ["OPENAI_API_KEY"] = os.environ.get("OPENAI_API_KEY", "")
 
+# Each certification gets its own collection; documents without a certification
+# (and indexes built before partitioning) live in the shared legacy collection.
+PARTITION_PREFIX = "cert-"
+LEGACY_COLLECTION = "langchain"
+CHUNK_INDEX_FILE = "chunk_index.sqlite3"
+# Metadata fields the side index can resolve to chunk ids, and the largest id list worth passing to Chroma
+INDEXED_FIELDS = ("certification_code", "document_id", "document_type")
+MAX_ID_FILTER = 10000
+
+def collection_name_for(certification_code: str) -> str:
+    """Map a certification code to its Chroma collection name"""
+    slug = re.sub(r"[^a-z0-9._-]+", "-", certification_code.lower()).strip("-._")
+    return f"{PARTITION_PREFIX}{slug or 'unknown'}"[:512]
+
+def chunk_content_hash(text: str) -> str:
+    """Content hash of a chunk (whitespace-insensitive), used as its vector id"""
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+def _owners(metadata: Dict[str, Any]) -> List[str]:
+    """Documents that contain a chunk (chunks indexed before deduplication only have document_id)"""
+    owners = metadata.get("document_ids")
+    if owners:
+        return list(owners)
+    return [metadata["document_id"]] if metadata.get("document_id") is not None else []
+
+def _owner_rows(chunk_id: str, metadata: Dict[str, Any]) -> List[Tuple[str, Optional[str], Optional[str], Optional[str]]]:
+    """Side index rows for a stored chunk: one per owning document"""
+    owners = _owners(metadata) or [None]
+    return [(chunk_id, metadata.get("certification_code"), owner, metadata.get("document_type")) for owner in owners]
+
+def _equality_filter(where: Optional[Dict]) -> Optional[Dict[str, str]]:
+    """Flatten a where clause made only of equalities on indexed fields; None if it has anything else"""
+    if not where:
+        return {}
+    clauses = where["$and"] if list(where) == ["$and"] else [{key: value} for key, value in where.items()]
+    fields: Dict[str, str] = {}
+    for clause in clauses:
+        if not isinstance(clause, dict) or len(clause) != 1:
+            return None
+        (key, value), = clause.items()
+        if isinstance(value, dict):
+            if list(value) != ["$eq"]:
+                return None
+            value = value["$eq"]
+        if key not in INDEXED_FIELDS or isinstance(value, (dict, list)) or key in fields:
+            return None
+        fields[key] = str(value)
+    return fields
+
+def _combine_where(*clauses: Optional[Dict]) -> Optional[Dict]:
+    """AND together the non-empty Chroma where clauses"""
+    clauses = [c for c in clauses if c]
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": list(clauses)}
+
 class VectorStoreManager:
-    def __init__(self, persist_directory: str = "./chroma_db"):
+    def __init__(self, persist_directory: str = CHROMA_PERSIST_DIRECTORY):
         self.persist_directory = persist_directory
-        self.embeddings = OpenAIEmbeddings()
+        # Retries, deadlines and the circuit breaker live in the resilient caller, not in the SDK
+        self.embeddings = OpenAIEmbeddings(request_timeout=EMBEDDING_TIMEOUT_SECONDS, max_retries=0)
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1500,
             chunk_overlap=200,
             length_function=len,
         )
+        self.syllabus_splitter = SyllabusSplitter(chunk_size=2000)
+        self._client = None
         self._vector_store = None
-        self.embeddings = OpenAIEmbeddings()
+        self._stores: Dict[str, Chroma] = {}
+        self._chunk_index = None
+        self.reranker = create_reranker(RAG_RERANKER, RAG_CROSS_ENCODER_MODEL)
+
+    @property
+    def client(self):
+        """Lazy initialization of the shared Chroma client"""
+        if self._client is None:
+            self._client = chromadb.PersistentClient(path=self.persist_directory)
+        return self._client
 
     @property
     def vector_store(self):
-        """Lazy initialization of vector store"""
+        """Lazy initialization of the shared (legacy) vector store"""
         if self._vector_store is None:
             self._vector_store = Chroma(
-                persist_directory=self.persist_directory,
+                client=self.client,
+                collection_name=LEGACY_COLLECTION,
                 embedding_function=self.embeddings
             )
         return self._vector_store
 
+    @property
+    def chunk_index(self) -> ChunkIndex:
+        """Lazy side index from certification/document to chunk ids (built from Chroma on first use)"""
+        if self._chunk_index is None:
+            self._chunk_index = ChunkIndex(os.path.join(self.persist_directory, CHUNK_INDEX_FILE))
+            if not self._chunk_index.is_built():
+                self.rebuild_chunk_index()
+        return self._chunk_index
+
+    def rebuild_chunk_index(self, batch_size: int = 5000) -> int:
+        """Repopulate the side index from the metadata stored in Chroma"""
+        index = self._chunk_index or ChunkIndex(os.path.join(self.persist_directory, CHUNK_INDEX_FILE))
+        self._chunk_index = index
+        index.clear()
+        for name in self._collection_names():
+            collection = self.client.get_collection(name)
+            offset = 0
+            while True:
+                batch = collection.get(limit=batch_size, offset=offset, include=["metadatas"])
+                if not batch["ids"]:
+                    break
+                offset += len(batch["ids"])
+                index.add(name, [
+                    row
+                    for chunk_id, metadata in zip(batch["ids"], batch["metadatas"])
+                    for row in _owner_rows(chunk_id, metadata or {})
+                ])
+        index.mark_built()
+        count = index.count()
+        print(f"Chunk index built: {count} chunks")
+        return count
+
+    def get_store(self, certification_code: Optional[str] = None) -> Chroma:
+        """Return the partition for a certification, or the shared store when no code is given"""
+        if not certification_code:
+            return self.vector_store
+        name = collection_name_for(certification_code)
+        if name not in self._stores:
+            self._stores[name] = Chroma(
+                client=self.client,
+                collection_name=name,
+                embedding_function=self.embeddings,
+                collection_metadata={"certification_code": certification_code}
+            )
+        return self._stores[name]
+
+    def _collection_names(self) -> List[str]:
+        # chromadb < 0.6 returns Collection objects, newer versions return names
+        return [getattr(c, "name", c) for c in self.client.list_collections()]
+
+    def _search_targets(self, certification_code: Optional[str], where: Optional[Dict] = None) -> List[Tuple[Any, Optional[Dict]]]:
+        """Route a search to (collection, where) pairs: one partition, or all of them when unscoped"""
+        names = self._collection_names()
+        targets = []
+        if certification_code:
+            if collection_name_for(certification_code) in names:
+                targets.append((self.get_store(certification_code)._collection, where))
+        else:
+            for name in sorted(names):
+                if name.startswith(PARTITION_PREFIX):
+                    targets.append((self.client.get_collection(name), where))
+        if LEGACY_COLLECTION in names and self.vector_store._collection.count() > 0:
+            cert_filter = {"certification_code": certification_code} if certification_code else None
+            targets.append((self.vector_store._collection, _combine_where(cert_filter, where)))
+        return targets
+
+    def _restrict_to_ids(self, collection, where: Optional[Dict]) -> Tuple[Optional[List[str]], Optional[Dict]]:
+        """Turn an equality filter on indexed fields into an id list from the side index.
+
+        Returns (ids, None) when the side index can answer the filter, or (None, where)
+        when Chroma has to evaluate it (unindexed fields or too many matching ids).
+        """
+        fields = _equality_filter(where)
+        if not fields:
+            return None, where
+        ids = self.chunk_index.chunk_ids(collection.name, **fields)
+        if len(ids) > MAX_ID_FILTER:
+            return None, where
+        return ids, None
+
+    @staticmethod
+    def _query_collection(collection, embedding: List[float], k: int, where: Optional[Dict],
+                          ids: Optional[List[str]] = None) -> List[Tuple[Document, float]]:
+        if ids is not None:
+            k = min(k, len(ids))
+        result = collection.query(
+            query_embeddings=[embedding],
+            n_results=k,
+            where=where,
+            ids=ids,
+            include=["documents", "metadatas", "distances"]
+        )
+        pairs = []
+        for text, metadata, distance in zip(result["documents"][0], result["metadatas"][0], result["distances"][0]):
+            # Squared L2 distance between unit vectors: cosine similarity = 1 - d / 2
+            pairs.append((Document(page_content=text, metadata=metadata or {}), max(0.0, 1.0 - distance / 2.0)))
+        return pairs
+
     def add_pdf_to_rag(self, pdf_content: bytes, metadata: Dict[str, Any]) -> bool:
         """Add PDF content to RAG system"""
         try:
@@ -40,53 +222,204 @@ class VectorStoreManager:
             with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
                 temp_file.write(pdf_content)
                 temp_file_path = temp_file.name
+        except Exception as e:
+            print(f"Error adding PDF to RAG: {e}")
+            return False
 
-            try:
-                # Load and process PDF
-                loader = PyPDFLoader(temp_file_path)
-                documents = loader.load()
-
-                # Add metadata to each document
-                for doc in documents:
-                    doc.metadata.update(metadata)
-
-                # Split documents into chunks
-                chunks = self.text_splitter.split_documents(documents)
-
-                # Add to vector store
-                self.vector_store.add_documents(chunks)
-
-                return True
-
-            finally:
-                # Clean up temporary file
-                os.unlink(temp_file_path)
+        try:
+            return self.add_pdf_file_to_rag(temp_file_path, metadata)
+        finally:
+            # Clean up temporary file
+            os.unlink(temp_file_path)
 
+    def add_pdf_file_to_rag(self, file_path: str, metadata: Dict[str, Any], content_hash: Optional[str] = None) -> bool:
+        """Add a PDF stored on disk to RAG system (the file is parsed in place, never copied)"""
+        try:
+            self.ingest_pdf(file_path, metadata, content_hash=content_hash)
+            return True
         except Exception as e:
+            # Batches already upserted stay searchable; chunk ids are content hashes, so a retry does not duplicate them
             print(f"Error adding PDF to RAG: {e}")
             return False
 
+    def ingest_pdf(self, file_path: str, metadata: Dict[str, Any], batch_size: int = INGEST_BATCH_SIZE,
+                   prefetch_batches: int = INGEST_PREFETCH_BATCHES, content_hash: Optional[str] = None) -> Dict[str, int]:
+        """Stream a PDF through page -> chunk -> embedding batch -> upsert with bounded memory.
+
+        Each batch is searchable as soon as it is upserted, before the rest of the file is parsed.
+        """
+        # document_id is always stored as a string
+        metadata = dict(metadata)
+        if metadata.get("document_id") is not None:
+            metadata["document_id"] = str(metadata["document_id"])
+
+        # Syllabi are split on their numbered sections, other documents page by page
+        pages = iter_pdf_pages(file_path, metadata, content_hash)
+        batches = batched(iter_chunks(self.splitter_for(metadata), pages), batch_size)
+
+        totals = {"batches": 0, "chunks": 0, "added": 0, "shared": 0, "reused_embeddings": 0}
+        for batch in prefetch(batches, prefetch_batches):
+            # Add to the certification's partition, sharing vectors for identical chunks
+            stats = self.add_chunks(batch, metadata.get("certification_code"))
+            totals["batches"] += 1
+            totals["chunks"] += len(batch)
+            for key in ("added", "shared", "reused_embeddings"):
+                totals[key] += stats[key]
+        print(f"Ingested {file_path}: {totals}")
+        return totals
+
+    def splitter_for(self, metadata: Dict[str, Any]):
+        """Pick the chunking strategy for a document type"""
+        if metadata.get("document_type") == "syllabus":
+            return self.syllabus_splitter
+        return self.text_splitter
+
+    def add_chunks(self, chunks: List[Document], certification_code: Optional[str] = None) -> Dict[str, int]:
+        """Index chunks keyed by content hash so identical chunks share one vector"""
+        collection = self.get_store(certification_code)._collection
+        chunk_index = self.chunk_index  # built before writing so the new chunks are not indexed twice
+
+        # Collapse chunks repeated within the same batch
+        unique: Dict[str, Document] = {}
+        for chunk in chunks:
+            unique.setdefault(chunk_content_hash(chunk.page_content), chunk)
+        ids = list(unique)
+        if not ids:
+            return {"added": 0, "shared": 0, "reused_embeddings": 0}
+
+        # Chunks already in this partition only gain a new owning document
+        existing = collection.get(ids=ids, include=["metadatas"])
+        update_ids, update_metadatas = [], []
+        for chunk_id, existing_metadata in zip(existing["ids"], existing["metadatas"]):
+            owners = _owners(existing_metadata or {})
+            document_id = unique[chunk_id].metadata.get("document_id")
+            if document_id is not None and document_id not in owners:
+                update_ids.append(chunk_id)
+                update_metadatas.append({"document_ids": owners + [document_id]})
+        if update_ids:
+            collection.update(ids=update_ids, metadatas=update_metadatas)
+
+        existing_ids = set(existing["ids"])
+        new_ids = [chunk_id for chunk_id in ids if chunk_id not in existing_ids]
+        reused = 0
+        if new_ids:
+            embeddings, reused = self._embeddings_for(new_ids, [unique[i].page_content for i in new_ids], collection.name)
+            metadatas = []
+            for chunk_id in new_ids:
+                chunk_metadata = dict(unique[chunk_id].metadata, content_hash=chunk_id)
+                if chunk_metadata.get("document_id") is not None:
+                    chunk_metadata["document_ids"] = [chunk_metadata["document_id"]]
+                metadatas.append(chunk_metadata)
+            collection.add(
+                ids=new_ids,
+                embeddings=embeddings,
+                documents=[unique[i].page_content for i in new_ids],
+                metadatas=metadatas
+            )
+
+        chunk_index.add(collection.name, [
+            (chunk_id, unique[chunk_id].metadata.get("certification_code"),
+             unique[chunk_id].metadata.get("document_id"), unique[chunk_id].metadata.get("document_type"))
+            for chunk_id in ids
+        ])
+
+        stats = {"added": len(new_ids), "shared": len(existing_ids), "reused_embeddings": reused}
+        print(f"Indexed chunks for {certification_code or 'shared collection'}: {stats}")
+        return stats
+
+    def _embed_query(self, query: str) -> List[float]:
+        """Embed a search query (fails fast while the embeddings circuit is open)"""
+        def embed(timeout: float) -> List[float]:
+            with get_admission_controller().admit("embeddings", tokens=estimate_tokens([query]), timeout=timeout):
+                return self.embeddings.embed_query(query)
+        return get_resilient_caller("embeddings").call(embed)
+
+    def _embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed chunks for ingestion, with a deadline that grows with the number of request batches"""
+        def embed(timeout: float) -> List[List[float]]:
+            with get_admission_controller().admit("embeddings", tokens=estimate_tokens(texts), timeout=timeout):
+                return self.embeddings.embed_documents(texts)
+        timeout = EMBEDDING_TIMEOUT_SECONDS * (1 + len(texts) // 100)
+        return get_resilient_caller("ingest_embeddings").call(embed, timeout=timeout)
+
+    def _embeddings_for(self, ids: List[str], texts: List[str], skip_collection: str) -> Tuple[List[List[float]], int]:
+        """Reuse vectors of identical chunks stored in other partitions and embed only the rest"""
+        found: Dict[str, List[float]] = {}
+        for name in self._collection_names():
+            missing = [chunk_id for chunk_id in ids if chunk_id not in found]
+            if not missing:
+                break
+            if name == skip_collection:
+                continue
+            result = self.client.get_collection(name).get(ids=missing, include=["embeddings"])
+            for chunk_id, embedding in zip(result["ids"], result["embeddings"]):
+                found[chunk_id] = list(embedding)
+
+        reused = len(found)
+        missing = [(chunk_id, text) for chunk_id, text in zip(ids, texts) if chunk_id not in found]
+        if missing:
+            vectors = self._embed_documents([text for _, text in missing])
+            for (chunk_id, _), vector in zip(missing, vectors):
+                found[chunk_id] = vector
+        return [found[chunk_id] for chunk_id in ids], reused
+
+    @staticmethod
+    def _merge_duplicates(results: List[Tuple[Document, float]]) -> List[Tuple[Document, float]]:
+        """Collapse identical chunks found in several partitions into one result"""
+        merged: Dict[str, Tuple[Document, float]] = {}
+        for doc, score in results:
+            key = doc.metadata.get("content_hash") or chunk_content_hash(doc.page_content)
+            if key not in merged:
+                codes = [doc.metadata["certification_code"]] if doc.metadata.get("certification_code") else []
+                doc.metadata["certification_codes"] = codes
+                merged[key] = (doc, score)
+                continue
+            kept = merged[key][0]
+            code = doc.metadata.get("certification_code")
+            if code and code not in kept.metadata["certification_codes"]:
+                kept.metadata["certification_codes"].append(code)
+        return list(merged.values())
+
     def search_similar(self, query: str, k: int = 5, filter_dict: Optional[Dict] = None) -> List[Document]:
         """Search for similar documents"""
+        return [doc for doc, _ in self.search_similar_with_scores(query, k=k, filter_dict=filter_dict)]
+
+    def search_similar_with_scores(self, query: str, k: int = RAG_FETCH_K, filter_dict: Optional[Dict] = None) -> List[Tuple[Document, float]]:
+        """Search for similar documents returning (document, relevance in [0, 1]) pairs"""
         try:
-            if filter_dict:
-                return self.vector_store.similarity_search(query, k=k, filter=filter_dict)
-            else:
-                return self.vector_store.similarity_search(query, k=k)
+            # certification_code selects the partition instead of being a metadata filter
+            where = dict(filter_dict or {})
+            certification_code = where.pop("certification_code", None)
+            targets = self._search_targets(certification_code, where or None)
+            if not targets:
+                return []
+
+            embedding = self._embed_query(query)
+            results = []
+            for collection, target_where in targets:
+                # Document-level filters are resolved to chunk ids instead of a metadata scan
+                ids, target_where = self._restrict_to_ids(collection, target_where)
+                if ids == []:
+                    continue
+                results.extend(self._query_collection(collection, embedding, k, target_where, ids))
+            results.sort(key=lambda pair: pair[1], reverse=True)
+            return self._merge_duplicates(results)[:k]
         except Exception as e:
             print(f"Error searching vector store: {e}")
             return []
 
-    def get_context_for_query(self, query: str, certification_code: Optional[str] = None) -> Dict[str, Any]:
+    def retrieve(self, query: str, certification_code: Optional[str] = None, k: int = RAG_TOP_K) -> List[Document]:
+        """Over-fetch candidates, rerank them and keep the best k within the context token budget"""
+        filter_dict = {"certification_code": certification_code} if certification_code else None
+        candidates = self.search_similar_with_scores(query, k=max(RAG_FETCH_K, k), filter_dict=filter_dict)
+        ranked = self.reranker.rerank(query, candidates, top_n=k)
+        return select_within_budget(ranked, RAG_CONTEXT_TOKEN_BUDGET)
+
+    def get_context_for_query(self, query: str, certification_code: Optional[str] = None, k: int = RAG_TOP_K) -> Dict[str, Any]:
         """Get relevant context for a query"""
         try:
-            # Build filter if certification specified
-            filter_dict = None
-            if certification_code:
-                filter_dict = {"certification_code": certification_code}
-
-            # Search for relevant documents
-            similar_docs = self.search_similar(query, k=5, filter_dict=filter_dict)
+            # Search, rerank and trim to the token budget
+            similar_docs = self.retrieve(query, certification_code, k=k)
 
             if not similar_docs:
                 print("No similar documents found for query.")
@@ -109,6 +442,8 @@ class VectorStoreManager:
                     "document_type": doc.metadata.get("document_type", "Unknown"),
                     "title": doc.metadata.get("title", "Unknown")
                 }
+                if doc.metadata.get("section"):
+                    source_info["section"] = doc.metadata["section"]
                 if source_info not in sources:
                     sources.append(source_info)
 
@@ -133,15 +468,34 @@ class VectorStoreManager:
     def delete_document_by_id(self, document_id: str) -> bool:
         """Delete specific document from vector store by document_id"""
         try:
-            # Get all documents first to check what exists
-            collection = self.vector_store._collection
-
-            # Delete documents with specific document_id in metadata
-            result = collection.delete(
-                where={"document_id": {"$eq": str(document_id)}}
-            )
-
-            print(f"Deleted {len(result)} document chunks for document_id: {document_id}")
+            document_id = str(document_id)
+            names = set(self._collection_names())
+            deleted = 0
+            released = 0
+            # The side index knows the document's chunk ids, so only those are fetched (no metadata scan)
+            for name, chunk_ids in self.chunk_index.chunks_for_document(document_id).items():
+                if name not in names:
+                    continue
+                collection = self.client.get_collection(name)
+                result = collection.get(ids=chunk_ids, include=["metadatas"])
+                delete_ids, update_ids, update_metadatas = [], [], []
+                for chunk_id, metadata in zip(result["ids"], result["metadatas"]):
+                    remaining = [owner for owner in _owners(metadata or {}) if owner != document_id]
+                    if remaining:
+                        # Shared chunk: keep the vector for the other documents
+                        update_ids.append(chunk_id)
+                        update_metadatas.append({"document_ids": remaining, "document_id": remaining[0]})
+                    else:
+                        delete_ids.append(chunk_id)
+                if delete_ids:
+                    collection.delete(ids=delete_ids)
+                    deleted += len(delete_ids)
+                if update_ids:
+                    collection.update(ids=update_ids, metadatas=update_metadatas)
+                    released += len(update_ids)
+            self.chunk_index.remove_document(document_id)
+
+            print(f"Deleted {deleted} document chunks for document_id: {document_id} ({released} shared chunks kept)")
             return True
 
         except Exception as e:
@@ -151,12 +505,21 @@ class VectorStoreManager:
     def delete_certification_documents(self, certification_code: str) -> bool:
         """Delete all documents for a specific certification"""
         try:
-            collection = self.vector_store._collection
-
-            # Delete all documents for this certification
-            result = collection.delete(
-                where={"certification_code": {"$eq": certification_code}}
-            )
+            names = self._collection_names()
+
+            # Dropping the partition is a cheap metadata operation, no scan needed
+            name = collection_name_for(certification_code)
+            if name in names:
+                self.client.delete_collection(name)
+                self._stores.pop(name, None)
+            self.chunk_index.remove_collection(name)
+
+            # Chunks indexed before partitioning still live in the shared collection
+            if LEGACY_COLLECTION in names:
+                self.vector_store._collection.delete(
+                    where={"certification_code": {"$eq": certification_code}}
+                )
+                self.chunk_index.remove_collection(LEGACY_COLLECTION, certification_code)
 
             print(f"Deleted documents for certification: {certification_code}")
             return True
@@ -165,21 +528,23 @@ class VectorStoreManager:
             print(f"Error deleting certification documents: {e}")
             return False
 
+    def count_chunks(self) -> int:
+        """Total number of chunks across all collections"""
+        return sum(self.client.get_collection(name).count() for name in self._collection_names())
+
     def is_initialized(self) -> bool:
         """Check if vector store is initialized and has documents"""
         try:
-            # Try to perform a simple search to see if there are any documents
-            test_results = self.vector_store.similarity_search("test", k=1)
-            return len(test_results) > 0
+            return self.count_chunks() > 0
         except Exception:
             return False
 
-# Global instance
-_vector_store_manager = None
-
-def get_vector_store_manager() -> VectorStoreManager:
-    """Get global vector store manager instance"""
-    global _vector_store_manager
-    if _vector_store_manager is None:
-        _vector_store_manager = VectorStoreManager()
-    return _vector_store_manager
+    def get_index_version(self) -> str:
+        """Return a cheap fingerprint that changes whenever the indexed corpus changes"""
+        sqlite_path = os.path.join(self.persist_directory, "chroma.sqlite3")
+        mtime = int(os.path.getmtime(sqlite_path)) if os.path.exists(sqlite_path) else 0
+        try:
+            count = self.count_chunks()
+        except Exception:
+            count = 0
+        return f"{count}-{mtime}"
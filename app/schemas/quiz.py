@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import Optional, List, Dict
+
+class QuizOption(BaseModel):
+    letter: str
+    text: str
+
+class QuizQuestionResponse(BaseModel):
+    id: int
+    question: str
+    options: List[QuizOption]
+    correct_answer: str
+    explanation: Optional[str] = None
+    learning_objective: Optional[str] = None
+    k_level: Optional[str] = None
+    source: str  # "official" or "ai_generated"
+
+class QuizResponse(BaseModel):
+    certification_code: str
+    chapter: Optional[str] = None
+    questions: List[QuizQuestionResponse]
+    refill_scheduled: bool = False
+
+class QuizPoolStats(BaseModel):
+    certification_code: str
+    available_by_chapter: Dict[str, int]
+    refills_scheduled: List[str] = []
@@ -0,0 +1,251 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+from app.config import (
+    ADMISSION_DB_PATH, ADMISSION_HEADROOM, ADMISSION_QUEUE_TIMEOUT_SECONDS, OPENAI_CHAT_RPM, OPENAI_CHAT_TPM,
+    OPENAI_EMBEDDING_RPM, OPENAI_EMBEDDING_TPM, OPENAI_MAX_CONCURRENCY
+)
+from app.utils.resilience import Overloaded, retry_after_seconds
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    requests REAL NOT NULL,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    paused_until REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS leases (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    user_key TEXT NOT NULL,
+    tokens REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_leases_user ON leases (name, user_key);
+CREATE TABLE IF NOT EXISTS waiters (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    user_key TEXT NOT NULL,
+    enqueued_at REAL NOT NULL,
+    deadline REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_waiters_name ON waiters (name, enqueued_at);
+"""
+
+# Next in line: the waiter whose user has the fewest calls in flight, then the oldest
+NEXT_WAITER = """
+SELECT w.id FROM waiters w WHERE w.name = ?
+ORDER BY (SELECT COUNT(*) FROM leases l WHERE l.name = w.name AND l.user_key = w.user_key), w.enqueued_at, w.id
+LIMIT 1
+"""
+POLL_SECONDS = 0.05
+LEASE_SECONDS = 120  # a worker that dies mid-call gives its slot back after this
+DEFAULT_RETRY_AFTER_SECONDS = 1.0
+
+
+def estimate_tokens(texts: Iterable[str], max_output_tokens: int = 0) -> int:
+    """Rough token count (about 4 characters per token) plus the completion allowance"""
+    return sum(len(text or "") for text in texts) // 4 + 1 + max_output_tokens
+
+
+class AdmissionController:
+    """Requests-per-minute and tokens-per-minute buckets plus an in-flight limit per upstream API.
+
+    The state lives in a SQLite file, so every worker on the host draws from the same
+    budget. Callers that do not fit wait in a queue that is served fairly across users,
+    and give up at their deadline instead of sending a request that would get a 429.
+    """
+
+    def __init__(self, path: str, limits: Dict[str, Dict[str, float]], headroom: float = ADMISSION_HEADROOM,
+                 queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS, clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.path = path
+        self.limits = {
+            name: {
+                "rpm": limit.get("rpm", 0) * headroom,
+                "tpm": limit.get("tpm", 0) * headroom,
+                "concurrency": int(limit.get("concurrency", 0)),
+            }
+            for name, limit in limits.items()
+        }
+        self.queue_timeout = queue_timeout
+        self.clock = clock
+        self.sleep = sleep
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; transactions are managed explicitly with BEGIN IMMEDIATE
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction that holds the database lock, so check-and-take is atomic across workers"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def enabled(self, name: str) -> bool:
+        limit = self.limits.get(name)
+        return bool(limit and (limit["rpm"] or limit["tpm"] or limit["concurrency"]))
+
+    def _bucket(self, conn: sqlite3.Connection, name: str, now: float) -> Dict[str, float]:
+        """Bucket levels refilled up to now (one minute's budget at most)"""
+        limit = self.limits[name]
+        row = conn.execute("SELECT requests, tokens, updated_at, paused_until FROM buckets WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return {"requests": limit["rpm"], "tokens": limit["tpm"], "paused_until": 0.0}
+        requests, tokens, updated_at, paused_until = row
+        elapsed = max(0.0, now - updated_at)
+        return {
+            "requests": min(limit["rpm"], requests + elapsed * limit["rpm"] / 60),
+            "tokens": min(limit["tpm"], tokens + elapsed * limit["tpm"] / 60),
+            "paused_until": paused_until,
+        }
+
+    @staticmethod
+    def _save(conn: sqlite3.Connection, name: str, bucket: Dict[str, float], now: float):
+        conn.execute(
+            "INSERT OR REPLACE INTO buckets (name, requests, tokens, updated_at, paused_until) VALUES (?, ?, ?, ?, ?)",
+            (name, bucket["requests"], bucket["tokens"], now, bucket["paused_until"])
+        )
+
+    def _try_admit(self, waiter_id: str, name: str, user_key: str, tokens: float) -> Optional[float]:
+        """Admit the waiter if it is next in line and fits the budget; else seconds until it is worth asking again"""
+        limit = self.limits[name]
+        now = self.clock()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM leases WHERE expires_at < ?", (now,))
+            conn.execute("DELETE FROM waiters WHERE deadline < ?", (now,))
+            head = conn.execute(NEXT_WAITER, (name,)).fetchone()
+            if head and head[0] != waiter_id:
+                return POLL_SECONDS
+            if limit["concurrency"]:
+                in_flight = conn.execute("SELECT COUNT(*) FROM leases WHERE name = ?", (name,)).fetchone()[0]
+                if in_flight >= limit["concurrency"]:
+                    return POLL_SECONDS
+
+            bucket = self._bucket(conn, name, now)
+            needed = min(tokens, limit["tpm"])  # a call larger than the whole bucket waits for a full one
+            wait = bucket["paused_until"] - now
+            if limit["rpm"] and bucket["requests"] < 1:
+                wait = max(wait, (1 - bucket["requests"]) * 60 / limit["rpm"])
+            if limit["tpm"] and bucket["tokens"] < needed:
+                wait = max(wait, (needed - bucket["tokens"]) * 60 / limit["tpm"])
+            if wait <= 0:
+                bucket["requests"] -= 1 if limit["rpm"] else 0
+                bucket["tokens"] -= needed if limit["tpm"] else 0
+                conn.execute("INSERT INTO leases (id, name, user_key, tokens, expires_at) VALUES (?, ?, ?, ?, ?)",
+                             (waiter_id, name, user_key, needed, now + LEASE_SECONDS))
+                conn.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+            self._save(conn, name, bucket, now)
+        return None if wait <= 0 else wait
+
+    def acquire(self, name: str, user_key: str = "", tokens: float = 0, timeout: Optional[float] = None) -> Optional[str]:
+        """Wait for a slot and budget; returns the lease id (None when the API has no limits)"""
+        if not self.enabled(name):
+            return None
+        waiter_id = uuid.uuid4().hex
+        deadline = self.clock() + min(timeout or self.queue_timeout, self.queue_timeout)
+        conn = self._connect()
+        conn.execute("INSERT INTO waiters (id, name, user_key, enqueued_at, deadline) VALUES (?, ?, ?, ?, ?)",
+                     (waiter_id, name, user_key, self.clock(), deadline))
+        try:
+            while True:
+                wait = self._try_admit(waiter_id, name, user_key, tokens)
+                if wait is None:
+                    return waiter_id
+                remaining = deadline - self.clock()
+                if remaining <= 0 or (wait > remaining and wait > POLL_SECONDS):
+                    raise Overloaded(f"No {name} capacity within {max(0.0, remaining):.1f}s")
+                self.sleep(min(wait, remaining))
+        except BaseException:
+            conn.execute("DELETE FROM waiters WHERE id = ?", (waiter_id,))
+            raise
+
+    def release(self, lease_id: Optional[str], used_tokens: Optional[float] = None):
+        """Free the slot and refund (or charge) the difference between estimated and used tokens"""
+        if lease_id is None:
+            return
+        now = self.clock()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT name, tokens FROM leases WHERE id = ?", (lease_id,)).fetchone()
+            conn.execute("DELETE FROM leases WHERE id = ?", (lease_id,))
+            if row and used_tokens is not None and self.limits[row[0]]["tpm"]:
+                bucket = self._bucket(conn, row[0], now)
+                bucket["tokens"] = min(self.limits[row[0]]["tpm"], bucket["tokens"] + row[1] - used_tokens)
+                self._save(conn, row[0], bucket, now)
+
+    def pause(self, name: str, seconds: float):
+        """Hold every worker's calls to an API (OpenAI answered 429 despite the budget)"""
+        if not self.enabled(name):
+            return
+        now = self.clock()
+        with self._transaction() as conn:
+            bucket = self._bucket(conn, name, now)
+            bucket["paused_until"] = max(bucket["paused_until"], now + seconds)
+            self._save(conn, name, bucket, now)
+
+    @contextmanager
+    def admit(self, name: str, user_key: Any = None, tokens: float = 0, timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """Hold a lease for one upstream call; set lease["used_tokens"] from the response usage to settle the budget"""
+        lease = {"id": self.acquire(name, str(user_key or ""), tokens, timeout), "used_tokens": None}
+        try:
+            yield lease
+        except Exception as e:
+            if getattr(e, "status_code", None) == 429:
+                self.pause(name, retry_after_seconds(e) or DEFAULT_RETRY_AFTER_SECONDS)
+            raise
+        finally:
+            self.release(lease["id"], lease["used_tokens"])
+
+    def snapshot(self) -> Dict[str, Any]:
+        conn = self._connect()
+        now = self.clock()
+        report = {}
+        for name, limit in self.limits.items():
+            if not self.enabled(name):
+                continue
+            bucket = self._bucket(conn, name, now)
+            report[name] = {
+                "requests_available": round(bucket["requests"], 1),
+                "tokens_available": round(bucket["tokens"]),
+                "paused_for_seconds": round(max(0.0, bucket["paused_until"] - now), 1),
+                "in_flight": conn.execute("SELECT COUNT(*) FROM leases WHERE name = ? AND expires_at >= ?", (name, now)).fetchone()[0],
+                "waiting": conn.execute("SELECT COUNT(*) FROM waiters WHERE name = ? AND deadline >= ?", (name, now)).fetchone()[0],
+                "limits": {key: round(value) for key, value in limit.items()},
+            }
+        return report
+
+
+# Global instance
+_admission_controller = None
+_admission_lock = threading.Lock()
+
+def get_admission_controller() -> AdmissionController:
+    """Get the host-wide admission controller for the OpenAI chat and embeddings APIs"""
+    global _admission_controller
+    with _admission_lock:
+        if _admission_controller is None:
+            _admission_controller = AdmissionController(ADMISSION_DB_PATH, {
+                "chat": {"rpm": OPENAI_CHAT_RPM, "tpm": OPENAI_CHAT_TPM, "concurrency": OPENAI_MAX_CONCURRENCY},
+                "embeddings": {"rpm": OPENAI_EMBEDDING_RPM, "tpm": OPENAI_EMBEDDING_TPM, "concurrency": OPENAI_MAX_CONCURRENCY},
+            })
+        return _admission_controller
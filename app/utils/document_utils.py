@@ -1,12 +1,39 @@
 import hashlib
-from typing import Optional
+from typing import Optional, Tuple
+import aiofiles
+from fastapi import UploadFile
 from sqlalchemy.orm import Session
 from app.models.document import Document
 
+# Uploads are streamed and hashed in 1 MB chunks so memory stays flat for large PDFs
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 def calculate_pdf_hash(pdf_content: bytes) -> str:
     """Calculate SHA256 hash of PDF content"""
     return hashlib.sha256(pdf_content).hexdigest()
 
+def calculate_file_hash(file_path: str) -> str:
+    """Calculate SHA256 hash of a file on disk without loading it into memory"""
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+async def save_upload_with_hash(upload: UploadFile, destination: str) -> Tuple[str, int]:
+    """Stream an upload to disk, hashing it incrementally; returns (sha256, size in bytes)"""
+    hasher = hashlib.sha256()
+    size = 0
+    async with aiofiles.open(destination, "wb") as f:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            size += len(chunk)
+            await f.write(chunk)
+    return hasher.hexdigest(), size
+
 def check_document_duplicate(db: Session, content_hash: str) -> Optional[Document]:
     """Check if a document with the same hash already exists"""
     return db.query(Document).filter(Document.content_hash == content_hash).first()
@@ -0,0 +1,265 @@
+import concurrent.futures
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
+from app.config import (
+    EMBEDDING_TIMEOUT_SECONDS, LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SECONDS, LLM_HEDGE_AFTER_MS,
+    LLM_MAX_RETRIES, LLM_RETRY_BASE_SECONDS, LLM_RETRY_MAX_SECONDS, LLM_TIMEOUT_SECONDS, QUIZ_GENERATION_TIMEOUT_SECONDS
+)
+
+# Errors worth another attempt: rate limits, server errors and network trouble. A 400 will fail the same way again.
+RETRYABLE_STATUS = (408, 409, 429)
+RETRYABLE_ERRORS = ("APITimeoutError", "APIConnectionError", "ConnectError", "ReadTimeout", "ConnectTimeout")
+LATENCY_WINDOW = 200
+MIN_HEDGE_SAMPLES = 20
+
+
+class UpstreamUnavailable(RuntimeError):
+    """The upstream is not answering in time (circuit open or deadline exceeded)"""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    """The circuit breaker is open, the call was not attempted"""
+
+
+class DeadlineExceeded(UpstreamUnavailable):
+    """The call's deadline passed before any attempt succeeded"""
+
+
+class Overloaded(UpstreamUnavailable):
+    """Admission control could not fit the call into the rate budget in time (says nothing about upstream health)"""
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an OpenAI/httpx error is transient (checked by name so the SDK need not be imported)"""
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int):
+        return status in RETRYABLE_STATUS or status >= 500
+    return (isinstance(error, (TimeoutError, ConnectionError, DeadlineExceeded))
+            or type(error).__name__ in RETRYABLE_ERRORS)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Retry-After sent with a 429/503, if any"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return max(0.0, float(headers.get("retry-after")))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full jitter: uniform in [0, min(cap, base * 2^attempt)], so retrying workers do not stampede together"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def parse_hedge_setting(value: str) -> Optional[Any]:
+    """'' / '0' / 'off' -> None, 'p95' -> 'p95', '800' -> 0.8 seconds"""
+    value = (value or "").strip().lower()
+    if value in ("", "0", "off", "false"):
+        return None
+    if value == "p95":
+        return value
+    return float(value) / 1000
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failed calls; after `reset_seconds` a single probe is let through"""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, reset_seconds: float = LLM_BREAKER_RESET_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now (claims the probe slot when half-open)"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_seconds:
+                self._state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def release(self):
+        """Give back a probe slot whose call never reached the upstream"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.OPEN
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self.clock()
+
+
+# Hedged attempts run here; abandoned attempts finish in the background and are bounded by their own timeout
+_executor = None
+_executor_lock = threading.Lock()
+
+def _hedge_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+        return _executor
+
+
+class ResilientCaller:
+    """Deadline, bounded retries with jitter, optional hedging and a circuit breaker around one upstream API"""
+
+    def __init__(self, name: str, timeout: float = LLM_TIMEOUT_SECONDS, max_retries: int = LLM_MAX_RETRIES,
+                 base_delay: float = LLM_RETRY_BASE_SECONDS, max_delay: float = LLM_RETRY_MAX_SECONDS,
+                 hedge_after: Optional[Any] = None, breaker: Optional[CircuitBreaker] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.name = name
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge_after = hedge_after
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._stats = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0, "failures": 0, "rejected": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def hedge_delay(self, key: str = "") -> Optional[float]:
+        """Seconds to wait for the first attempt before sending a second one (None: no hedging)"""
+        if self.hedge_after != "p95":
+            return self.hedge_after
+        with self._lock:
+            window = sorted(self._latencies.get(key, ()))
+        if len(window) < MIN_HEDGE_SAMPLES:
+            return None
+        return window[int(0.95 * (len(window) - 1))]
+
+    def call(self, fn: Callable[[float], Any], timeout: Optional[float] = None, key: str = "") -> Any:
+        """Run fn(seconds_left) until it succeeds, fails for good or the deadline passes (blocking)"""
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        self._count("calls")
+        deadline = time.monotonic() + (timeout or self.timeout)
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            try:
+                result = self._attempt(fn, deadline - start, key)
+            except Overloaded:
+                self._count("rejected")
+                self.breaker.release()
+                raise
+            except Exception as error:
+                if not is_retryable(error):
+                    # The upstream answered (a 4xx), so it is healthy; anything else counts against it
+                    if isinstance(getattr(error, "status_code", None), int):
+                        self.breaker.record_success()
+                    else:
+                        self.breaker.record_failure()
+                    raise
+                delay = retry_after_seconds(error)
+                delay = backoff_delay(attempt, self.base_delay, self.max_delay) if delay is None else delay
+                if attempt >= self.max_retries or time.monotonic() + delay >= deadline:
+                    self._count("failures")
+                    self.breaker.record_failure()
+                    raise
+                attempt += 1
+                self._count("retries")
+                self.sleep(delay)
+                continue
+            with self._lock:
+                self._latencies.setdefault(key, deque(maxlen=LATENCY_WINDOW)).append(time.monotonic() - start)
+            self.breaker.record_success()
+            return result
+
+    def _attempt(self, fn: Callable[[float], Any], remaining: float, key: str) -> Any:
+        if remaining <= 0:
+            raise DeadlineExceeded(f"{self.name} deadline exceeded")
+        hedge_after = self.hedge_delay(key)
+        if hedge_after is None or hedge_after >= remaining:
+            return fn(remaining)
+
+        executor = _hedge_executor()
+        first = executor.submit(fn, remaining)
+        done, _ = concurrent.futures.wait([first], timeout=hedge_after)
+        if done:
+            return first.result()
+
+        # The first attempt is slower than usual: race a second one and take whichever succeeds first
+        self._count("hedges")
+        deadline = time.monotonic() + remaining - hedge_after
+        second = executor.submit(fn, remaining - hedge_after)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = concurrent.futures.wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                                    return_when=concurrent.futures.FIRST_COMPLETED)
+            if not done:
+                raise DeadlineExceeded(f"{self.name} deadline exceeded")
+            for future in done:
+                if future.exception() is None:
+                    if future is second:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        hedge = {key: self.hedge_delay(key) for key in list(self._latencies)}
+        return {**stats, "breaker": self.breaker.state,
+                "hedge_after_ms": {key: round(value * 1000) for key, value in hedge.items() if value is not None}}
+
+
+# Global instances, one per upstream API
+_callers: Dict[str, ResilientCaller] = {}
+_callers_lock = threading.Lock()
+
+def get_resilient_caller(name: str) -> ResilientCaller:
+    """Get the shared caller for 'chat' (completions, hedged if configured), 'quiz' (pool generation),
+    'embeddings' (query embeddings) or 'ingest_embeddings' (bulk ingestion)"""
+    with _callers_lock:
+        if name not in _callers:
+            if name in ("embeddings", "ingest_embeddings"):
+                # Separate breakers, so a bulk reprocess that trips its own does not cut off interactive retrieval
+                _callers[name] = ResilientCaller(name, timeout=EMBEDDING_TIMEOUT_SECONDS)
+            elif name == "quiz":
+                # Background batches: long deadline, never hedged (a duplicate would double a large completion)
+                _callers[name] = ResilientCaller(name, timeout=QUIZ_GENERATION_TIMEOUT_SECONDS)
+            else:
+                _callers[name] = ResilientCaller(name, hedge_after=parse_hedge_setting(LLM_HEDGE_AFTER_MS))
+        return _callers[name]
+
+
+def resilience_snapshot() -> Dict[str, Any]:
+    with _callers_lock:
+        return {name: caller.snapshot() for name, caller in _callers.items()}
@@ -0,0 +1,15 @@
+from typing import Any, Dict, List
+
+
+def direct_response(text: str, sources: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Answer built without calling the model, in the same shape as OpenAIClient.generate_response"""
+    return {
+        "response": text,
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cached_tokens": 0},
+        "rag_info": {
+            "retrieval_successful": True,
+            "context_used": True,
+            "num_sources": len(sources),
+            "sources": sources,
+        },
+    }
@@ -0,0 +1,42 @@
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one execution instead of each going upstream.
+
+    The first caller starts the work as its own task; callers that arrive while it runs
+    await that task and get a copy of its result (or its exception). The task is shielded,
+    so a leader whose client disconnects does not cancel the followers' answer.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._stats = {"executions": 0, "coalesced": 0}
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is not None and not task.done() and task.get_loop() is asyncio.get_running_loop():
+            self._stats["coalesced"] += 1
+            return copy.deepcopy(await asyncio.shield(task))
+
+        task = asyncio.ensure_future(factory())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._in_flight.pop(key, None) if self._in_flight.get(key) is done else None)
+        self._stats["executions"] += 1
+        return await asyncio.shield(task)
+
+    def snapshot(self) -> Dict[str, int]:
+        return {**self._stats, "in_flight": sum(1 for task in self._in_flight.values() if not task.done())}
+
+
+# Global instance
+_single_flight = None
+
+def get_single_flight() -> SingleFlight:
+    """Get the per-process coalescer for retrieval and generation"""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
@@ -1,16 +1,26 @@
-from fastapi import FastAPI
+import asyncio
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database.connection import engine
+from app.database.connection import engine, SessionLocal
 from app.models.user import User
 from app.models.certification import Certification
 from app.models.document import Document
 from app.models.chat import ChatMessage
+from app.models.exam import ExamQuestion
+from app.models.quiz import QuizQuestion
+from app.models.syllabus import BusinessOutcome, LearningObjective, SyllabusKeyword
 from app.auth.routes import router as auth_router
 from app.auth.sso_routes import router as sso_router
 from app.chat.routes import router as chat_router
 from app.certification.routes import router as certification_router
+from app.quiz.routes import router as quiz_router
 from app.auth.admin_setup import create_admin_user
 from app.chat.routes import chat_with_assistant
+from app.auth.rate_limit import enforce_chat_rate_limit
+from app.quiz.pool import get_quiz_pool
+from app.glossary.index import get_glossary_index
+from app.rag.provider import get_vector_store_manager
+from app.config import QUIZ_PREWARM_ON_STARTUP, VECTOR_STORE_SNAPSHOT, VECTOR_STORE_WARM_ON_STARTUP, RETRIEVAL_SERVICE_SOCKET
 
 from dotenv import load_dotenv
 
@@ -37,16 +47,20 @@ app.add_middleware(
 app.include_router(auth_router)
 app.include_router(sso_router)
 app.include_router(chat_router)
-app.add_api_route("/api/chat",  chat_with_assistant, methods=["POST"], include_in_schema=False)
-app.add_api_route("/api/chat/", chat_with_assistant, methods=["POST"], include_in_schema=False)
+app.add_api_route("/api/chat",  chat_with_assistant, methods=["POST"], include_in_schema=False,
+                  dependencies=[Depends(enforce_chat_rate_limit)])
+app.add_api_route("/api/chat/", chat_with_assistant, methods=["POST"], include_in_schema=False,
+                  dependencies=[Depends(enforce_chat_rate_limit)])
 app.include_router(certification_router)
+app.include_router(quiz_router)
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize application on startup"""
     try:
         # 1) Crear tablas (asegura que existan antes de crear el admin)
-        for meta in (User.metadata, Certification.metadata, Document.metadata, ChatMessage.metadata):
+        for meta in (User.metadata, Certification.metadata, Document.metadata, ChatMessage.metadata, ExamQuestion.metadata, QuizQuestion.metadata,
+                     BusinessOutcome.metadata, LearningObjective.metadata, SyllabusKeyword.metadata):
             meta.create_all(bind=engine)
 
         # 2) Crear admin user
@@ -54,6 +68,31 @@ async def startup_event():
         if admin_user:
             print(f"✅ Admin user setup completed: {admin_user.username}")
 
+        # 3) Restaurar el snapshot del vector store (workers nuevos) y precargarlo antes del primer chat.
+        #    Con RETRIEVAL_SERVICE_SOCKET el índice lo carga el servicio de recuperación, no cada worker.
+        try:
+            if not RETRIEVAL_SERVICE_SOCKET:
+                from app.rag.snapshot import ensure_snapshot, warm_up
+                manager = get_vector_store_manager()
+                if VECTOR_STORE_SNAPSHOT:
+                    await asyncio.to_thread(ensure_snapshot, VECTOR_STORE_SNAPSHOT, manager.persist_directory)
+                if VECTOR_STORE_WARM_ON_STARTUP:
+                    await asyncio.to_thread(warm_up, manager)
+        except Exception as e:
+            print(f"⚠️ Vector store warm-up skipped, it will load on first use: {e}")
+
+        # 4) Cargar el glosario en memoria
+        get_glossary_index()
+
+        # 5) Pre-generar pools de preguntas en segundo plano
+        if QUIZ_PREWARM_ON_STARTUP:
+            db = SessionLocal()
+            try:
+                for certification in db.query(Certification).filter(Certification.is_active == True).all():
+                    get_quiz_pool().schedule_refill(certification.code)
+            finally:
+                db.close()
+
     except Exception as e:
         print(f"❌ Error during application startup: {e}")
 
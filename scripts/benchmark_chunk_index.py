@@ -0,0 +1,115 @@
+import os
+import sys
+import statistics
+import tempfile
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ["OPENAI_API_KEY"] = os.environ.get("OPENAI_API_KEY") or "benchmark"
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from app.rag.vector_store import VectorStoreManager
+
+class RandomUnitEmbeddings(Embeddings):
+    """Cheap deterministic unit vectors so the benchmark measures the store, not the embedder"""
+
+    def __init__(self, size: int = 64):
+        self.size = size
+
+    def _vector(self, text: str):
+        rng = np.random.default_rng(abs(hash(text)) % (2 ** 32))
+        vector = rng.standard_normal(self.size)
+        return list(vector / np.linalg.norm(vector))
+
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+def build_corpus(manager, certifications: int, documents: int, chunks_per_document: int):
+    for c in range(certifications):
+        code = f"CERT-{c}"
+        for d in range(documents):
+            document_id = f"{c}-{d}"
+            chunks = [
+                Document(
+                    page_content=f"certification {c} document {d} chunk {i} " + "testing " * 20,
+                    metadata={"certification_code": code, "document_id": document_id, "document_type": "syllabus"}
+                )
+                for i in range(chunks_per_document)
+            ]
+            manager.add_chunks(chunks, code)
+
+def timed(fn, repeat: int):
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+def run_benchmark(certifications: int = 10, documents: int = 20, chunks_per_document: int = 500, repeat: int = 30):
+    total = certifications * documents * chunks_per_document
+    with tempfile.TemporaryDirectory() as directory:
+        manager = VectorStoreManager(persist_directory=directory)
+        manager.embeddings = RandomUnitEmbeddings()
+
+        start = time.perf_counter()
+        build_corpus(manager, certifications, documents, chunks_per_document)
+        print(f"Indexed {manager.count_chunks()} chunks (expected {total}) in {time.perf_counter() - start:.1f}s")
+
+        embedding = manager.embeddings.embed_query("what is testing")
+        def target(i):
+            c, d = i % certifications, (i * 7) % documents
+            return manager.get_store(f"CERT-{c}")._collection, f"CERT-{c}", f"{c}-{d}"
+
+        def search_where(i):
+            collection, _, document_id = target(i)
+            manager._query_collection(collection, embedding, 5, {"document_id": document_id})
+
+        def search_ids(i):
+            collection, _, document_id = target(i)
+            ids, _ = manager._restrict_to_ids(collection, {"document_id": document_id})
+            manager._query_collection(collection, embedding, 5, None, ids)
+
+        where_owned = lambda document_id: {"$or": [
+            {"document_id": {"$eq": document_id}}, {"document_ids": {"$contains": document_id}}
+        ]}
+
+        def lookup_scan(i):
+            _, _, document_id = target(i)
+            for name in manager._collection_names():
+                manager.client.get_collection(name).get(where=where_owned(document_id), include=["metadatas"])
+
+        def lookup_index(i):
+            _, _, document_id = target(i)
+            for name, ids in manager.chunk_index.chunks_for_document(document_id).items():
+                manager.client.get_collection(name).get(ids=ids, include=["metadatas"])
+
+        rows = [
+            ("document-scoped search, where filter", timed(search_where, repeat)),
+            ("document-scoped search, id restricted", timed(search_ids, repeat)),
+            ("delete lookup, metadata scan", timed(lookup_scan, repeat)),
+            ("delete lookup, side index", timed(lookup_index, repeat)),
+        ]
+        print(f"\n{total} chunks, {certifications} partitions, {documents} documents each, {repeat} runs")
+        print(f"{'operation':<42}{'median ms':>12}{'p95 ms':>10}")
+        for label, (median, p95) in rows:
+            print(f"{label:<42}{median:>12.2f}{p95:>10.2f}")
+
+        start = time.perf_counter()
+        manager.delete_document_by_id("0-0")
+        print(f"\ndelete_document_by_id ({chunks_per_document} chunks): {(time.perf_counter() - start) * 1000:.1f} ms")
+        assert manager.chunk_index.chunks_for_document("0-0") == {}
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark the chunk side index against metadata-filtered Chroma operations.")
+    parser.add_argument("--certifications", type=int, default=10)
+    parser.add_argument("--documents", type=int, default=20, help="Documents per certification.")
+    parser.add_argument("--chunks-per-document", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+    run_benchmark(args.certifications, args.documents, args.chunks_per_document, args.repeat)
@@ -0,0 +1,40 @@
+import os
+import re
+import subprocess
+import sys
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+def import_profile(module: str = "main"):
+    """Cumulative import time per top-level dependency of module, from python -X importtime"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            rows.append((int(match.group(2)) / 1e6, len(match.group(3)) // 2, match.group(4)))
+    return rows
+
+def run_benchmark(module: str = "main", runs: int = 5, top: int = 15):
+    profiles = [import_profile(module) for _ in range(runs)]
+    totals = [next(seconds for seconds, depth, name in profile if name == module and depth == 0) for profile in profiles]
+    print(f"import {module}: best {min(totals):.3f}s, worst {max(totals):.3f}s over {runs} runs")
+    print("\nSlowest direct imports (best run):")
+    best = profiles[totals.index(min(totals))]
+    direct = sorted(((seconds, name) for seconds, depth, name in best if depth == 1), reverse=True)[:top]
+    for seconds, name in direct:
+        print(f"  {seconds:8.3f}s  {name}")
+    return min(totals)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Measure how long importing the app takes and which imports dominate.")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=None, help="Exit with status 1 if the best run exceeds this many seconds.")
+    args = parser.parse_args()
+    best = run_benchmark(args.module, args.runs)
+    if args.budget is not None and best > args.budget:
+        print(f"\nOver budget: {best:.3f}s > {args.budget}s")
+        sys.exit(1)
@@ -0,0 +1,38 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.database.connection import SessionLocal, engine
+from app.models.certification import Certification
+from app.models.document import Document
+from app.models.exam import ExamQuestion
+from app.models.syllabus import BusinessOutcome, LearningObjective, SyllabusKeyword
+from app.certification.exam_index import index_sample_exam
+from app.certification.syllabus_index import index_syllabus
+
+INDEXERS = {
+    "sample_exam": index_sample_exam,
+    "syllabus": index_syllabus,
+}
+
+def index_structured_content():
+    """Index uploaded documents into the lookup tables (exam questions, business outcomes, LOs, keywords)"""
+    for meta in (ExamQuestion.metadata, BusinessOutcome.metadata, LearningObjective.metadata, SyllabusKeyword.metadata):
+        meta.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        documents = db.query(Document).filter(Document.document_type.in_(list(INDEXERS))).all()
+        for document in documents:
+            if not os.path.exists(document.file_path):
+                print(f"File not found: {document.file_path}")
+                continue
+            certification = db.query(Certification).filter(Certification.id == document.certification_id).first()
+            try:
+                INDEXERS[document.document_type](db, document.file_path, certification.code, document.id)
+            except Exception as e:
+                db.rollback()
+                print(f"Failed to index {document.file_path}: {e}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    index_structured_content()
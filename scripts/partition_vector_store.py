@@ -0,0 +1,56 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.rag.vector_store import LEGACY_COLLECTION, get_vector_store_manager
+
+BATCH_SIZE = 500
+
+def partition_vector_store(delete_legacy: bool = True) -> int:
+    """Move chunks from the shared collection into per-certification collections (no re-embedding)"""
+    manager = get_vector_store_manager()
+    if LEGACY_COLLECTION not in manager._collection_names():
+        print("No shared collection found, nothing to migrate.")
+        return 0
+
+    legacy = manager.vector_store._collection
+    moved_ids = []
+    offset = 0
+    while True:
+        batch = legacy.get(limit=BATCH_SIZE, offset=offset, include=["documents", "metadatas", "embeddings"])
+        if not batch["ids"]:
+            break
+        offset += len(batch["ids"])
+
+        # Group the batch by certification so each partition gets one upsert
+        groups = {}
+        for chunk_id, text, metadata, embedding in zip(batch["ids"], batch["documents"], batch["metadatas"], batch["embeddings"]):
+            code = (metadata or {}).get("certification_code")
+            if not code:
+                continue
+            group = groups.setdefault(code, {"ids": [], "documents": [], "metadatas": [], "embeddings": []})
+            group["ids"].append(chunk_id)
+            group["documents"].append(text)
+            group["metadatas"].append(metadata)
+            group["embeddings"].append(embedding)
+
+        for code, group in groups.items():
+            manager.get_store(code)._collection.upsert(**group)
+            moved_ids.extend(group["ids"])
+            print(f"Moved {len(group['ids'])} chunks to partition for {code}")
+
+    if delete_legacy:
+        for start in range(0, len(moved_ids), BATCH_SIZE):
+            legacy.delete(ids=moved_ids[start:start + BATCH_SIZE])
+        print("Removed migrated chunks from the shared collection.")
+
+    # Chunks were written straight to the collections, so refresh the side index
+    manager.rebuild_chunk_index()
+    print(f"Migration finished: {len(moved_ids)} chunks partitioned.")
+    return len(moved_ids)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Split the shared Chroma collection into per-certification collections.")
+    parser.add_argument("--keep-legacy", action="store_true", help="Do not delete chunks from the shared collection.")
+    args = parser.parse_args()
+    partition_vector_store(delete_legacy=not args.keep_legacy)
@@ -8,11 +8,8 @@ def process_pdf(file_path: str, metadata: dict):
         print(f"File not found: {file_path}")
         return False
 
-    with open(file_path, "rb") as f:
-        content = f.read()
-
     vector_store = get_vector_store_manager()
-    success = vector_store.add_pdf_to_rag(content, metadata)
+    success = vector_store.add_pdf_file_to_rag(file_path, metadata)
     if success:
         print(f"Successfully processed and vectorized PDF: {file_path}")
     else:
@@ -0,0 +1,33 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.config import RETRIEVAL_SERVICE_SOCKET, VECTOR_STORE_SNAPSHOT
+from app.rag.vector_store import VectorStoreManager
+from app.rag.snapshot import ensure_snapshot, warm_up
+from app.rag.retrieval_service import RetrievalServer
+
+DEFAULT_SOCKET = "/tmp/istqb-retrieval.sock"
+
+def serve(socket_path: str):
+    """Load the vector store once and serve it to every worker on this host"""
+    manager = VectorStoreManager()
+    if VECTOR_STORE_SNAPSHOT:
+        ensure_snapshot(VECTOR_STORE_SNAPSHOT, manager.persist_directory)
+    warm_up(manager)
+    server = RetrievalServer(manager, socket_path)
+    print(f"Retrieval service listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Run the shared retrieval service for the uvicorn workers on this host.")
+    parser.add_argument("--socket", default=RETRIEVAL_SERVICE_SOCKET or DEFAULT_SOCKET, help="Unix socket path (workers need RETRIEVAL_SERVICE_SOCKET set to the same path).")
+    args = parser.parse_args()
+    serve(args.socket)
@@ -0,0 +1,21 @@
+import sqlite3
+
+def scope_quiz_question_hashes(db_path: str):
+    """Make quiz question hashes unique per certification instead of across all of them"""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DROP INDEX IF EXISTS ix_quiz_questions_content_hash;")
+        cursor.execute("CREATE INDEX ix_quiz_questions_content_hash ON quiz_questions (content_hash);")
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS uq_quiz_certification_hash ON quiz_questions (certification_code, content_hash);")
+        conn.commit()
+        print("Quiz question hashes are now unique per certification.")
+    except sqlite3.OperationalError as e:
+        print(f"Error updating quiz_questions indexes: {e}")
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == "__main__":
+    db_path = "./istqb_assistant.db"
+    scope_quiz_question_hashes(db_path)
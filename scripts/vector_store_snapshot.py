@@ -0,0 +1,22 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.config import CHROMA_PERSIST_DIRECTORY
+from app.rag.snapshot import export_snapshot, import_snapshot
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Export or import a prebuilt vector store snapshot for fast worker boot.")
+    parser.add_argument("--persist-directory", default=CHROMA_PERSIST_DIRECTORY)
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    export_parser = subcommands.add_parser("export", help="Write the vector store to a .tar.gz archive.")
+    export_parser.add_argument("output", help="Path of the archive to create.")
+    import_parser = subcommands.add_parser("import", help="Replace the vector store with an archive.")
+    import_parser.add_argument("archive", help="Snapshot created with the export command.")
+    import_parser.add_argument("--force", action="store_true", help="Replace a non-empty vector store.")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_snapshot(args.persist_directory, args.output)
+    else:
+        import_snapshot(args.archive, args.persist_directory, force=args.force)
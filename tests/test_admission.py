@@ -0,0 +1,102 @@
+import threading
+import time
+import pytest
+from app.utils.admission import AdmissionController, estimate_tokens
+from app.utils.resilience import CircuitBreaker, Overloaded, ResilientCaller
+from tests.test_llm_resilience import FakeAPIError, FakeClock
+
+
+def controller(path, clock=None, queue_timeout=60, **limit):
+    clock = clock or FakeClock()
+
+    def sleep(seconds):
+        clock.now += seconds
+    return AdmissionController(str(path), {"chat": limit}, headroom=1.0, queue_timeout=queue_timeout, clock=clock, sleep=sleep)
+
+
+def test_requests_per_minute_bucket(tmp_path):
+    clock = FakeClock()
+    admission = controller(tmp_path / "a.sqlite3", clock, rpm=2)
+    admission.acquire("chat")
+    admission.acquire("chat")
+    assert clock.now == 0
+    admission.acquire("chat")
+    assert clock.now == pytest.approx(30, abs=0.1)  # waited for one request's worth of refill
+
+    impatient = controller(tmp_path / "b.sqlite3", FakeClock(), queue_timeout=10, rpm=1)
+    impatient.acquire("chat")
+    with pytest.raises(Overloaded):
+        impatient.acquire("chat")  # the 60s wait cannot fit in the 10s queue deadline
+    assert impatient.snapshot()["chat"]["waiting"] == 0
+
+
+def test_tokens_are_settled_from_usage(tmp_path):
+    admission = controller(tmp_path / "a.sqlite3", tpm=1000)
+    with admission.admit("chat", tokens=1000) as lease:
+        assert admission.snapshot()["chat"]["tokens_available"] == 0
+        lease["used_tokens"] = 200
+    assert admission.snapshot()["chat"]["tokens_available"] == 800
+    assert estimate_tokens(["x" * 400], max_output_tokens=50) == 151
+
+
+def test_budget_is_shared_between_workers(tmp_path):
+    clock = FakeClock()
+    worker_1 = controller(tmp_path / "shared.sqlite3", clock, rpm=1, tpm=0)
+    worker_2 = controller(tmp_path / "shared.sqlite3", clock, queue_timeout=5, rpm=1, tpm=0)
+    worker_1.acquire("chat")
+    with pytest.raises(Overloaded):
+        worker_2.acquire("chat")
+
+
+def test_rate_limited_responses_pause_every_worker(tmp_path):
+    clock = FakeClock()
+    admission = controller(tmp_path / "a.sqlite3", clock, rpm=100)
+    with pytest.raises(FakeAPIError):
+        with admission.admit("chat"):
+            raise FakeAPIError(429, "5")
+    admission.acquire("chat")
+    assert clock.now == pytest.approx(5)
+
+
+
+def test_default_limits_skip_admission(tmp_path):
+    admission = controller(tmp_path / "a.sqlite3")
+    with pytest.raises(FakeAPIError):
+        with admission.admit("chat") as lease:
+            assert lease["id"] is None
+            raise FakeAPIError(429, "5")
+    assert admission.snapshot() == {}  # no lease, no pause recorded
+
+def test_queue_is_fair_between_users(tmp_path):
+    admission = AdmissionController(str(tmp_path / "a.sqlite3"), {"chat": {"concurrency": 2}})
+    busy = [admission.acquire("chat", "alice"), admission.acquire("chat", "alice")]
+    admitted = []
+
+    def ask(user):
+        lease = admission.acquire("chat", user, timeout=5)
+        admitted.append(user)
+        time.sleep(0.05)
+        admission.release(lease)
+
+    alice = threading.Thread(target=ask, args=("alice",))
+    alice.start()
+    time.sleep(0.1)  # alice queued first...
+    bob = threading.Thread(target=ask, args=("bob",))
+    bob.start()
+    time.sleep(0.1)
+    admission.release(busy[0])
+    bob.join()
+    admission.release(busy[1])
+    alice.join()
+    assert admitted == ["bob", "alice"]  # ...but alice still has a call in flight and bob has none
+
+
+def test_overload_does_not_trip_the_circuit_breaker():
+    caller = ResilientCaller("chat", breaker=CircuitBreaker(failure_threshold=1))
+
+    def fn(timeout):
+        raise Overloaded("no capacity")
+
+    with pytest.raises(Overloaded):
+        caller.call(fn)
+    assert caller.breaker.state == CircuitBreaker.CLOSED and caller.snapshot()["rejected"] == 1
@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database.connection import Base
+from app.models.certification import Certification
+from app.models.document import Document
+from app.models.exam import ExamQuestion
+from app.models.syllabus import BusinessOutcome, LearningObjective, SyllabusKeyword
+from app.certification import routes
+
+
+class FakeVectorStore:
+    def __init__(self):
+        self.calls = []
+
+    def delete_certification_documents(self, certification_code):
+        self.calls.append(("drop", certification_code))
+
+    def delete_document_by_id(self, document_id):
+        self.calls.append(("delete", document_id))
+        return True
+
+    def add_pdf_file_to_rag(self, file_path, metadata, content_hash=None):
+        self.calls.append(("add", str(metadata["document_id"]), content_hash))
+        return True
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine, tables=[t.__table__ for t in (Certification, Document, ExamQuestion, BusinessOutcome, LearningObjective, SyllabusKeyword)])
+    db = sessionmaker(bind=engine)()
+    db.add(Certification(id=1, code="CTFL", name="Certified Tester Foundation Level", url="https://istqb.org"))
+    stored = tmp_path / "notes.pdf"
+    stored.write_bytes(b"%PDF-1.4")
+    db.add(Document(id=1, certification_id=1, title="Notes", document_type="notes", file_path=str(stored), content_hash="a", is_processed=True))
+    db.add(Document(id=2, certification_id=1, title="Lost", document_type="notes", file_path=str(tmp_path / "lost.pdf"), content_hash="b", is_processed=True))
+    db.commit()
+    return db
+
+
+def test_reprocess_keeps_documents_whose_file_is_missing(db, monkeypatch):
+    store = FakeVectorStore()
+    monkeypatch.setattr(routes, "get_vector_store_manager_safe", lambda: store)
+    result = asyncio.run(routes.reprocess_certification_documents(1, db=db, admin_user=None))
+
+    assert store.calls == [("delete", "1"), ("add", "1", "a")]  # the stored hash is reused, not recomputed
+    assert result["processed_count"] == 1 and result["missing_files"] == [2]
+    assert db.get(Document, 2).is_processed is True
+
+
+def test_delete_drops_the_structured_indexes(db, monkeypatch):
+    db.add(ExamQuestion(certification_code="CTFL", exam_label="A", question_number="1", question_text="Q"))
+    db.add(ExamQuestion(certification_code="CT-GenAI", exam_label="A", question_number="1", question_text="Q"))
+    db.add(BusinessOutcome(certification_code="CTFL", code="FL-BO1", description="Understand testing", position=0))
+    db.add(SyllabusKeyword(certification_code="CTFL", chapter="1", term="coverage", position=0))
+    db.commit()
+    store = FakeVectorStore()
+    monkeypatch.setattr(routes, "get_vector_store_manager_safe", lambda: store)
+    evicted = []
+    monkeypatch.setattr(routes, "evict_page_texts", evicted.append)
+    asyncio.run(routes.delete_certification(1, db=db, admin_user=None))
+
+    assert db.get(Certification, 1).is_active is False and store.calls == [("drop", "CTFL")]
+    assert [row.certification_code for row in db.query(ExamQuestion)] == ["CT-GenAI"]
+    assert db.query(BusinessOutcome).count() == 0 and db.query(SyllabusKeyword).count() == 0
+    assert sorted(evicted) == ["a", "b"]  # cached page texts of its documents
@@ -0,0 +1,133 @@
+import asyncio
+import time
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.database.connection import Base
+from app.models.user import User
+from app.models.certification import Certification
+from app.models.chat import ChatMessage as ChatMessageModel
+from app.schemas.chat import ChatMessage
+from app.chat import routes, query_rewriter
+from app.utils.responses import direct_response
+
+STAGE_SECONDS = 0.3
+RAG_RESULT = {"context": "Test levels are ...", "sources": [{"title": "CTFL"}], "retrieval_successful": True}
+
+
+class FakeOpenAIClient:
+    calls = []
+
+    async def generate_response(self, message, context=None, certification_code=None, rag_result=None, static_context="", user_id=None):
+        self.calls.append({"context": context, "rag_result": rag_result, "static_context": static_context})
+        return {"response": "answer", "usage": {"total_tokens": 1}, "rag_info": None}
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(User(id=1, username="tester", email="tester@example.com", hashed_password="x"))
+    db.add(Certification(code="CTFL-v4.0", name="Certified Tester Foundation Level", url="https://istqb.org"))
+    for i in range(25):
+        db.add(ChatMessageModel(user_id=1, conversation_id="c1", sender="user", message=f"message {i}"))
+    db.commit()
+    return db
+
+
+@pytest.fixture
+def slow_stages(monkeypatch):
+    FakeOpenAIClient.calls = []
+    monkeypatch.setattr(query_rewriter, "_conversation_states", None)
+    load_history = routes.load_recent_history
+
+    def slow_history(*args, **kwargs):
+        time.sleep(STAGE_SECONDS)
+        return load_history(*args, **kwargs)
+
+    def slow_retrieval(message, certification_code=None, k=None):
+        time.sleep(STAGE_SECONDS)
+        return RAG_RESULT
+
+    monkeypatch.setattr(routes, "load_recent_history", slow_history)
+    monkeypatch.setattr(routes, "retrieve_context", slow_retrieval)
+    monkeypatch.setattr(routes, "OpenAIClient", FakeOpenAIClient)
+
+
+def chat(db, message, certification_code=None):
+    user = db.get(User, 1)
+    request = ChatMessage(message=message, conversation_id="c1", certification_code=certification_code)
+    return asyncio.run(routes.chat_with_assistant(request, current_user=user, db=db))
+
+
+def test_history_and_retrieval_overlap(db, slow_stages):
+    start = time.perf_counter()
+    response = chat(db, "Explain test levels", "CTFL-v4.0")
+    elapsed = time.perf_counter() - start
+
+    assert response.response == "answer"
+    assert elapsed < 2 * STAGE_SECONDS * 0.9  # max of the stages, not their sum
+    call = FakeOpenAIClient.calls[0]
+    assert call["rag_result"] == RAG_RESULT
+    # 19 most recent messages in chronological order, then the new one
+    assert [m["content"] for m in call["context"]][:2] == ["message 6", "message 7"]
+    assert call["context"][-1] == {"role": "user", "content": "Explain test levels"}
+
+
+def test_direct_answers_skip_the_model(db, slow_stages, monkeypatch):
+    monkeypatch.setattr(routes, "route_message", lambda db, message, cert: direct_response("from the tables", []))
+    assert chat(db, "What are the business outcomes?").response == "from the tables"
+    assert FakeOpenAIClient.calls == []
+
+
+def test_unused_retrievals_do_not_outlive_the_request(db, slow_stages, monkeypatch):
+    started = []
+    start_retrieval = routes._start_retrieval
+    monkeypatch.setattr(routes, "_start_retrieval", lambda *args: started.append(start_retrieval(*args)) or started[-1])
+    monkeypatch.setattr(routes, "retrieve_context", lambda *args, **kwargs: time.sleep(3 * STAGE_SECONDS) or RAG_RESULT)
+    monkeypatch.setattr(routes, "route_message", lambda db, message, cert: direct_response("from the tables", []))
+    request = ChatMessage(message="What are the business outcomes?", conversation_id="c1", certification_code="CTFL-v4.0")
+
+    async def scenario():
+        response = await routes.chat_with_assistant(request, current_user=db.get(User, 1), db=db)
+        await asyncio.sleep(0)  # let the cancellation land
+        return response.response, started[0].cancelled()
+
+    assert asyncio.run(scenario()) == ("from the tables", True)
+
+
+def test_follow_ups_answer_from_history_without_retrieval(db, slow_stages, monkeypatch):
+    db.add(ChatMessageModel(user_id=1, conversation_id="c1", sender="assistant", message="Test levels are ..."))
+    db.commit()
+    monkeypatch.setattr(routes, "retrieve_context", lambda *args, **kwargs: pytest.fail("retrieval should be skipped"))
+    chat(db, "explain that more simply")
+    assert FakeOpenAIClient.calls[0]["rag_result"]["retrieval_successful"] is False
+
+
+def test_follow_up_questions_are_retrieved_as_standalone_queries(db, slow_stages, monkeypatch):
+    queries = []
+    monkeypatch.setattr(routes, "retrieve_context", lambda query, certification_code=None, k=None: queries.append((query, certification_code)) or RAG_RESULT)
+    chat(db, "What are the learning objectives of section 2 in the foundation level?")
+    chat(db, "and what about section 3?")
+    assert queries[-1] == ("What are the learning objectives of section 3 in the foundation level?", "CTFL-v4.0")
+
+
+def test_cached_state_follows_certification_switches_and_other_workers(db, slow_stages, monkeypatch):
+    db.add(Certification(code="CT-GenAI", name="Certified Tester Testing with Generative AI", url="https://istqb.org"))
+    db.commit()
+    queries, routed = [], []
+    monkeypatch.setattr(routes, "retrieve_context", lambda query, certification_code=None, k=None: queries.append((query, certification_code)) or RAG_RESULT)
+    monkeypatch.setattr(routes, "route_message", lambda db, message, cert: routed.append(cert))
+
+    chat(db, "What are the learning objectives of section 2 in the foundation level?")
+    chat(db, "What are the business outcomes of GenAI?")
+    assert routed[-1] == "CT-GenAI" and queries[-1][1] == "CT-GenAI"
+
+    # Another worker answers the next turn; this worker's cached state is behind and is rebuilt from the history
+    for sender, message in (("user", "What is prompt chaining?"), ("assistant", "Prompt chaining is ...")):
+        db.add(ChatMessageModel(user_id=1, conversation_id="c1", sender=sender, message=message))
+    db.commit()
+    chat(db, "and what about few-shot prompting?")
+    assert queries[-1] == ("what is few-shot prompting?", "CT-GenAI")
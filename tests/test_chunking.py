@@ -0,0 +1,60 @@
+from langchain_core.documents import Document
+from app.rag.chunking import SyllabusSplitter
+
+HEADER = "Certified Tester Syllabus\nv1.0 Page {n} of 9\n© International Software Testing Qualifications Board\n"
+
+PAGES = [
+    "Table of Contents\n" + "\n".join(f"1.{i} Topic {i} ........................ {i}" for i in range(1, 7)),
+    "1 Fundamentals of Testing – 180 minutes\n"
+    "1.1 What is Testing?\n"
+    "FL-1.1.1 (K1) Identify typical test objectives\n"
+    "1.1 What is Testing?\n"
+    "Software testing assesses software quality.",
+    "1.1.1. Test Objectives\n"
+    "Typical test objectives are evaluating work products and triggering failures.\n"
+    "1. Evaluating work products such as requirements",
+    "1.1.2 Testing and Debugging\n"
+    "Testing and debugging are separate activities.",
+]
+
+
+def make_pages():
+    return [
+        Document(page_content=HEADER.format(n=i + 1) + text, metadata={"page": i, "title": "CTFL Syllabus"})
+        for i, text in enumerate(PAGES)
+    ]
+
+
+def test_chunks_start_with_their_heading_and_carry_section_metadata():
+    chunks = SyllabusSplitter().split_documents(make_pages())
+    by_section = {chunk.metadata["section"]: chunk for chunk in chunks}
+
+    objectives = by_section["1.1.1"]
+    assert objectives.page_content.startswith("1.1.1 Test Objectives\n")
+    assert objectives.metadata["page"] == 2
+    assert objectives.metadata["learning_objective"] == "FL-1.1.1"
+    assert objectives.metadata["k_level"] == "K1"
+    assert objectives.metadata["title"] == "CTFL Syllabus"
+    # Numbered list items inside the body are not mistaken for headings
+    assert "1. Evaluating work products" in objectives.page_content
+
+
+def test_boilerplate_and_table_of_contents_are_dropped():
+    chunks = SyllabusSplitter().split_documents(make_pages())
+    text = "\n".join(chunk.page_content for chunk in chunks)
+    assert "Page" not in text
+    assert "Topic" not in text
+
+
+def test_empty_chapter_heading_is_carried_into_next_chunk():
+    chunks = SyllabusSplitter().split_documents(make_pages())
+    assert chunks[0].page_content.startswith("1 Fundamentals of Testing – 180 minutes\n1.1 What is Testing?")
+
+
+def test_long_sections_are_split_without_losing_heading():
+    body = "\n".join(f"Sentence number {i} about testing." for i in range(200))
+    pages = [Document(page_content="2.1 Testing in the SDLC\n" + body, metadata={"page": 0})]
+    chunks = SyllabusSplitter(chunk_size=500).split_documents(pages)
+    assert len(chunks) > 1
+    assert all(chunk.page_content.startswith("2.1 Testing in the SDLC\n") for chunk in chunks)
+    assert all(len(chunk.page_content) <= 500 for chunk in chunks)
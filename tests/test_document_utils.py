@@ -0,0 +1,17 @@
+import asyncio
+import hashlib
+import io
+from fastapi import UploadFile
+from app.utils.document_utils import UPLOAD_CHUNK_SIZE, calculate_file_hash, save_upload_with_hash
+
+def test_save_upload_with_hash_streams_to_disk(tmp_path):
+    content = b"%PDF-1.7 " + b"x" * (UPLOAD_CHUNK_SIZE * 2 + 123)
+    upload = UploadFile(file=io.BytesIO(content), filename="exam.pdf")
+    destination = tmp_path / "exam.pdf"
+
+    content_hash, size = asyncio.run(save_upload_with_hash(upload, str(destination)))
+
+    assert size == len(content)
+    assert content_hash == hashlib.sha256(content).hexdigest()
+    assert destination.read_bytes() == content
+    assert calculate_file_hash(str(destination)) == content_hash
@@ -0,0 +1,112 @@
+import json
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database.connection import Base
+from app.models.certification import Certification
+from app.models.exam import ExamQuestion
+from app.certification.exam_index import (
+    answer_exam_question, find_exam_reference, parse_answers, parse_questions
+)
+
+HEADER = "Certified Tester Foundation Level Sample Exam set A\nv1.7 Page {n} of 9\n© International Software Testing Qualifications Board\n"
+
+QUESTION_PAGES = [
+    "Table of Contents\n" + "\n".join(f"Question #{i} (1 Point) ........................ {i + 3}" for i in range(1, 7)),
+    "Question #1 (1 Point)\n"
+    "Which of the following is a typical test objective?\n"
+    "Select ONE option.\n"
+    "a) Finding defects\n"
+    "b) Debugging the code\n"
+    "c) Fixing failures in the test object so that they do not occur\n"
+    "again\n"
+    "d) Writing requirements",
+    "Question #2 (2 Points)\n"
+    "Which TWO statements are true?\n"
+    "Select TWO options.\n"
+    "a) One\n"
+    "b) Two\n"
+    "c) Three\n"
+    "d) Four\n"
+    "e) Five",
+]
+
+ANSWER_PAGES = [
+    "Answer Key\n1 a FL-1.1.1 K1 1 2 a, e FL-1.2.1 K2 2",
+    "1 a a) Is correct. Finding defects is a test objective\n"
+    "b) Is not correct. Debugging is not testing\n"
+    "FL-1.1.1 K1 1",
+    "2 a, e a) Is correct.\n"
+    "e) Is correct.\n"
+    "FL-1.2.1\n"
+    "K2 2",
+]
+
+
+def with_header(pages):
+    return [HEADER.format(n=i + 1) + text for i, text in enumerate(pages)]
+
+
+def test_parse_questions_pairs_stem_and_options():
+    questions = parse_questions(with_header(QUESTION_PAGES))
+
+    assert sorted(questions) == ["1", "2"]
+    first = questions["1"]
+    assert first["question_text"] == "Which of the following is a typical test objective?"
+    assert [opt["letter"] for opt in first["options"]] == ["a", "b", "c", "d"]
+    # Wrapped option text is joined, running headers are dropped
+    assert first["options"][2]["text"] == "Fixing failures in the test object so that they do not occur again"
+    assert questions["2"]["points"] == 2
+    assert len(questions["2"]["options"]) == 5
+
+
+def test_parse_answers_reads_key_and_rationale():
+    answers = parse_answers(with_header(ANSWER_PAGES))
+
+    assert answers["1"]["correct_answer"] == "a"
+    assert answers["1"]["rationale"].startswith("a) Is correct.")
+    assert answers["1"]["k_level"] == "K1"
+    # LO and K-level columns split over two lines
+    assert answers["2"]["correct_answer"] == "a, e"
+    assert answers["2"]["learning_objective"] == "FL-1.2.1"
+    assert answers["2"]["rationale"] == "a) Is correct.\ne) Is correct."
+
+
+def test_find_exam_reference():
+    assert find_exam_reference("explain question 17 of exam A") == ("A", "17")
+    assert find_exam_reference("Explícame la pregunta 5 del examen B") == ("B", "5")
+    assert find_exam_reference("exam B question 3") == ("B", "3")
+    assert find_exam_reference("sample exam question #A7") == (None, "A7")
+    assert find_exam_reference("question 12 from set B") == ("B", "12")
+    assert find_exam_reference("what is a test level?") is None
+
+
+def test_find_exam_reference_needs_the_exam_next_to_the_number():
+    assert find_exam_reference("In question 3 of my homework, what is a test oracle?") is None
+    assert find_exam_reference("I have a question 2 things about exam a") is None
+    assert find_exam_reference("explain question 3") is None
+
+
+def test_answer_exam_question_by_keyed_lookup():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine, tables=[Certification.__table__, ExamQuestion.__table__])
+    db = sessionmaker(bind=engine)()
+    db.add(Certification(code="CTFL", name="Certified Tester Foundation Level", url="https://istqb.org"))
+    db.add(ExamQuestion(
+        certification_code="CTFL", exam_label="A", question_number="1",
+        question_text="Which of the following is a typical test objective?",
+        options=json.dumps([{"letter": "a", "text": "Finding defects"}]),
+        correct_answer="a", rationale="a) Is correct.", learning_objective="FL-1.1.1", k_level="K1", points=1
+    ))
+    db.commit()
+
+    result = answer_exam_question(db, "Explain question 1 of exam A", "CTFL")
+    assert "Correct answer\na" in result["response"]
+    assert "FL-1.1.1" in result["response"]
+    assert result["usage"]["total_tokens"] == 0
+
+    assert answer_exam_question(db, "Explain question 2 of exam A", "CTFL") is None
+    assert answer_exam_question(db, "Explain question 1 of exam A", "GenAI") is None
+
+    # A deactivated certification is no longer answered from its index
+    db.query(Certification).filter_by(code="CTFL").update({"is_active": False})
+    assert answer_exam_question(db, "Explain question 1 of exam A", None) is None
@@ -0,0 +1,66 @@
+import json
+import pytest
+from app.glossary import index as glossary
+from app.glossary.index import GlossaryIndex, find_definition_request, load_glossary, answer_glossary_definition
+
+ENTRIES = [
+    {"term": "regression testing", "definition": "A type of change-related testing to detect whether defects have been introduced."},
+    {"term": "test oracle", "definition": "A source to determine an expected result.", "synonyms": ["oracle"]},
+    {"term": "equivalence partitioning", "definition": "A black-box test technique based on equivalence partitions.", "abbreviation": "EP"},
+    {"term": "test", "definition": "A set of one or more test cases."},
+]
+
+
+@pytest.fixture
+def index(monkeypatch):
+    index = GlossaryIndex(ENTRIES)
+    monkeypatch.setattr(glossary, "_glossary_index", index)
+    return index
+
+
+def test_exact_synonym_and_plural_lookup(index):
+    assert index.lookup("Regression-Testing")[0]["term"] == "regression testing"
+    assert index.lookup("oracle")[0]["term"] == "test oracle"
+    assert index.lookup("EP")[0]["term"] == "equivalence partitioning"
+    assert index.lookup("test oracles") == (index.entries[1], 0)
+
+
+def test_fuzzy_lookup_tolerates_typos(index):
+    entry, distance = index.lookup("equivalense partitoning")
+    assert entry["term"] == "equivalence partitioning"
+    assert distance == 2
+    assert index.lookup("tset") is None  # short terms must match exactly
+    assert index.lookup("performance testing") is None
+
+
+def test_find_terms_prefers_longest_phrases(index):
+    terms = [entry["term"] for entry in index.find_terms("How do I pick a test oracle for regression testing?")]
+    assert terms == ["test oracle", "regression testing"]
+    assert "test oracle: A source" in index.context_for("what about the test oracle")
+
+
+def test_find_definition_request():
+    assert find_definition_request("What is a test oracle?") == "test oracle"
+    assert find_definition_request("¿Qué es un defecto?") == "defecto"
+    assert find_definition_request("define EP according to the ISTQB glossary") == "EP"
+    assert find_definition_request("How do test levels relate?") is None
+
+
+def test_answer_glossary_definition(index):
+    result = answer_glossary_definition(None, "what is regresion testing?")
+    assert result["response"].startswith('Showing the ISTQB definition of "regression testing".')
+    assert result["usage"]["total_tokens"] == 0
+    assert answer_glossary_definition(None, "what is the difference between test levels and test types?") is None
+
+
+def test_load_glossary_from_json_and_csv(tmp_path):
+    json_path = tmp_path / "glossary.json"
+    json_path.write_text(json.dumps({"terms": ENTRIES}), encoding="utf-8")
+    assert len(load_glossary(str(json_path))) == 4
+
+    csv_path = tmp_path / "glossary.csv"
+    csv_path.write_text("Term,Definition,Synonyms\ntest oracle,A source to determine an expected result.,oracle; expected result source\n", encoding="utf-8")
+    index = load_glossary(str(csv_path))
+    assert index.lookup("expected result source")[0]["term"] == "test oracle"
+
+    assert len(load_glossary(str(tmp_path / "missing.json"))) == 0
@@ -0,0 +1,92 @@
+import threading
+import time
+import pytest
+from langchain_core.documents import Document
+from app.rag import vector_store
+from app.rag.ingest import batched, iter_chunks, prefetch
+from tests.test_vector_store import manager  # noqa: F401 (fixture)
+
+PAGES = 60
+
+
+def test_prefetch_is_bounded_by_the_consumer():
+    produced = []
+
+    def items():
+        for i in range(20):
+            produced.append(i)
+            yield i
+
+    consumed = []
+    for item in prefetch(items(), max_ahead=2):
+        time.sleep(0.005)  # slow consumer (embedding)
+        assert len(produced) <= len(consumed) + 1 + 2 + 1  # this item, the queue, one blocked in put()
+        consumed.append(item)
+    assert consumed == list(range(20))
+
+
+def test_prefetch_propagates_errors_and_stops_early():
+    def failing():
+        yield 1
+        raise ValueError("corrupt page")
+
+    with pytest.raises(ValueError, match="corrupt page"):
+        list(prefetch(failing(), max_ahead=1))
+
+    stopped = threading.Event()
+
+    def endless():
+        try:
+            i = 0
+            while True:
+                yield i
+                i += 1
+        finally:
+            stopped.set()
+
+    for item in prefetch(endless(), max_ahead=1):
+        if item == 3:
+            break
+    assert stopped.wait(2)
+
+
+def test_batched_and_page_by_page_splitting(manager):
+    assert list(batched(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    pages = [Document(page_content="word " * 500, metadata={"page": i}) for i in range(3)]
+    chunks = list(iter_chunks(manager.text_splitter, iter(pages)))
+    assert {chunk.metadata["page"] for chunk in chunks} == {0, 1, 2} and len(chunks) == 6
+
+
+def test_ingest_pdf_streams_batches_into_the_index(manager, monkeypatch):
+    parsed = []
+
+    def fake_pages(file_path, metadata, content_hash=None):
+        for i in range(PAGES):
+            parsed.append(i)
+            yield Document(page_content=f"Page {i} explains test technique number {i}.", metadata=dict(metadata, page=i))
+
+    monkeypatch.setattr(vector_store, "iter_pdf_pages", fake_pages)
+    parsed_at_upsert = []
+    add_chunks = manager.add_chunks
+
+    def recording_add_chunks(chunks, certification_code=None):
+        parsed_at_upsert.append(len(parsed))
+        return add_chunks(chunks, certification_code)
+
+    monkeypatch.setattr(manager, "add_chunks", recording_add_chunks)
+    metadata = {"certification_code": "CTFL", "document_id": 7, "document_type": "sample_exam"}
+    totals = manager.ingest_pdf("bundle.pdf", metadata, batch_size=5, prefetch_batches=1)
+
+    assert totals["batches"] == PAGES // 5 and totals["chunks"] == totals["added"] == PAGES
+    assert parsed_at_upsert[0] < PAGES // 2  # the first batch was upserted long before parsing finished
+    docs = manager.search_similar("Page 42 explains test technique number 42.", k=1)
+    assert docs[0].metadata["document_id"] == "7" and docs[0].metadata["page"] == 42
+
+
+def test_add_pdf_file_to_rag_reports_failures(manager, monkeypatch):
+    def broken_pages(file_path, metadata, content_hash=None):
+        yield Document(page_content="first page", metadata=dict(metadata, page=0))
+        raise OSError("truncated file")
+
+    monkeypatch.setattr(vector_store, "iter_pdf_pages", broken_pages)
+    assert manager.add_pdf_file_to_rag("broken.pdf", {"certification_code": "CTFL", "document_type": "sample_exam"}) is False
@@ -0,0 +1,195 @@
+import asyncio
+import time
+import pytest
+from types import SimpleNamespace
+from fastapi import HTTPException
+from app.chat import fallback_answers
+from app.chat.fallback_answers import extractive_answer, is_cacheable
+from app.chat.openai_client import OpenAIClient
+from app.utils import resilience
+from app.utils.resilience import (
+    CircuitBreaker, CircuitOpenError, DeadlineExceeded, ResilientCaller, is_retryable, parse_hedge_setting, retry_after_seconds
+)
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers={"retry-after": retry_after} if retry_after else {})
+
+
+class APITimeoutError(Exception):
+    pass
+
+
+def flaky(*errors, result="ok"):
+    """fn(timeout) that raises the given errors in turn, then returns result"""
+    calls = []
+
+    def fn(timeout):
+        calls.append(timeout)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+    return fn, calls
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_error_classification():
+    assert is_retryable(FakeAPIError(429)) and is_retryable(FakeAPIError(503)) and is_retryable(APITimeoutError())
+    assert not is_retryable(FakeAPIError(400)) and not is_retryable(ValueError("bad prompt"))
+    assert retry_after_seconds(FakeAPIError(429, "2")) == 2.0
+    assert retry_after_seconds(FakeAPIError(429)) is None
+    assert parse_hedge_setting("") is None and parse_hedge_setting("p95") == "p95" and parse_hedge_setting("800") == 0.8
+
+
+def test_retries_transient_errors_with_backoff():
+    sleeps = []
+    caller = ResilientCaller("chat", max_retries=2, base_delay=0.01, sleep=sleeps.append)
+    fn, calls = flaky(FakeAPIError(429, "0.05"), FakeAPIError(502))
+    assert caller.call(fn, timeout=5) == "ok"
+    assert len(calls) == 3 and sleeps[0] == 0.05 and 0 <= sleeps[1] <= 0.02
+    assert calls[1] < calls[0]  # each attempt gets what is left of the deadline
+
+
+def test_gives_up_on_client_errors_and_after_max_retries():
+    caller = ResilientCaller("chat", max_retries=1, base_delay=0, sleep=lambda s: None)
+    fn, calls = flaky(FakeAPIError(400))
+    with pytest.raises(FakeAPIError):
+        caller.call(fn)
+    assert len(calls) == 1 and caller.breaker.state == CircuitBreaker.CLOSED
+
+    fn, calls = flaky(FakeAPIError(500), FakeAPIError(500), FakeAPIError(500))
+    with pytest.raises(FakeAPIError):
+        caller.call(fn)
+    assert len(calls) == 2 and caller.snapshot()["failures"] == 1
+
+
+def test_retries_stop_at_the_deadline():
+    caller = ResilientCaller("chat", max_retries=5, sleep=lambda s: None)
+    fn, calls = flaky(FakeAPIError(429, "10"))
+    with pytest.raises(FakeAPIError):
+        caller.call(fn, timeout=1)  # waiting 10s as asked would overrun the deadline
+    assert len(calls) == 1
+
+
+def test_circuit_breaker_opens_and_probes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30, clock=clock)
+    caller = ResilientCaller("chat", max_retries=0, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(FakeAPIError):
+            caller.call(flaky(FakeAPIError(503))[0])
+    assert breaker.state == CircuitBreaker.OPEN
+
+    fn, calls = flaky()
+    with pytest.raises(CircuitOpenError):
+        caller.call(fn)
+    assert calls == []
+
+    clock.now = 31
+    assert breaker.allow() and not breaker.allow()  # one probe at a time
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 62
+    assert caller.call(fn) == "ok" and breaker.state == CircuitBreaker.CLOSED
+
+
+def test_hedged_request_wins_when_the_first_is_slow():
+    attempts = []
+
+    def fn(timeout):
+        attempts.append(timeout)
+        if len(attempts) == 1:
+            time.sleep(0.5)
+            return "slow"
+        return "fast"
+
+    caller = ResilientCaller("chat", hedge_after=0.05)
+    start = time.perf_counter()
+    assert caller.call(fn, timeout=5) == "fast"
+    assert time.perf_counter() - start < 0.4
+    assert caller.snapshot()["hedges"] == 1 and caller.snapshot()["hedge_wins"] == 1
+
+
+def test_hedge_after_p95_needs_samples():
+    caller = ResilientCaller("chat", hedge_after="p95")
+    for _ in range(resilience.MIN_HEDGE_SAMPLES - 1):
+        caller.call(lambda timeout: "ok", key="small")
+    assert caller.hedge_delay("small") is None
+    caller.call(lambda timeout: "ok", key="small")
+    assert caller.hedge_delay("small") is not None and caller.hedge_delay("default") is None
+
+
+def test_hedged_attempts_respect_the_deadline():
+    caller = ResilientCaller("chat", max_retries=0, hedge_after=0.02)
+    with pytest.raises(DeadlineExceeded):
+        caller.call(lambda timeout: time.sleep(0.3), timeout=0.1)
+
+
+def test_ingestion_has_its_own_embeddings_breaker(monkeypatch):
+    monkeypatch.setattr(resilience, "_callers", {})
+    ingest = resilience.get_resilient_caller("ingest_embeddings")
+    for _ in range(ingest.breaker.failure_threshold):
+        ingest.breaker.record_failure()
+    assert ingest.breaker.state == CircuitBreaker.OPEN
+    assert resilience.get_resilient_caller("embeddings").breaker.allow()
+
+
+def test_extractive_answer():
+    rag_result = {"context": "Test levels are component, integration, system and acceptance testing. " * 40,
+                  "sources": [{"title": "CTFL", "section": "2.2"}], "retrieval_successful": True}
+    result = extractive_answer(rag_result, "test level: A specific instantiation of a test process.")
+    assert result["usage"]["degraded"] == "extractive" and result["rag_info"]["num_sources"] == 1
+    assert "test level: A specific" in result["response"] and "CTFL, Section 2.2" in result["response"]
+    assert len(result["response"]) < 1600 and "testing. ..." in result["response"]
+    assert extractive_answer({"context": "", "sources": [], "retrieval_successful": False}) is None
+    assert is_cacheable("What is a test oracle?") and not is_cacheable("and what about section 3?")
+
+
+@pytest.fixture
+def failing_client(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(resilience, "_callers", {"chat": ResilientCaller("chat", max_retries=0)})
+    monkeypatch.setattr(fallback_answers, "_answer_cache", None)
+    state = {"error": None}
+    reply = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="An oracle tells the expected result."))],
+                            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5, total_tokens=15, prompt_tokens_details=None))
+
+    def create(**kwargs):
+        if state["error"]:
+            raise state["error"]
+        return reply
+
+    client = OpenAIClient()
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return client, state
+
+
+def test_generate_response_degrades_when_openai_fails(failing_client):
+    client, state = failing_client
+    empty = {"context": "", "sources": [], "retrieval_successful": False}
+    first = asyncio.run(client.generate_response("What is a test oracle?", rag_result=empty))
+    assert first["usage"]["total_tokens"] == 15
+    first["response"] = "changed by the caller"  # the cache keeps its own copy
+
+    state["error"] = FakeAPIError(503)
+    cached = asyncio.run(client.generate_response("what is a test oracle", rag_result=empty))
+    assert cached["response"] == "An oracle tells the expected result." and cached["usage"]["degraded"] == "cache"
+
+    rag_result = {"context": "Regression testing confirms that changes did not break anything.", "sources": [], "retrieval_successful": True}
+    extractive = asyncio.run(client.generate_response("Why run regression tests?", rag_result=rag_result))
+    assert extractive["usage"]["degraded"] == "extractive" and "Regression testing confirms" in extractive["response"]
+
+    state["error"] = FakeAPIError(500)
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(client.generate_response("Why run regression tests?", rag_result=empty))
+    assert raised.value.status_code == 503 and "500" not in raised.value.detail
@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from app.chat import model_router
+from app.chat.model_router import ModelRouteMetrics, _load_json, choose_route, estimate_cost
+from app.chat.openai_client import OpenAIClient
+
+
+def test_choose_route():
+    assert choose_route("What is a test oracle?") == "small"
+    assert choose_route("regression testing", glossary_terms=1) == "small"
+    assert choose_route("Give me a quiz on chapter 2") == "complex"
+    assert choose_route("What is the difference between verification and validation?") == "complex"
+    assert choose_route("Create a study plan for CTFL in four weeks") == "complex"
+    assert choose_route("How should I organize regression testing in a team that releases every sprint?") == "default"
+
+
+def test_routes_and_prices_are_configurable():
+    routes = _load_json('{"small": {"model": "gpt-4.1-mini"}, "tiny": {"model": "x", "max_tokens": 10, "temperature": 0}}', model_router.DEFAULT_ROUTES)
+    assert routes["small"] == {"model": "gpt-4.1-mini", "max_tokens": 500, "temperature": 0.2}
+    assert routes["tiny"]["max_tokens"] == 10
+    assert _load_json("not json", model_router.DEFAULT_ROUTES) == model_router.DEFAULT_ROUTES
+
+
+def test_estimate_cost_discounts_cached_tokens():
+    assert estimate_cost("gpt-4o", 2000, 100) == pytest.approx((2000 * 2.5 + 100 * 10) / 1e6)
+    assert estimate_cost("gpt-4o", 2000, 100, cached_tokens=1024) == pytest.approx((976 * 2.5 + 1024 * 1.25 + 100 * 10) / 1e6)
+    assert estimate_cost("unknown-model", 10, 10) is None
+
+
+def test_metrics_per_route():
+    metrics = ModelRouteMetrics()
+    for latency in (100, 200, 300):
+        metrics.record("small", "gpt-4o-mini", latency, {"prompt_tokens": 1000, "completion_tokens": 100, "cached_tokens": 0})
+    metrics.record("default", "gpt-4o", 900, error=True)
+    report = metrics.snapshot()
+    assert report["small"]["calls"] == 3 and report["small"]["latency_ms_p50"] == 200
+    assert report["small"]["cost_usd"] == pytest.approx(3 * (1000 * 0.15 + 100 * 0.6) / 1e6)
+    assert report["default"]["errors"] == 1
+
+
+def test_generate_response_uses_the_route_model(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    metrics = ModelRouteMetrics()
+    monkeypatch.setattr(model_router, "_model_route_metrics", metrics)
+    calls = []
+    usage = SimpleNamespace(prompt_tokens=900, completion_tokens=40, total_tokens=940, prompt_tokens_details=None)
+    reply = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="A source to determine an expected result."))], usage=usage)
+    client = OpenAIClient()
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kwargs: calls.append(kwargs) or reply)))
+
+    rag_result = {"context": "", "sources": [], "retrieval_successful": False}
+    result = asyncio.run(client.generate_response("What is a test oracle?", rag_result=rag_result))
+
+    assert (calls[0]["model"], calls[0]["max_tokens"]) == ("gpt-4o-mini", 500)
+    assert (result["usage"]["route"], result["usage"]["model"]) == ("small", "gpt-4o-mini")
+    assert metrics.snapshot()["small"]["calls"] == 1
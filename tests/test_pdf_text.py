@@ -0,0 +1,58 @@
+import os
+import sys
+from app.rag.pdf_text import PypdfExtractor, create_extractor, evict_page_texts, extract_pages, iter_page_texts
+
+SAMPLE_PDF = os.path.join("uploads", "certifications", "Specialist", "GenAI", "ISTQB-CT-GenAI_Sample-Exam-A-Questions_v1.0.pdf")
+
+
+class CountingExtractor(PypdfExtractor):
+    def __init__(self):
+        super().__init__()
+        self.pages_extracted = 0
+
+    def iter_pages(self, file_path, start=0, stop=None):
+        for text in super().iter_pages(file_path, start, stop):
+            self.pages_extracted += 1
+            yield text
+
+
+def test_parallel_extraction_keeps_page_order():
+    sequential = list(PypdfExtractor().iter_pages(SAMPLE_PDF))
+    assert len(sequential) == 23
+    assert list(extract_pages(SAMPLE_PDF, PypdfExtractor(), workers=2)) == sequential
+
+
+def test_page_texts_are_cached_by_content_hash(tmp_path):
+    extractor = CountingExtractor()
+    first = list(iter_page_texts(SAMPLE_PDF, extractor, workers=1, cache_dir=str(tmp_path)))
+    assert extractor.pages_extracted == 23 and len(os.listdir(tmp_path)) == 1
+
+    # A copy of the same file under another name is served from the cache
+    copy = tmp_path / "copy.pdf"
+    copy.write_bytes(open(SAMPLE_PDF, "rb").read())
+    assert list(iter_page_texts(str(copy), extractor, workers=1, cache_dir=str(tmp_path))) == first
+    assert extractor.pages_extracted == 23
+
+
+def test_stored_hash_is_used_and_evicted(tmp_path, monkeypatch):
+    import app.utils.document_utils as document_utils
+    monkeypatch.setattr(document_utils, "calculate_file_hash", None)  # hashing the file again would fail
+    pages = list(iter_page_texts(SAMPLE_PDF, PypdfExtractor(), workers=1, cache_dir=str(tmp_path), content_hash="abc"))
+    assert len(pages) == 23 and os.listdir(tmp_path) == ["abc.pypdf.jsonl.gz"]
+
+    (tmp_path / "abc.pymupdf.jsonl.gz").write_bytes(b"")
+    (tmp_path / "abcd.pypdf.jsonl.gz").write_bytes(b"")
+    assert evict_page_texts("abc", cache_dir=str(tmp_path)) == 2
+    assert os.listdir(tmp_path) == ["abcd.pypdf.jsonl.gz"]
+
+
+def test_partial_extraction_is_not_cached(tmp_path):
+    pages = iter_page_texts(SAMPLE_PDF, PypdfExtractor(), workers=1, cache_dir=str(tmp_path))
+    next(pages)
+    pages.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_missing_pymupdf_falls_back_to_pypdf(monkeypatch):
+    monkeypatch.setitem(sys.modules, "fitz", None)  # makes "import fitz" raise ImportError
+    assert create_extractor("pymupdf").name == "pypdf"
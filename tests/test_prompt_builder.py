@@ -0,0 +1,44 @@
+import asyncio
+from types import SimpleNamespace
+from app.chat.prompt_builder import SYSTEM_PROMPT, build_messages, prompt_cache_key
+from app.chat.openai_client import OpenAIClient, cached_prompt_tokens
+
+BRIEF = "The user is studying the Certified Tester Foundation Level (CTFL-v4.0) certification."
+TURN_1 = [{"role": "user", "content": "What are test levels?"}]
+TURN_2 = TURN_1 + [{"role": "assistant", "content": "Test levels are ..."}, {"role": "user", "content": "And test types?"}]
+
+
+def test_volatile_context_goes_after_the_history():
+    messages = build_messages("And test types?", TURN_2, BRIEF, "test type: A group of test activities", "Chunk about test types")
+    assert [m["role"] for m in messages] == ["system", "system", "user", "assistant", "system", "user"]
+    assert messages[0]["content"] == SYSTEM_PROMPT
+    assert messages[4]["content"].startswith("ISTQB glossary definitions:\ntest type")
+    assert "Relevant ISTQB context:\nChunk about test types" in messages[4]["content"]
+    assert messages[-1] == {"role": "user", "content": "And test types?"}
+
+
+def test_prefix_is_stable_across_turns():
+    first = build_messages("What are test levels?", TURN_1, BRIEF, rag_context="Chunk about test levels")
+    second = build_messages("And test types?", TURN_2, BRIEF, rag_context="Chunk about test types")
+    # The next turn re-sends everything the previous turn sent before its retrieved context
+    assert second[:2] == first[:2]
+    assert second[2] == first[-1]
+    assert build_messages("hi")[-1] == {"role": "user", "content": "hi"}
+
+
+def test_usage_reports_cached_tokens(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    calls = []
+    usage = SimpleNamespace(prompt_tokens=1800, completion_tokens=50, total_tokens=1850,
+                            prompt_tokens_details=SimpleNamespace(cached_tokens=1536))
+    reply = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Test types are ..."))], usage=usage)
+    client = OpenAIClient()
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kwargs: calls.append(kwargs) or reply)))
+
+    rag_result = {"context": "Chunk", "sources": [], "retrieval_successful": True}
+    result = asyncio.run(client.generate_response("And test types?", TURN_2, "CTFL-v4.0", rag_result, BRIEF))
+
+    assert result["usage"]["cached_tokens"] == 1536
+    assert calls[0]["prompt_cache_key"] == prompt_cache_key("CTFL-v4.0") == "istqb-ctfl-v4.0"
+    assert calls[0]["messages"][1]["content"] == BRIEF
+    assert cached_prompt_tokens(SimpleNamespace(prompt_tokens_details=None)) == 0
@@ -0,0 +1,59 @@
+from app.chat.query_rewriter import (
+    ConversationStateCache, is_follow_up, rebuild_state, rewrite_query, update_state
+)
+
+CERTIFICATIONS = [("CTFL-v4.0", "Certified Tester Foundation Level"), ("CT-GenAI", "Certified Tester Testing with Generative AI")]
+
+
+def state_after(*messages):
+    state = None
+    for message in messages:
+        state = update_state(state, message, rewrite_query(message, state))
+    return state
+
+
+def test_section_follow_ups_reuse_the_active_topic():
+    state = state_after("What are the learning objectives of section 2?")
+    assert rewrite_query("and what about section 3?", state) == "What are the learning objectives of section 3?"
+    assert rewrite_query("Chapter 4", state_after("What are test techniques?")) == "What are test techniques in Chapter 4"
+
+
+def test_continuations_and_pronouns():
+    state = state_after("What are test levels?")
+    assert rewrite_query("And what about test types?", state) == "what are test types?"
+    assert rewrite_query("why is it important?", state) == "why is test levels important?"
+    # Standalone questions, small talk and rework requests are left alone
+    assert rewrite_query("How do I plan regression testing in agile teams?", state) == "How do I plan regression testing in agile teams?"
+    assert rewrite_query("thanks!", state) == "thanks!"
+    assert rewrite_query("explain that more simply", state) == "explain that more simply"
+    assert rewrite_query("and what about section 3?", None) == "and what about section 3?"
+
+
+def test_state_keeps_the_topic_through_follow_ups():
+    state = state_after("What are the learning objectives of section 2?", "and section 3?", "thanks")
+    assert state["topic"] == "What are the learning objectives of section 3"
+    assert state["turns"] == 3
+    assert is_follow_up("and section 4?") and not is_follow_up("What is static testing in the CTFL syllabus today?")
+
+
+def test_rebuild_state_from_history():
+    history = [
+        {"role": "user", "content": "What is prompt chaining in GenAI?"},
+        {"role": "assistant", "content": "Prompt chaining is ..."},
+        {"role": "user", "content": "and what about few-shot prompting?"},
+    ]
+    state = rebuild_state(history, CERTIFICATIONS)
+    assert state["certification_code"] == "CT-GenAI"
+    assert state["topic"] == "what is few-shot prompting"
+
+
+def test_cache_is_bounded_lru():
+    cache = ConversationStateCache(max_entries=2)
+    cache.put((1, "a"), {"topic": "a"})
+    cache.put((1, "b"), {"topic": "b"})
+    cache.get((1, "a"))
+    cache.put((2, "c"), {"topic": "c"})
+    assert cache.get((1, "b")) is None
+    assert cache.get((1, "a")) == {"topic": "a"}
+    cache.discard_user(1)
+    assert cache.get((1, "a")) is None and cache.get((2, "c")) == {"topic": "c"}
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.config import QUIZ_GENERATION_TIMEOUT_SECONDS
+from app.database.connection import Base
+from app.models.exam import ExamQuestion
+from app.models.quiz import QuizQuestion
+from app.quiz import pool as quiz_pool
+from app.quiz.pool import (
+    QuizPool, answer_quiz_request, available_count, find_quiz_request, parse_generated_questions
+)
+
+
+class FakeGenerator:
+    def __init__(self):
+        self.calls = []
+        self.counter = 0
+
+    def generate(self, certification_code, chapter, count):
+        self.calls.append((certification_code, chapter, count))
+        questions = []
+        for _ in range(count):
+            self.counter += 1
+            questions.append({
+                "question_text": f"Generated question {self.counter}?",
+                "options": [{"letter": letter, "text": f"Option {letter}"} for letter in "abcd"],
+                "correct_answer": "a",
+                "learning_objective": f"FL-{chapter or 1}.1.1",
+            })
+        return questions
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'quiz.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine, tables=[ExamQuestion.__table__, QuizQuestion.__table__])
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def pool(session_factory, monkeypatch):
+    monkeypatch.setattr(quiz_pool, "QUIZ_POOL_TARGET", 12)
+    monkeypatch.setattr(quiz_pool, "QUIZ_POOL_LOW_WATERMARK", 6)
+    monkeypatch.setattr(quiz_pool, "QUIZ_GENERATION_BATCH", 5)
+    monkeypatch.setattr(quiz_pool, "QUIZ_MAX_SERVES", 1)
+    pool = QuizPool(generator_factory=FakeGenerator, session_factory=session_factory)
+    monkeypatch.setattr(quiz_pool, "_quiz_pool", pool)
+    return pool
+
+
+def test_parse_generated_questions_drops_malformed_entries():
+    text = json.dumps({"questions": [
+        {"question": "Q1?", "options": {"a": "x", "b": "y", "c": "z", "d": "w"}, "correct_answer": "B)"},
+        {"question": "Q2?", "options": {"a": "x", "b": "y", "c": "z", "d": "w"}, "correct_answer": "e"},
+        {"question": "", "options": {"a": "x"}, "correct_answer": "a"},
+    ]})
+    questions = parse_generated_questions(text)
+    assert [q["question_text"] for q in questions] == ["Q1?"]
+    assert questions[0]["correct_answer"] == "b"
+    assert parse_generated_questions("not json") == []
+
+
+def test_refill_seeds_official_questions_and_tops_up_in_batches(pool, session_factory):
+    db = session_factory()
+    db.add(ExamQuestion(
+        certification_code="CTFL", exam_label="A", question_number="1", question_text="Official?",
+        options=json.dumps([{"letter": "a", "text": "Yes"}, {"letter": "b", "text": "No"}]),
+        correct_answer="a", learning_objective="FL-2.1.1"
+    ))
+    db.commit()
+
+    assert pool.refill("CTFL") == 12
+    assert [call[2] for call in pool.generator.calls] == [5, 5, 1]
+    official = db.query(QuizQuestion).filter(QuizQuestion.source == "official").one()
+    assert official.chapter == "2"
+
+    # A full pool needs no generation
+    assert pool.refill("CTFL") == 0
+    assert len(pool.generator.calls) == 3
+
+
+def test_draw_serves_pool_and_refills_in_background_when_low(pool, session_factory):
+    db = session_factory()
+    pool.refill("CTFL", "3")
+
+    async def scenario():
+        questions, refill_scheduled = pool.draw(db, "CTFL", "3", num_questions=8)
+        await pool.wait_for_refills()
+        return questions, refill_scheduled
+
+    questions, refill_scheduled = asyncio.run(scenario())
+    assert len(questions) == 8
+    assert refill_scheduled
+    # Served questions are retired (QUIZ_MAX_SERVES=1) and the pool is topped up again
+    assert available_count(db, "CTFL", "3") == 12
+
+
+def test_chat_quiz_request_falls_back_until_pool_is_ready(pool, session_factory):
+    db = session_factory()
+    assert find_quiz_request("Give me a quiz of 5 questions on chapter 2") == ("2", 5)
+    assert find_quiz_request("What is a test level?") is None
+
+    async def scenario():
+        first = answer_quiz_request(db, "Create a quiz on chapter 2 with 5 questions", "CTFL")
+        await pool.wait_for_refills()
+        second = answer_quiz_request(db, "Create a quiz on chapter 2 with 5 questions", "CTFL")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is None
+    assert second["response"].startswith("Practice quiz (CTFL, chapter 2)")
+    assert "AI-generated question" in second["response"]
+    assert second["usage"]["total_tokens"] == 0
+
+
+def test_quiz_requests_must_ask_for_a_quiz():
+    assert find_quiz_request("quiz me on chapter 3") == ("3", 10)
+    assert find_quiz_request("Hazme un simulacro de 20 preguntas") == (None, 20)
+    assert find_quiz_request("Can you create a 10-question practice test?") == (None, 10)
+    assert find_quiz_request("How many points do I need to pass the mock exam?") is None
+    assert find_quiz_request("What is the difference between a mock exam and the real exam?") is None
+
+
+def test_store_questions_keeps_rows_another_worker_did_not_store(pool, session_factory):
+    questions = FakeGenerator().generate("CTFL", "1", 3)
+    db = session_factory()
+
+    @event.listens_for(db, "before_flush", once=True)
+    def other_worker_stores_one(*args):
+        other = session_factory()
+        quiz_pool.store_questions(other, "CTFL", questions[:1])
+        other.close()
+
+    assert quiz_pool.store_questions(db, "CTFL", questions) == 2
+    assert db.query(QuizQuestion).count() == 3
+
+
+def test_refill_stops_when_the_requested_chapter_does_not_grow(pool, session_factory):
+    class OffTopicGenerator(FakeGenerator):
+        def generate(self, certification_code, chapter, count):
+            # The model tags every question with a chapter 1 objective
+            return super().generate(certification_code, "1", count)
+
+    pool.generator_factory = OffTopicGenerator
+    assert pool.refill("CTFL", "3") == 5
+    assert len(pool.generator.calls) == 1
+    assert available_count(session_factory(), "CTFL", "3") == 0
+
+
+def test_the_same_question_can_be_pooled_for_each_certification(session_factory):
+    questions = FakeGenerator().generate("CTFL", "1", 2)
+    db = session_factory()
+    assert quiz_pool.store_questions(db, "CTFL", questions) == 2
+    assert quiz_pool.store_questions(db, "CT-GenAI", questions) == 2
+    assert quiz_pool.store_questions(db, "CT-GenAI", questions) == 0
+
+
+def test_generation_goes_through_the_resilient_caller(monkeypatch):
+    from types import SimpleNamespace
+    from app.utils import resilience
+    monkeypatch.setattr(resilience, "_callers", {})
+    requests = []
+    content = json.dumps({"questions": [{"question": "Q?", "options": {"a": "x", "b": "y", "c": "z"}, "correct_answer": "a"}]})
+
+    def create(**kwargs):
+        requests.append(kwargs)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+    generator = quiz_pool.QuizGenerator.__new__(quiz_pool.QuizGenerator)
+    generator.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    generator.vector_store = SimpleNamespace(retrieve=lambda *args, **kwargs: [])
+    generator.model = "gpt-4o"
+
+    assert [q["question_text"] for q in generator.generate("CTFL", None, 1)] == ["Q?"]
+    assert 0 < requests[0]["timeout"] <= QUIZ_GENERATION_TIMEOUT_SECONDS
+    assert resilience.resilience_snapshot()["quiz"]["calls"] == 1
@@ -0,0 +1,54 @@
+import numpy as np
+from langchain_core.documents import Document
+from app.rag.evaluation import (
+    AnswerCache, collect_answers, generation_similarity, load_eval_set,
+    parse_section, retrieval_recall_at_k
+)
+
+def test_load_eval_set_parses_sections():
+    cases = load_eval_set("tests/rag_eval_set.csv")
+    assert len(cases) > 0
+    assert cases[0]["section"] == "1.1"
+    assert parse_section("Sección 1.1.4") == "1.1.4"
+    assert parse_section("") is None
+
+def test_collect_answers_uses_cache_per_index_version():
+    calls = []
+
+    def ask(case):
+        calls.append(case["question"])
+        return f"answer to {case['question']}"
+
+    cases = [{"question": "q1"}, {"question": "q2"}]
+    cache = AnswerCache()
+    assert collect_answers(cases, ask, "v1", cache=cache) == ["answer to q1", "answer to q2"]
+    collect_answers(cases, ask, "v1", cache=cache)
+    assert len(calls) == 2
+    collect_answers(cases, ask, "v2", cache=cache)
+    assert len(calls) == 4
+
+def test_generation_similarity_single_batch():
+    batches = []
+
+    def encode(texts):
+        batches.append(list(texts))
+        return np.array([[1.0, 0.0] if t.startswith("a") else [0.0, 1.0] for t in texts])
+
+    sims = generation_similarity(["a1", "b1"], ["a2", "a3"], encode)
+    assert len(batches) == 1
+    assert np.allclose(sims, [1.0, 0.0])
+
+def test_retrieval_recall_at_k_matches_nested_sections():
+    docs = {
+        "q1": [Document(page_content="...", metadata={"section": "1.1.3"})],
+        "q2": [Document(page_content="2.2 Test Levels\nbody", metadata={})],
+    }
+    cases = [
+        {"question": "q1", "section": "1.1"},
+        {"question": "q2", "section": "3.1"},
+        {"question": "q3", "section": None},
+    ]
+    report = retrieval_recall_at_k(cases, lambda q, k: docs.get(q, []), k=5)
+    assert report["evaluated"] == 2
+    assert report["hits"] == 1
+    assert report["recall"] == 0.5
@@ -1,11 +1,11 @@
+import os
 import pytest
 from dotenv import load_dotenv
-import pandas as pd
 from fastapi.testclient import TestClient
 from main import app
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
+from app.rag.evaluation import AnswerCache, load_eval_set, run_evaluation
+from app.rag.vector_store import get_vector_store_manager
 
 
 # Cargar variables de entorno desde .env automáticamente
@@ -15,7 +15,6 @@ client = TestClient(app)
 model = SentenceTransformer('paraphrase-MiniLM-L6-v2')
 
 def get_token():
-    import os
     username = os.environ.get("TEST_USER", "testuser")
     password = os.environ.get("TEST_PASS", "testpass")
     response = client.post(
@@ -26,42 +25,54 @@ def get_token():
         return response.json()["access_token"]
     return None
 
-def semantic_similarity(a, b):
-    emb_a = model.encode([a])[0]
-    emb_b = model.encode([b])[0]
-    return cosine_similarity([emb_a], [emb_b])[0][0]
-
 def test_rag_semantic_eval():
     token = get_token()
     if not token:
         pytest.skip("No se pudo obtener token válido para pruebas de RAG.")
 
-    import os
-    df = pd.read_csv("tests/rag_eval_set.csv")
-    similarities = []
+    cases = load_eval_set("tests/rag_eval_set.csv")
     threshold = float(os.environ.get("RAG_TEST_THRESHOLD", "0.75"))
     assert_on_mean = os.environ.get("RAG_TEST_ASSERT_MEAN", "false").lower() == "true"
     min_value = float(os.environ.get("RAG_TEST_MIN", "0.5"))
+    min_recall = float(os.environ.get("RAG_TEST_MIN_RECALL", "0"))
+    k = int(os.environ.get("RAG_TEST_K", "5"))
+    workers = int(os.environ.get("RAG_TEST_WORKERS", "8"))
+    cache = AnswerCache(os.environ.get("RAG_TEST_CACHE"))
 
-    for _, row in df.iterrows():
-        payload = {"message": row["Pregunta"], "conversation_id": "eval"}
+    def ask(case):
+        # Cada pregunta usa su propia conversación para que el historial no se mezcle
+        payload = {"message": case["question"], "conversation_id": f"eval-{case['number']}"}
         response = client.post(
             "/chat/",
             json=payload,
             headers={"Authorization": f"Bearer {token}"}
         )
         assert response.status_code == 200
-        answer = response.json()["response"]
-        sim = semantic_similarity(answer, row["Respuesta esperada"])
-        similarities.append(sim)
+        return response.json()["response"]
+
+    vector_store = get_vector_store_manager()
+    report = run_evaluation(
+        cases,
+        ask=ask,
+        encode=lambda texts: model.encode(texts, batch_size=64, convert_to_numpy=True),
+        index_version=vector_store.get_index_version(),
+        retrieve=lambda question, top_k: vector_store.search_similar(question, k=top_k),
+        k=k,
+        threshold=threshold,
+        cache=cache,
+        max_workers=workers
+    )
 
-    similarities = np.array(similarities)
-    accuracy = np.mean(similarities > threshold)
-    mean_sim = similarities.mean()
-    print(f"Accuracy (sim > {threshold}): {accuracy:.2f}")
-    print(f"Mean similarity: {mean_sim:.2f}")
+    retrieval = report["retrieval"]
+    generation = report["generation"]
+    print(f"Retrieval recall@{k}: {retrieval['recall']:.2f} ({retrieval['hits']}/{retrieval['evaluated']})")
+    print(f"Accuracy (sim > {threshold}): {generation['accuracy']:.2f}")
+    print(f"Mean similarity: {generation['mean_similarity']:.2f}")
 
+    assert retrieval["recall"] >= min_recall, f"Recall@{k} {retrieval['recall']:.2f} below {min_recall}"
     if assert_on_mean:
+        mean_sim = generation["mean_similarity"]
         assert mean_sim > min_value, f"Mean similarity {mean_sim:.2f} not greater than {min_value}"
     else:
+        accuracy = generation["accuracy"]
         assert accuracy > min_value, f"Accuracy {accuracy:.2f} not greater than {min_value}"
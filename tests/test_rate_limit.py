@@ -0,0 +1,72 @@
+import pytest
+from types import SimpleNamespace
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from app.auth import rate_limit
+from app.auth.oauth2 import get_current_active_user
+from app.auth.rate_limit import ChatRateLimiter, MemoryStore, _load_limits, enforce_chat_rate_limit
+from app.models.user import UserRole
+from tests.test_llm_resilience import FakeClock
+
+LIMITS = {"user": {"requests_per_minute": 3, "daily_tokens": 1000}, "admin": {"requests_per_minute": 10, "daily_tokens": 0}}
+
+
+def limiter(clock):
+    return ChatRateLimiter(MemoryStore(clock), LIMITS, clock=clock)
+
+
+def test_requests_per_minute_slide(monkeypatch):
+    clock = FakeClock()
+    clock.now = 600  # start of a window
+    chat = limiter(clock)
+    for _ in range(3):
+        chat.check("alice", UserRole.USER)
+    with pytest.raises(HTTPException) as raised:
+        chat.check("alice", UserRole.USER)
+    assert raised.value.status_code == 429 and raised.value.headers["Retry-After"] == "60"
+
+    chat.check("bob", UserRole.USER)  # other users are not affected
+    for _ in range(4):
+        chat.check("root", UserRole.ADMIN)
+
+    clock.now = 600 + 60 + 45  # a quarter of the previous window still counts: 4 * 0.25 + 1 <= 3
+    chat.check("alice", UserRole.USER)
+
+
+def test_daily_token_quota(monkeypatch):
+    clock = FakeClock()
+    clock.now = 86400 * 100 + 3600
+    chat = limiter(clock)
+    chat.record_tokens("alice", 600)
+    chat.check("alice", "user")
+    chat.record_tokens("alice", 600)
+    with pytest.raises(HTTPException) as raised:
+        chat.check("alice", "user")
+    assert raised.value.detail == "Daily token quota exceeded" and raised.value.headers["Retry-After"] == str(86400 - 3600)
+    assert chat.usage("alice", "user")["tokens_used_today"] == 1200
+
+    clock.now += 86400
+    chat.check("alice", "user")
+
+
+def test_limits_are_configurable():
+    limits = _load_limits('{"user": {"requests_per_minute": 5}, "trial": {"daily_tokens": 100}}')
+    assert limits["user"] == {"requests_per_minute": 5, "daily_tokens": 200000}
+    assert limits["trial"] == {"requests_per_minute": 0, "daily_tokens": 100}
+    assert _load_limits("not json") == rate_limit.DEFAULT_LIMITS
+
+
+def test_dependency_returns_429_with_retry_after(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit, "_chat_rate_limiter", limiter(clock))
+    app = FastAPI()
+
+    @app.post("/chat/", dependencies=[Depends(enforce_chat_rate_limit)])
+    def chat():
+        return {"response": "ok"}
+
+    app.dependency_overrides[get_current_active_user] = lambda: SimpleNamespace(username="alice", role=UserRole.USER)
+    client = TestClient(app)
+    assert [client.post("/chat/").status_code for _ in range(4)] == [200, 200, 200, 429]
+    response = client.post("/chat/")
+    assert response.headers["Retry-After"] == "60" and response.headers["X-RateLimit-Limit"] == "3"
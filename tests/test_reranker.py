@@ -0,0 +1,25 @@
+from langchain_core.documents import Document
+from app.rag.reranker import MMRReranker, estimate_tokens, select_within_budget
+
+def test_mmr_drops_near_duplicates():
+    original = Document(page_content="Test levels: component testing, integration testing and system testing")
+    duplicate = Document(page_content="Test levels: component testing, integration testing and system testing.")
+    other = Document(page_content="Static testing includes reviews and static analysis of work products")
+    candidates = [(original, 0.9), (duplicate, 0.89), (other, 0.7)]
+
+    ranked = MMRReranker().rerank("what are the test levels", candidates, top_n=2)
+
+    assert [doc for doc, _ in ranked] == [original, other]
+
+def test_lexical_overlap_boosts_relevant_chunk():
+    generic = Document(page_content="General introduction to the syllabus and its purpose")
+    specific = Document(page_content="Boundary value analysis is a black-box test technique")
+    ranked = MMRReranker().rerank("boundary value analysis", [(generic, 0.80), (specific, 0.78)], top_n=1)
+    assert ranked[0][0] is specific
+
+def test_select_within_budget_keeps_order_and_limit():
+    docs = [(Document(page_content="x" * 400), 1.0), (Document(page_content="y" * 400), 0.9),
+            (Document(page_content="z" * 40), 0.8)]
+    selected = select_within_budget(docs, token_budget=120)
+    assert [d.page_content[0] for d in selected] == ["x", "z"]
+    assert estimate_tokens("abcd" * 10) == 10
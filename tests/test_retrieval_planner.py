@@ -0,0 +1,56 @@
+from app.chat.retrieval_planner import certification_aliases, find_certification, needs_history, plan_retrieval
+from app.config import RAG_TOP_K, RAG_TOP_K_BROAD, RAG_TOP_K_NARROW
+
+CERTIFICATIONS = [
+    ("CTFL-v4.0", "Certified Tester Foundation Level"),
+    ("CT-GenAI", "Certified Tester Testing with Generative AI"),
+    ("CTAL-TA", "Certified Tester Advanced Level Test Analyst"),
+]
+ANSWERED = [{"role": "user", "content": "What are test levels in CTFL?"}, {"role": "assistant", "content": "Test levels are ..."}]
+
+
+def test_certification_aliases_and_mentions():
+    assert certification_aliases("CTFL-v4.0", "Certified Tester Foundation Level") == [
+        "certified tester foundation level", "foundation level", "ctfl-v4.0", "ctfl"
+    ]
+    assert find_certification("How is GenAI used for test design?", CERTIFICATIONS) == "CT-GenAI"
+    assert find_certification("según el Foundation Level, ¿qué es un defecto?", CERTIFICATIONS) == "CTFL-v4.0"
+    assert find_certification("What is a test analyst?", CERTIFICATIONS) is None
+
+
+def test_small_talk_and_follow_ups_skip_retrieval():
+    for message in ("Hi!", "thanks so much", "Gracias", "ok"):
+        assert plan_retrieval(message, "CTFL-v4.0", ANSWERED, CERTIFICATIONS)["retrieve"] is False
+    assert plan_retrieval("Explain that more simply", None, ANSWERED, CERTIFICATIONS)["reason"] == "follow_up"
+    assert plan_retrieval("explícalo con un ejemplo", None, ANSWERED, CERTIFICATIONS)["retrieve"] is False
+    # Without a previous answer there is nothing to rework, so search anyway
+    assert plan_retrieval("Explain that more simply", None, [], CERTIFICATIONS)["retrieve"] is True
+
+
+def test_certification_is_inferred_from_message_then_history():
+    plan = plan_retrieval("What are the risks of hallucinations in GenAI?", None, ANSWERED, CERTIFICATIONS)
+    assert (plan["certification_code"], plan["reason"]) == ("CT-GenAI", "certification_in_message")
+    plan = plan_retrieval("And what about test types?", None, ANSWERED, CERTIFICATIONS)
+    assert (plan["certification_code"], plan["reason"]) == ("CTFL-v4.0", "certification_from_history")
+    assert plan_retrieval("And what about test types?", None, [], CERTIFICATIONS)["certification_code"] is None
+
+
+def test_cached_certification_does_not_override_a_mention():
+    plan = plan_retrieval("What are the business outcomes of GenAI?", None, None, CERTIFICATIONS, history_certification="CTFL-v4.0")
+    assert (plan["certification_code"], plan["reason"]) == ("CT-GenAI", "certification_in_message")
+    plan = plan_retrieval("What are the business outcomes?", None, None, CERTIFICATIONS, history_certification="CTFL-v4.0")
+    assert (plan["certification_code"], plan["reason"]) == ("CTFL-v4.0", "certification_from_history")
+
+
+def test_k_depends_on_question_breadth():
+    assert plan_retrieval("What is a test oracle?", "CTFL-v4.0")["k"] == RAG_TOP_K_NARROW
+    assert plan_retrieval("Compare test levels and test types", "CTFL-v4.0")["k"] == RAG_TOP_K_BROAD
+    assert plan_retrieval("How should I plan regression testing in agile teams?", "CTFL-v4.0")["k"] == RAG_TOP_K
+
+
+def test_needs_history():
+    assert needs_history("Explain test levels", "CTFL-v4.0", CERTIFICATIONS) is False
+    assert needs_history("Explain test levels in the foundation level", None, CERTIFICATIONS) is False
+    assert needs_history("Explain test levels", None, CERTIFICATIONS) is True
+    assert needs_history("explain that again", "CTFL-v4.0", CERTIFICATIONS) is True
+    assert needs_history("hello", None, CERTIFICATIONS) is False
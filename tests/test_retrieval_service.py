@@ -0,0 +1,66 @@
+import os
+import tempfile
+import threading
+import time
+import pytest
+from langchain_core.documents import Document
+from app.rag.retrieval_service import RetrievalClient, RetrievalServer, RetrievalServiceError
+from tests.test_vector_store import add_chunk, manager  # noqa: F401 (fixture)
+
+
+@pytest.fixture
+def client(manager):
+    # Unix socket paths are limited to ~100 bytes, so keep it out of pytest's tmp_path
+    socket_path = os.path.join(tempfile.mkdtemp(prefix="rs-"), "retrieval.sock")
+    server = RetrievalServer(manager, socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield RetrievalClient(socket_path, timeout=5)
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_queries_the_shared_index(manager, client):
+    add_chunk(manager, "test pyramid and test levels", "CTFL", "1")
+    add_chunk(manager, "prompt engineering for testers", "GenAI", "2")
+
+    assert client.is_initialized()
+    assert client.count_chunks() == 2
+    docs = client.search_similar("prompt engineering for testers", k=1)
+    assert isinstance(docs[0], Document)
+    assert docs[0].metadata["certification_code"] == "GenAI"
+    context = client.get_context_for_query("test pyramid and test levels", "CTFL")
+    assert context["retrieval_successful"] and "test pyramid" in context["context"]
+
+
+def test_writes_through_the_service_are_seen_by_every_client(manager, client):
+    add_chunk(manager, "chunk one", "CTFL", "1")
+    other_worker = RetrievalClient(client.socket_path)
+    version = other_worker.get_index_version()
+
+    assert client.delete_document_by_id("1") is True
+    assert other_worker.count_chunks() == 0
+    assert other_worker.get_index_version() != version
+
+
+def test_errors_are_reported_to_the_client(client, tmp_path):
+    with pytest.raises(RetrievalServiceError, match="Unknown method"):
+        client._call("rebuild_chunk_index")
+
+    offline = RetrievalClient(str(tmp_path / "missing.sock"))
+    assert offline.is_initialized() is False
+    with pytest.raises(RetrievalServiceError):
+        offline.retrieve("test levels")
+
+
+def test_only_reads_are_bounded_by_the_timeout(manager, client, monkeypatch):
+    def slow(*args, **kwargs):
+        time.sleep(0.5)
+        return True
+
+    monkeypatch.setattr(manager, "delete_certification_documents", slow)
+    monkeypatch.setattr(manager, "count_chunks", slow)
+    impatient = RetrievalClient(client.socket_path, timeout=0.1)
+    assert impatient.delete_certification_documents("CTFL") is True
+    with pytest.raises(RetrievalServiceError, match="timed out"):
+        impatient.count_chunks()
@@ -0,0 +1,146 @@
+import asyncio
+import time
+import pytest
+from types import SimpleNamespace
+from app.chat import routes
+from app.chat.openai_client import OpenAIClient
+from app.utils import single_flight
+from app.utils.single_flight import SingleFlight
+
+EMPTY = {"context": "", "sources": [], "retrieval_successful": False}
+
+
+def test_concurrent_calls_share_one_execution():
+    calls = []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        return {"value": value}
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("same", lambda: work(1)) for _ in range(5)), flight.do("other", lambda: work(2)))
+        return flight, results
+
+    flight, results = asyncio.run(main())
+    assert calls == [1, 2]
+    assert results[:5] == [{"value": 1}] * 5 and results[0] is not results[1]  # followers get their own copy
+    assert flight.snapshot() == {"executions": 2, "coalesced": 4, "in_flight": 0}
+
+
+def test_errors_reach_every_caller_and_are_not_cached():
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(flight.do("k", failing), flight.do("k", failing), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        with pytest.raises(RuntimeError):
+            await flight.do("k", failing)
+
+    asyncio.run(main())
+    assert len(attempts) == 2
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def main():
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        leader = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == "answer"
+
+
+@pytest.fixture
+def slow_client(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(single_flight, "_single_flight", None)
+    calls = []
+    reply = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Static testing examines work products."))],
+                            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5, total_tokens=15, prompt_tokens_details=None))
+
+    def create(**kwargs):
+        calls.append(kwargs["messages"][-1]["content"])
+        time.sleep(0.1)
+        return reply
+
+    client = OpenAIClient()
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    return client, calls
+
+
+def test_identical_questions_share_one_completion(slow_client):
+    client, calls = slow_client
+
+    async def main():
+        questions = ["What is static testing?", "what is static testing", "What is static testing?", "What is dynamic testing?"]
+        return await asyncio.gather(*(client.generate_response(q, rag_result=EMPTY, certification_code="CTFL-v4.0") for q in questions))
+
+    results = asyncio.run(main())
+    assert len(calls) == 2 and all(result["response"] == "Static testing examines work products." for result in results)
+    # Only the caller that made the completion is charged for its tokens
+    assert [result["usage"]["total_tokens"] for result in results] == [15, 0, 0, 15]
+    assert results[1]["usage"]["coalesced"] is True and "coalesced" not in results[0]["usage"]
+
+
+def test_follow_ups_are_not_coalesced(slow_client):
+    client, calls = slow_client
+
+    async def main():
+        return await asyncio.gather(*(client.generate_response("explain that more simply", rag_result=EMPTY) for _ in range(2)))
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+
+def test_questions_with_their_own_history_are_not_coalesced(slow_client):
+    client, calls = slow_client
+    question = "What is static testing?"
+    histories = [
+        [{"role": "user", "content": "Tell me about reviews"}, {"role": "assistant", "content": "Reviews are ..."}],
+        [{"role": "user", "content": "Tell me about test tools"}, {"role": "assistant", "content": "Tools are ..."}],
+    ]
+
+    async def main():
+        return await asyncio.gather(*(
+            client.generate_response(question, context=history + [{"role": "user", "content": question}], rag_result=EMPTY)
+            for history in histories
+        ))
+
+    results = asyncio.run(main())
+    assert len(calls) == 2 and all("coalesced" not in result["usage"] for result in results)
+
+
+def test_identical_retrievals_share_one_search(monkeypatch):
+    monkeypatch.setattr(single_flight, "_single_flight", None)
+    searches = []
+
+    def retrieve(query, certification_code=None, k=None):
+        searches.append(query)
+        time.sleep(0.05)
+        return EMPTY
+
+    monkeypatch.setattr(routes, "retrieve_context", retrieve)
+    plan = {"retrieve": True, "certification_code": "CTFL-v4.0", "k": 5}
+
+    async def main():
+        tasks = [routes._start_retrieval(query, plan, {}) for query in ("What is a test basis?", "what is a test basis", "What is a test oracle?")]
+        return await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert searches == ["What is a test basis?", "What is a test oracle?"]
@@ -0,0 +1,25 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The RAG stack must only be imported when the vector store or the LLM is first used.
+# Import time itself is measured by scripts/benchmark_startup.py, not asserted here (wall-clock is noisy on CI).
+HEAVY_MODULES = {"chromadb", "langchain_chroma", "langchain_community", "langchain_openai", "langchain_text_splitters", "openai", "pypdf"}
+
+PROBE = """
+import json, sys
+import main
+print(json.dumps({"modules": sorted({name.split(".")[0] for name in sys.modules})}))
+"""
+
+
+def import_app():
+    result = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_app_import_does_not_load_rag_stack():
+    assert HEAVY_MODULES & set(import_app()["modules"]) == set()
+
@@ -0,0 +1,142 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database.connection import Base
+from app.models.certification import Certification
+from app.models.exam import ExamQuestion
+from app.models.quiz import QuizQuestion
+from app.models.syllabus import BusinessOutcome, LearningObjective, SyllabusKeyword
+from app.certification import syllabus_index
+from app.certification.syllabus_index import (
+    certification_brief, delete_syllabus_index, extract_business_outcomes, extract_keywords, extract_learning_objectives, index_syllabus
+)
+from app.chat.intent_router import route_message
+
+LINES = [
+    "0.4. Business Outcomes",
+    "A Foundation Level Certified Tester can…",
+    "FL-BO1 Understand what testing is and why it is beneficial",
+    "FL-BO2 Identify the test approach and activities to be implemented depending on the context of",
+    "testing",
+    "0.5. Examinable Learning Objectives and Cognitive Level of Knowledge",
+    "1. Fundamentals of Testing – 180 minutes",
+    "Testing Keywords",
+    "None",
+    "AI-Specific Keywords",
+    "coverage, debugging, defect, test",
+    "object, validation",
+    "Learning Objectives for Chapter 1:",
+    "1.1 What is Testing?",
+    "FL-1.1.1 (K1) Identify typical test objectives",
+    "FL-1.1.2 (K2) Differentiate testing from",
+    "debugging",
+    "1.1 What is Testing?",
+    "Appendix B – Business Outcomes traceability matrix",
+    "FL-BO1 Understand what testing is and why it is beneficial 8",
+]
+
+
+def test_extract_business_outcomes_verbatim_from_first_table():
+    assert extract_business_outcomes(LINES) == [
+        ("FL-BO1", "Understand what testing is and why it is beneficial"),
+        ("FL-BO2", "Identify the test approach and activities to be implemented depending on the context of testing"),
+    ]
+
+
+def test_extract_learning_objectives_with_wrapped_descriptions():
+    objectives = extract_learning_objectives(LINES)
+    assert [o["code"] for o in objectives] == ["FL-1.1.1", "FL-1.1.2"]
+    assert objectives[1] == {
+        "code": "FL-1.1.2", "chapter": "1", "section": "1.1", "k_level": "K2",
+        "description": "Differentiate testing from debugging",
+    }
+
+
+def test_extract_keywords_per_chapter():
+    assert extract_keywords(LINES) == {"1": ["coverage", "debugging", "defect", "test object", "validation"]}
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    tables = [t.__table__ for t in (Certification, ExamQuestion, QuizQuestion, BusinessOutcome, LearningObjective, SyllabusKeyword)]
+    Base.metadata.create_all(bind=engine, tables=tables)
+    db = sessionmaker(bind=engine)()
+    db.add(Certification(code="CTFL", name="Certified Tester Foundation Level", url="https://istqb.org"))
+    db.add(Certification(code="GenAI", name="Certified Tester Testing with Generative AI", url="https://istqb.org"))
+    for position, (code, text) in enumerate(extract_business_outcomes(LINES)):
+        db.add(BusinessOutcome(certification_code="CTFL", code=code, description=text, position=position))
+    for position, o in enumerate(extract_learning_objectives(LINES)):
+        db.add(LearningObjective(certification_code="CTFL", position=position, **o))
+    db.add(SyllabusKeyword(certification_code="CTFL", chapter="1", term="coverage", position=0))
+    db.add(BusinessOutcome(certification_code="GenAI", code="GenAI-BO1", description="Understand generative AI", position=0))
+    db.commit()
+    return db
+
+
+def test_router_answers_business_outcomes_verbatim(db):
+    result = route_message(db, "What are the business outcomes?", "CTFL")
+    assert "FL-BO1 Understand what testing is and why it is beneficial\nFL-BO2 Identify" in result["response"]
+    assert result["usage"]["total_tokens"] == 0
+
+    # The certification can be inferred from the outcome code
+    single = route_message(db, "Show GenAI-BO1", None)
+    assert "GenAI-BO1 Understand generative AI" in single["response"]
+    assert "FL-BO" not in single["response"]
+
+
+def test_router_lists_learning_objectives_and_keywords_by_chapter(db):
+    result = route_message(db, "learning objectives of chapter 1", "CTFL")
+    assert "FL-1.1.2 (K2) Differentiate testing from debugging" in result["response"]
+    assert "coverage" in route_message(db, "keywords chapter 1", "CTFL")["response"]
+
+
+def test_router_leaves_explanations_and_unknown_certifications_to_the_model(db):
+    assert route_message(db, "Explain the business outcomes", "CTFL") is None
+    assert route_message(db, "What are the business outcomes?", "CTAL-TA") is None
+    assert route_message(db, "What is a test level?", "CTFL") is None
+
+
+def test_router_only_lists_on_explicit_requests(db):
+    for message in ("What is keyword-driven testing?", "Which test techniques use keywords?",
+                    "What are keyword-driven frameworks in CTFL?", "What is the learning objective of test planning?",
+                    "Keywords in test automation frameworks", "How do business outcomes relate to the exam?"):
+        assert route_message(db, message, "CTFL") is None, message
+    assert "FL-1.1.1 (K1)" in route_message(db, "What is FL-1.1.1?", "CTFL")["response"]
+    assert "coverage" in route_message(db, "List the keywords of chapter 1", "CTFL")["response"]
+
+
+def test_certification_brief_is_static_prompt_material(db):
+    brief = certification_brief(db, "CTFL")
+    assert brief.startswith("The user is studying the Certified Tester Foundation Level (CTFL) certification.")
+    assert "FL-BO2 Identify the test approach" in brief
+    assert "FL-1.1" not in brief  # learning objectives come from retrieval, not the per-call prefix
+    assert certification_brief(db, "CTFL") == brief
+    assert certification_brief(db, "CTAL-TA") == "" and certification_brief(db, None) == ""
+
+
+def test_deactivated_certifications_are_left_to_the_model(db):
+    db.query(Certification).filter_by(code="GenAI").update({"is_active": False})
+    assert route_message(db, "Show GenAI-BO1", None) is None
+    assert route_message(db, "What are the business outcomes?", "GenAI") is None
+    assert certification_brief(db, "GenAI") == ""
+    # With GenAI gone, CTFL is the only certification left to answer for
+    assert "FL-BO1" in route_message(db, "What are the business outcomes?", None)["response"]
+
+    assert delete_syllabus_index(db, "GenAI") == 1
+    assert db.query(BusinessOutcome).filter_by(certification_code="GenAI").count() == 0
+
+
+def test_reindexing_a_new_version_prunes_removed_entries(db, monkeypatch):
+    db.add(BusinessOutcome(certification_code="CTFL", code="FL-BO9", description="Removed outcome", position=9))
+    db.add(LearningObjective(certification_code="CTFL", code="FL-7.1.1", chapter="7", section="7.1", k_level="K1", description="Removed", position=9))
+    db.add(SyllabusKeyword(certification_code="CTFL", chapter="7", term="removed", position=0))
+    db.commit()
+    monkeypatch.setattr(syllabus_index, "page_texts", lambda file_path, content_hash=None: ["\n".join(LINES)])
+
+    assert index_syllabus(db, "syllabus.pdf", "CTFL") == {"business_outcomes": 2, "learning_objectives": 2, "keywords": 5}
+    assert [row.code for row in db.query(BusinessOutcome).filter_by(certification_code="CTFL")] == ["FL-BO1", "FL-BO2"]
+    assert {row.code for row in db.query(LearningObjective)} == {"FL-1.1.1", "FL-1.1.2"}
+    assert {row.chapter for row in db.query(SyllabusKeyword)} == {"1"}
+    # Other certifications are untouched
+    assert db.query(BusinessOutcome).filter_by(certification_code="GenAI").count() == 1
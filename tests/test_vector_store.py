@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings.fake import DeterministicFakeEmbedding
+from app.rag.vector_store import VectorStoreManager, chunk_content_hash as chunk_id_of, collection_name_for
+
+
+class UnitFakeEmbedding(DeterministicFakeEmbedding):
+    """Deterministic embeddings normalized to unit length, like OpenAI's"""
+
+    def _get_embedding(self, seed):
+        vector = np.array(super()._get_embedding(seed))
+        return list(vector / np.linalg.norm(vector))
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    manager = VectorStoreManager(persist_directory=str(tmp_path))
+    manager.embeddings = UnitFakeEmbedding(size=16)
+    return manager
+
+
+def add_chunk(manager, text, certification_code, document_id):
+    metadata = {"certification_code": certification_code, "document_id": document_id}
+    return manager.add_chunks([Document(page_content=text, metadata=metadata)], certification_code)
+
+
+def test_collection_name_for_is_valid_chroma_name():
+    assert collection_name_for("CTFL-v4.0") == "cert-ctfl-v4.0"
+    assert collection_name_for("Specialist/GenAI ") == "cert-specialist-genai"
+
+
+def test_search_routes_to_certification_partition(manager):
+    add_chunk(manager, "test pyramid and test levels", "CTFL", "1")
+    add_chunk(manager, "prompt engineering for testers", "GenAI", "2")
+
+    scoped = manager.search_similar("test pyramid and test levels", k=5, filter_dict={"certification_code": "GenAI"})
+    assert [doc.metadata["certification_code"] for doc in scoped] == ["GenAI"]
+
+    unscoped = manager.search_similar("test pyramid and test levels", k=5)
+    assert unscoped[0].page_content == "test pyramid and test levels"
+    assert len(unscoped) == 2
+
+
+def test_delete_certification_drops_partition(manager):
+    add_chunk(manager, "prompt engineering for testers", "GenAI", "2")
+    assert manager.is_initialized()
+
+    manager.delete_certification_documents("GenAI")
+
+    assert collection_name_for("GenAI") not in manager._collection_names()
+    assert not manager.is_initialized()
+
+
+def test_delete_document_by_id_across_partitions(manager):
+    add_chunk(manager, "chunk one", "CTFL", "1")
+    add_chunk(manager, "chunk two", "CTFL", "2")
+
+    manager.delete_document_by_id("1")
+
+    assert manager.count_chunks() == 1
+
+
+def test_identical_chunks_share_one_vector_per_partition(manager):
+    add_chunk(manager, "exam rules: 40 questions, 60 minutes", "CTFL", "1")
+    stats = add_chunk(manager, "exam rules:  40 questions,\n60 minutes", "CTFL", "2")
+
+    assert stats == {"added": 0, "shared": 1, "reused_embeddings": 0}
+    assert manager.count_chunks() == 1
+
+    # Deleting one owner keeps the chunk for the other document
+    manager.delete_document_by_id("1")
+    assert manager.count_chunks() == 1
+    manager.delete_document_by_id("2")
+    assert manager.count_chunks() == 0
+
+
+def test_duplicates_across_partitions_reuse_embedding_and_merge(manager, monkeypatch):
+    add_chunk(manager, "exam rules: 40 questions, 60 minutes", "CTFL", "1")
+
+    def fail(self, texts):
+        raise AssertionError("identical chunk should not be embedded again")
+    monkeypatch.setattr(UnitFakeEmbedding, "embed_documents", fail)
+
+    stats = add_chunk(manager, "exam rules: 40 questions, 60 minutes", "GenAI", "2")
+    assert stats["reused_embeddings"] == 1
+
+    results = manager.search_similar("exam rules: 40 questions, 60 minutes", k=5)
+    assert len(results) == 1
+    assert sorted(results[0].metadata["certification_codes"]) == ["CTFL", "GenAI"]
+
+
+def test_document_filter_is_resolved_through_chunk_index(manager, monkeypatch):
+    add_chunk(manager, "test pyramid and test levels", "CTFL", "1")
+    add_chunk(manager, "test pyramid for agile teams", "CTFL", "2")
+
+    queried = []
+    original = VectorStoreManager._query_collection
+    def spy(collection, embedding, k, where, ids=None):
+        queried.append((where, ids))
+        return original(collection, embedding, k, where, ids)
+    monkeypatch.setattr(VectorStoreManager, "_query_collection", staticmethod(spy))
+
+    results = manager.search_similar("test pyramid", k=5, filter_dict={"certification_code": "CTFL", "document_id": "2"})
+
+    assert [doc.page_content for doc in results] == ["test pyramid for agile teams"]
+    assert queried[0][0] is None and len(queried[0][1]) == 1
+
+
+def test_chunk_index_is_rebuilt_for_existing_stores(manager, tmp_path):
+    add_chunk(manager, "chunk one", "CTFL", "1")
+    add_chunk(manager, "chunk two", "GenAI", "2")
+    manager.chunk_index.clear()
+
+    reopened = VectorStoreManager(persist_directory=str(tmp_path))
+    reopened.embeddings = manager.embeddings
+    assert reopened.chunk_index.chunks_for_document("2") == {collection_name_for("GenAI"): [chunk_id_of("chunk two")]}
+
+    reopened.delete_document_by_id("2")
+    assert reopened.count_chunks() == 1
+    assert reopened.chunk_index.chunks_for_document("2") == {}
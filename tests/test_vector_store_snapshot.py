@@ -0,0 +1,58 @@
+import io
+import tarfile
+import pytest
+from langchain_core.documents import Document
+from app.rag.vector_store import VectorStoreManager, collection_name_for
+from app.rag.snapshot import ensure_snapshot, export_snapshot, import_snapshot, warm_up
+from tests.test_vector_store import UnitFakeEmbedding
+
+
+def make_manager(path):
+    manager = VectorStoreManager(persist_directory=str(path))
+    manager.embeddings = UnitFakeEmbedding(size=16)
+    return manager
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    manager = make_manager(tmp_path / "source")
+    for i, text in enumerate(["test levels", "test types", "static testing"]):
+        metadata = {"certification_code": "CTFL", "document_id": str(i)}
+        manager.add_chunks([Document(page_content=text, metadata=metadata)], "CTFL")
+    return manager
+
+
+def test_export_and_import_roundtrip(source, tmp_path):
+    archive = tmp_path / "snapshot.tar.gz"
+    manifest = export_snapshot(source.persist_directory, str(archive))
+    assert manifest["collections"] == {collection_name_for("CTFL"): 3}
+
+    target = tmp_path / "worker" / "chroma_db"
+    import_snapshot(str(archive), str(target))
+    worker = make_manager(target)
+    assert worker.count_chunks() == 3
+    assert worker.search_similar("test types", k=1, filter_dict={"document_id": "1"})[0].page_content == "test types"
+    assert warm_up(worker) == {collection_name_for("CTFL"): 3}
+
+    with pytest.raises(FileExistsError):
+        import_snapshot(str(archive), str(target))
+
+
+def test_ensure_snapshot_keeps_an_existing_store(source, tmp_path):
+    archive = tmp_path / "snapshot.tar.gz"
+    export_snapshot(source.persist_directory, str(archive))
+    target = tmp_path / "chroma_db"
+    assert ensure_snapshot(str(archive), str(target)) is True
+    assert ensure_snapshot(str(archive), str(target)) is False
+
+
+def test_import_rejects_unsafe_archives(tmp_path):
+    archive = tmp_path / "evil.tar.gz"
+    with tarfile.open(archive, "w:gz") as tar:
+        info = tarfile.TarInfo("../escape.txt")
+        info.size = 2
+        tar.addfile(info, io.BytesIO(b"hi"))
+    with pytest.raises(ValueError):
+        import_snapshot(str(archive), str(tmp_path / "chroma_db"))
+    assert not (tmp_path / "escape.txt").exists()